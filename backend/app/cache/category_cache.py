@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.cache.ttl_lru_cache import TTLLRUCache
+
+Loader = Callable[[], List[Dict[str, Any]]]
+
+
+class CategorySet:
+    """Category rows plus an index by ID."""
+
+    __slots__ = ("rows", "by_id")
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows
+        self.by_id = {str(row.get("id")): row for row in rows}
+
+
+class CategoryCache:
+    """
+    In-process cache of category rows.
+
+    Default categories (user_id is null) are the same for everyone, so one
+    process-wide copy is kept and reloaded every `refresh_interval` seconds;
+    while one caller reloads, others keep reading the previous copy. Each
+    user's own categories are cached separately, bounded by `max_users`
+    with LRU eviction, and dropped by the category write paths. `user_ttl`
+    bounds how long another worker's writes can go unnoticed.
+
+    `find` answers (user_id, category_id) lookups from the same data, so
+    validating a category on the transaction write path usually needs no
+    query.
+    """
+
+    def __init__(self, refresh_interval: float = 3600, max_users: int = 10000, user_ttl: float = 300):
+        self.refresh_interval = refresh_interval
+        self._defaults: Optional[CategorySet] = None
+        self._defaults_loaded_at = 0.0
+        self._defaults_lock = threading.Lock()
+
+        self._users = TTLLRUCache(max_entries=max_users, default_ttl=user_ttl)
+        self._lock = threading.Lock()
+        # Bumped by every user invalidation; rows loaded across a write are not stored
+        self._write_seq = 0
+        self.default_reloads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.refresh_interval > 0
+
+    def defaults(self, load: Loader) -> List[Dict[str, Any]]:
+        """The default categories, reloading them once the interval has passed."""
+        return self._default_set(load).rows
+
+    def user_categories(self, user_id: str, load: Loader) -> List[Dict[str, Any]]:
+        """A user's own categories, loading them on a miss."""
+        return self._user_set(user_id, load).rows
+
+    def find(self, user_id: str, category_id: str, load_defaults: Loader, load_user: Loader) -> Optional[Dict[str, Any]]:
+        """
+        A category the user can use (a default one or their own), or None.
+
+        Default categories are checked first so the common case never loads
+        the user's own categories.
+        """
+        category = self._default_set(load_defaults).by_id.get(str(category_id))
+        if category is not None:
+            return category
+        return self._user_set(user_id, load_user).by_id.get(str(category_id))
+
+    def _default_set(self, load: Loader) -> CategorySet:
+        if self._defaults is not None and time.monotonic() - self._defaults_loaded_at < self.refresh_interval:
+            return self._defaults
+
+        # One caller reloads; the rest keep the previous copy if there is one
+        if not self._defaults_lock.acquire(blocking=self._defaults is None):
+            return self._defaults
+        try:
+            if self._defaults is None or time.monotonic() - self._defaults_loaded_at >= self.refresh_interval:
+                try:
+                    self._defaults = CategorySet(load())
+                    self.default_reloads += 1
+                except Exception:
+                    if self._defaults is None:
+                        raise
+                    print("Failed to reload default categories; serving the previous copy")
+                self._defaults_loaded_at = time.monotonic()
+            return self._defaults
+        finally:
+            self._defaults_lock.release()
+
+    def _user_set(self, user_id: str, load: Loader) -> CategorySet:
+        categories = self._users.get(user_id)
+        if categories is not None:
+            return categories
+
+        with self._lock:
+            seq = self._write_seq
+        categories = CategorySet(load())
+        with self._lock:
+            if seq == self._write_seq:
+                self._users.set(user_id, categories)
+        return categories
+
+    def invalidate_user(self, user_id: str):
+        """Drop a user's cached categories after one of them changed."""
+        with self._lock:
+            self._write_seq += 1
+        self._users.delete(user_id)
+
+    def invalidate_defaults(self):
+        """Force the next read to reload the default categories."""
+        self._defaults_loaded_at = 0.0
+
+    def clear(self):
+        self._users.clear()
+        self._defaults = None
+        self._defaults_loaded_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._users.stats()
+        stats["defaults"] = len(self._defaults.rows) if self._defaults else 0
+        stats["default_reloads"] = self.default_reloads
+        return stats
+
+
+category_cache = CategoryCache(
+    refresh_interval=float(os.getenv("CATEGORY_DEFAULTS_REFRESH_SECONDS", "3600")),
+    max_users=int(os.getenv("CATEGORY_CACHE_MAX_USERS", "10000")),
+    user_ttl=float(os.getenv("CATEGORY_CACHE_USER_TTL_SECONDS", "300"))
+)
@@ -0,0 +1,132 @@
+import functools
+import inspect
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+# Coalesce identical concurrent model reads (see `coalesce`)
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait and receive the same result (or the same exception).
+    Nothing is kept once the call finishes, so this is not a cache.
+
+    Calls may belong to a scope (a user ID). `forget(scope)` detaches the
+    scope's calls in flight, so callers arriving after a write start a new
+    call instead of joining one that may have read from before the write.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._scopes: Dict[Hashable, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+        self.forgotten = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], scope: Optional[Hashable] = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                if scope is not None:
+                    self._scopes.setdefault(scope, set()).add(key)
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                # Unless forget() detached it (a newer call may hold the key now)
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                    keys = self._scopes.get(scope)
+                    if keys is not None:
+                        keys.discard(key)
+                        if not keys:
+                            del self._scopes[scope]
+            call.done.set()
+
+    def forget(self, scope: Hashable) -> int:
+        """
+        Detach a scope's calls in flight; call after writing data they read.
+        Their current waiters still get their results. Returns the number detached.
+        """
+        with self._lock:
+            keys = self._scopes.pop(scope, ())
+            for key in keys:
+                del self._calls[key]
+            self.forgotten += len(keys)
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "forgotten": self.forgotten
+            }
+
+
+single_flight = SingleFlight()
+
+
+def coalesce(fn: Optional[Callable] = None, *, scope: Optional[Callable[[Dict[str, Any]], Hashable]] = None):
+    """
+    Run concurrent identical calls of `fn` (same arguments) once.
+
+    Waiting callers get the very same result object, so callers must treat
+    results as read-only. Calls with unhashable arguments are not coalesced.
+
+    `scope` maps the call's arguments (by parameter name) to the user whose
+    data it reads, e.g. `@coalesce(scope=lambda a: a["user_id"])`; writes
+    then call `single_flight.forget(user_id)` so that user's later reads
+    never join a call that started before the write.
+    """
+    if fn is None:
+        return lambda f: coalesce(f, scope=scope)
+
+    signature = inspect.signature(fn) if scope else None
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not SINGLE_FLIGHT_ENABLED:
+            return fn(*args, **kwargs)
+
+        key = (fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return fn(*args, **kwargs)
+        call_scope = scope(signature.bind(*args, **kwargs).arguments) if signature else None
+        return single_flight.do(key, lambda: fn(*args, **kwargs), scope=call_scope)
+
+    return wrapper
@@ -0,0 +1,88 @@
+import hashlib
+import os
+import time
+from typing import Any, Dict, Optional
+
+from app.cache.ttl_lru_cache import TTLLRUCache
+
+
+class CachedToken:
+    """Outcome of validating a bearer token."""
+
+    def __init__(self, valid: bool, user_id: Optional[str] = None, user: Any = None, reason: Optional[str] = None):
+        self.valid = valid
+        self.user_id = user_id
+        self.user = user
+        self.reason = reason
+
+
+class TokenCache:
+    """
+    Cache of validated (and recently rejected) bearer tokens.
+
+    Entries are keyed by a SHA-256 hash of the token so raw tokens are never
+    held in memory longer than the request. A valid token is never cached past
+    its own `exp` claim; rejected tokens are cached for `negative_ttl` seconds
+    so clients stuck retrying a bad token don't reach the auth backend each time.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300, negative_ttl: float = 10):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._cache = TTLLRUCache(max_entries=max_entries)
+        self.negative_hits = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[CachedToken]:
+        """Return the cached outcome for a token, or None if it must be validated."""
+        entry = self._cache.get(self._key(token))
+        if entry is not None and not entry.valid:
+            self.negative_hits += 1
+        return entry
+
+    def store_valid(self, token: str, user_id: str, user: Any = None, expires_at: Optional[float] = None):
+        """
+        Cache a successfully validated token.
+
+        Args:
+            token: Raw bearer token
+            user_id: Authenticated user ID
+            user: User object or claims to restore into `g.user`
+            expires_at: The token's `exp` claim (epoch seconds)
+        """
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+
+        self._cache.set(
+            self._key(token),
+            CachedToken(True, user_id=user_id, user=user),
+            ttl=ttl,
+            tags=(user_id,)
+        )
+
+    def store_invalid(self, token: str, reason: str):
+        """Cache a rejected token for a short time."""
+        self._cache.set(self._key(token), CachedToken(False, reason=reason), ttl=self.negative_ttl)
+
+    def purge_user(self, user_id: str) -> int:
+        """Drop every cached token for a user (e.g. after a password change)."""
+        return self._cache.purge_tag(user_id)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats["negative_hits"] = self.negative_hits
+        return stats
+
+
+token_cache = TokenCache(
+    max_entries=int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000")),
+    ttl=float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300")),
+    negative_ttl=float(os.getenv("TOKEN_CACHE_NEGATIVE_TTL_SECONDS", "10"))
+)
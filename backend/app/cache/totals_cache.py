@@ -0,0 +1,210 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+from app.cache.ttl_lru_cache import TTLLRUCache
+
+
+class CachedTotals:
+    """A computed totals result and how long it counts as fresh."""
+
+    __slots__ = ("value", "fresh_until")
+
+    def __init__(self, value: Any, fresh_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.fresh_until
+
+
+def _as_date(value: Union[date, str, None]) -> Optional[date]:
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10]) if value else None
+
+
+def window_contains(start_date: Optional[date], end_date: Optional[date], tx_date: Optional[date]) -> bool:
+    """Whether a transaction dated `tx_date` counts towards the window's totals."""
+    if tx_date is None:
+        # Any date bound excludes undated transactions
+        return start_date is None and end_date is None
+    return (start_date is None or start_date <= tx_date) and (end_date is None or tx_date <= end_date)
+
+
+class TotalsCache:
+    """
+    Read-through cache of per-user totals, keyed by (user_id, start, end).
+
+    A result is fresh for `ttl` seconds. After that it is still served for
+    up to `stale_ttl` more seconds while a background worker recomputes it
+    (stale-while-revalidate); only a miss computes in the request. Writes
+    drop exactly the cached windows containing the dates they touched, so a
+    user never reads totals from before their own write.
+
+    The cache is per process: with several workers, another worker's writes
+    are only picked up once `ttl` runs out.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300, stale_ttl: float = 3600, workers: int = 2):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._cache = TTLLRUCache(max_entries=max_entries)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="totals-cache")
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        # user_id -> writes by that user, kept only while their totals are
+        # being computed; results computed across a write are not stored
+        self._write_seq: Dict[str, int] = {}
+        self._computing: Dict[str, int] = {}
+
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.recomputes = 0
+        self.recompute_seconds = 0.0
+        self.recompute_max_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self._cache.max_entries > 0
+
+    def get_or_compute(
+        self,
+        user_id: str,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        compute: Callable[[], Any]
+    ) -> Any:
+        """Return the cached totals for a window, computing them on a miss."""
+        if not self.enabled:
+            return compute()
+
+        key = (user_id, start_date, end_date)
+        entry = self._cache.get(key)
+
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return self._compute_and_store(key, compute)
+
+        if entry.is_fresh():
+            with self._lock:
+                self.fresh_hits += 1
+        else:
+            with self._lock:
+                self.stale_hits += 1
+            self._refresh_in_background(key, compute)
+        return entry.value
+
+    def invalidate(self, user_id: str, dates: Iterable[Union[date, str, None]]) -> int:
+        """Drop the user's cached windows that contain any of `dates`. Returns the number dropped."""
+        tx_dates = {_as_date(d) for d in dates}
+        self._count_write(user_id)
+
+        dropped = 0
+        for key, _ in self._cache.tagged(user_id):
+            _, start_date, end_date = key
+            if any(window_contains(start_date, end_date, d) for d in tx_dates):
+                dropped += self._cache.delete(key)
+        return dropped
+
+    def invalidate_user(self, user_id: str) -> int:
+        """Drop every cached window of a user (e.g. after deleting everything)."""
+        self._count_write(user_id)
+        return self._cache.purge_tag(user_id)
+
+    def _count_write(self, user_id: str):
+        # Only computations of this user's totals are affected
+        with self._lock:
+            if user_id in self._write_seq:
+                self._write_seq[user_id] += 1
+
+    def _compute_and_store(self, key, compute: Callable[[], Any]) -> Any:
+        user_id = key[0]
+        with self._lock:
+            self._computing[user_id] = self._computing.get(user_id, 0) + 1
+            seq = self._write_seq.setdefault(user_id, 0)
+
+        try:
+            started = time.perf_counter()
+            value = compute()
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                self.recomputes += 1
+                self.recompute_seconds += elapsed
+                self.recompute_max_seconds = max(self.recompute_max_seconds, elapsed)
+                # Stored under the lock: a write either shows up here or
+                # drops the entry after it is stored
+                if seq == self._write_seq[user_id]:
+                    self._cache.set(
+                        key,
+                        CachedTotals(value, time.monotonic() + self.ttl),
+                        ttl=self.ttl + self.stale_ttl,
+                        tags=(user_id,)
+                    )
+            return value
+        finally:
+            with self._lock:
+                self._computing[user_id] -= 1
+                if not self._computing[user_id]:
+                    del self._computing[user_id]
+                    del self._write_seq[user_id]
+
+    def _refresh_in_background(self, key, compute: Callable[[], Any]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self.refreshes += 1
+
+        def refresh():
+            try:
+                self._compute_and_store(key, compute)
+            except Exception as e:
+                with self._lock:
+                    self.refresh_failures += 1
+                print(f"Failed to refresh cached totals for user {key[0]}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(refresh)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring."""
+        cache_stats = self._cache.stats()
+        with self._lock:
+            lookups = self.fresh_hits + self.stale_hits + self.misses
+            return {
+                "size": cache_stats["size"],
+                "max_entries": cache_stats["max_entries"],
+                "evictions": cache_stats["evictions"],
+                "expirations": cache_stats["expirations"],
+                "fresh_hits": self.fresh_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.fresh_hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                "refreshes": self.refreshes,
+                "refresh_failures": self.refresh_failures,
+                "recomputes": self.recomputes,
+                "recompute_avg_ms": round(self.recompute_seconds * 1000 / self.recomputes, 2) if self.recomputes else 0.0,
+                "recompute_max_ms": round(self.recompute_max_seconds * 1000, 2)
+            }
+
+
+totals_cache = TotalsCache(
+    max_entries=int(os.getenv("TOTALS_CACHE_MAX_ENTRIES", "10000")),
+    ttl=float(os.getenv("TOTALS_CACHE_TTL_SECONDS", "300")),
+    stale_ttl=float(os.getenv("TOTALS_CACHE_STALE_SECONDS", "3600")),
+    workers=int(os.getenv("TOTALS_CACHE_WORKERS", "2"))
+)
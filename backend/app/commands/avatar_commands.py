@@ -0,0 +1,49 @@
+import json
+
+import click
+from flask.cli import AppGroup
+from app.helpers.avatar_helper import PROFILE_IMAGES_BUCKET
+from app.helpers.local_storage import LocalBucket
+from app.jobs.avatar_sweeper import (
+    AVATAR_SWEEP_BATCH_SIZE, AVATAR_SWEEP_MIN_AGE, AVATAR_SWEEP_RATE, AvatarSweeper, supabase_profile_images
+)
+from app.supabase.supabase_client import supabase
+
+avatars_cli = AppGroup("avatars", help="Maintain profile images in storage.")
+
+
+@avatars_cli.command("sweep")
+@click.option("--dry-run", is_flag=True, help="Only report what would be removed.")
+@click.option("--user-id", "user_ids", multiple=True, help="Only sweep this user's images (repeatable).")
+@click.option("--batch-size", type=int, default=AVATAR_SWEEP_BATCH_SIZE, show_default=True, help="Objects per remove call.")
+@click.option("--rate", type=float, default=AVATAR_SWEEP_RATE, show_default=True, help="Storage requests per second.")
+@click.option("--min-age", type=float, default=AVATAR_SWEEP_MIN_AGE, show_default=True, help="Keep objects younger than this (seconds).")
+@click.option("--list", "list_orphans", is_flag=True, help="Print every orphaned object.")
+@click.option("--local-dir", default=None, help="Sweep a local directory standing in for the bucket.")
+@click.option("--profiles-json", type=click.File("r"), default=None,
+              help="Read {user_id: profile_image} from this file instead of the profiles table.")
+def sweep_avatars(dry_run, user_ids, batch_size, rate, min_age, list_orphans, local_dir, profiles_json):
+    """Remove profile images no profile points at any more."""
+    bucket = LocalBucket(local_dir) if local_dir else supabase.storage.from_(PROFILE_IMAGES_BUCKET)
+
+    profile_images = supabase_profile_images
+    if profiles_json:
+        profiles = json.load(profiles_json)
+        profile_images = lambda ids: {i: profiles[i] for i in ids if i in profiles}
+
+    sweeper = AvatarSweeper(
+        bucket,
+        profile_images=profile_images,
+        batch_size=batch_size,
+        rate=rate,
+        min_age=min_age,
+        dry_run=dry_run,
+        on_orphan=(lambda path, size: click.echo(f"orphan {path} ({size} bytes)")) if list_orphans else None
+    )
+    stats = sweeper.sweep(list(user_ids) or None)
+
+    click.echo(
+        f"{'Would remove' if dry_run else 'Removed'} {stats['orphans'] if dry_run else stats['removed']} "
+        f"of {stats['objects']} object(s) ({stats['orphan_bytes']} bytes orphaned) across {stats['users']} user(s); "
+        f"{stats['recent']} too recent, {stats['users_without_profile']} user(s) without a profile skipped"
+    )
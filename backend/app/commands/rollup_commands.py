@@ -0,0 +1,32 @@
+import click
+from flask.cli import AppGroup
+from app.models.transaction_class import Transaction
+
+rollups_cli = AppGroup("rollups", help="Maintain the per-user monthly transaction rollups.")
+
+
+@rollups_cli.command("rebuild")
+@click.option("--user-id", default=None, help="Only rebuild this user's rollups.")
+def rebuild_rollups(user_id):
+    """Recompute rollups from raw transactions (e.g. after a backfill)."""
+    written = Transaction.rebuild_rollups(user_id)
+    click.echo(f"Rebuilt rollups: {written} bucket(s) written")
+
+
+@rollups_cli.command("verify")
+@click.option("--user-id", default=None, help="Only check this user's rollups.")
+def verify_rollups(user_id):
+    """Compare rollups with raw transactions; exits non-zero on drift."""
+    mismatches = Transaction.verify_rollups(user_id)
+
+    for row in mismatches:
+        click.echo(
+            f"user={row.get('user_id')} {row.get('year')}-{row.get('month'):02} "
+            f"category={row.get('category_id')} type={row.get('type')}: "
+            f"rollup total={row.get('rollup_total')} count={row.get('rollup_count')}, "
+            f"actual total={row.get('actual_total')} count={row.get('actual_count')}"
+        )
+
+    if mismatches:
+        raise click.ClickException(f"{len(mismatches)} rollup bucket(s) out of sync; run 'rollups rebuild'")
+    click.echo("Rollups are consistent")
@@ -1,6 +1,7 @@
 from flask import jsonify, request, g
 from app.models.category_class import Category
 from app.middlewares.auth_middleware import require_auth
+from app.helpers.fields_helper import parse_fields
 
 
 @require_auth
@@ -88,13 +89,27 @@ def delete_category(id):
 def get_all_categories():
     try:
         user_id = g.user_id
+        # Optional ?fields=id,name,icon to read and return only those fields
+        fields = parse_fields(request.args.get("fields"), Category.FIELDS)
+
+        categories = Category.get_all_categories(user_id=user_id, fields=fields)
+        if fields is None:
+            categories_data = [cat.__dict__ for cat in categories]
+        else:
+            categories_data = [{field: getattr(cat, field) for field in fields} for cat in categories]
 
-        categories = Category.get_all_categories(user_id=user_id)
         return jsonify({
             "success": True, 
-            "categories": [cat.__dict__ for cat in categories]
+            "categories": categories_data
         }), 200
 
+    except ValueError as e:
+        print(f"Get all categories error: {str(e)}")
+        return jsonify({
+            "error": "Invalid fields",
+            "details": str(e)
+        }), 400
+
     except RuntimeError as e:
         print(f"Get all categories runtime error: {str(e)}")
         return jsonify({
@@ -1,14 +1,21 @@
 from flask import jsonify, request
 from werkzeug.utils import secure_filename
 from app.supabase.supabase_client import supabase
-import uuid as uuid_lib
-from app.helpers.image_helper import optimize_image
+from concurrent.futures import ThreadPoolExecutor
+import os
+from app.helpers.image_helper import ImageBusyError, render_renditions_in_pool
+from app.helpers.avatar_helper import (
+    AVATAR_CACHE_SECONDS, AVATAR_FORMATS, AVATAR_SIZES, PROFILE_IMAGES_BUCKET, avatar_content_id, avatar_dir,
+    avatar_files, avatar_path, avatar_renditions, avatar_srcset, storage_path_from_url
+)
 
 # Allowed image extensions
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
 
-# Storage bucket name
-PROFILE_IMAGES_BUCKET = 'profile-images'
+# Renditions uploaded to storage at once
+AVATAR_UPLOAD_WORKERS = int(os.getenv("AVATAR_UPLOAD_WORKERS", "4"))
+
+_upload_executor = ThreadPoolExecutor(max_workers=max(1, AVATAR_UPLOAD_WORKERS), thread_name_prefix="avatar-upload")
 
 
 def allowed_file(filename: str) -> bool:
@@ -16,10 +23,52 @@ def allowed_file(filename: str) -> bool:
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def upload_renditions(bucket, files, rollback: bool = True) -> None:
+    """
+    Upload (path, bytes, content type) files in parallel. If any upload
+    fails the error is raised; with `rollback`, the ones that succeeded
+    are removed first.
+
+    Only roll back files this request alone wrote: paths shared with a
+    concurrent upload of the same content may be that upload's files,
+    and are left for the avatar sweeper instead.
+    """
+    def upload(path, data, content_type):
+        bucket.upload(
+            path=path,
+            file=data,
+            # upsert: a concurrent upload of the same content may have stored it first
+            file_options={"content-type": content_type, "cache-control": str(AVATAR_CACHE_SECONDS), "upsert": "true"}
+        )
+        return path
+    
+    futures = [_upload_executor.submit(upload, *f) for f in files]
+    uploaded, error = [], None
+    for future in futures:
+        try:
+            uploaded.append(future.result())
+        except Exception as e:
+            error = error or e
+    
+    if error:
+        if rollback and uploaded:
+            try:
+                bucket.remove(uploaded)
+            except Exception as e:
+                print(f"Failed to remove partial upload {uploaded}: {str(e)}")
+        raise error
+
+
 # ---------------- Upload Profile Image ----------------
 def upload_profile_image() -> tuple:
     """
     Uploads a profile image to Supabase Storage and returns the public URL.
+    
+    The image is stored as AVATAR_SIZES renditions in WebP and JPEG under
+    <uid>/<image id>/<size>.<ext>; profiles.profile_image points at the
+    largest JPEG, and the response also maps every rendition's URL. The
+    image id is a hash of the processed renditions, so re-uploading a
+    photo only repoints the profile ("uploaded" is 0).
     """
     uid = request.headers.get("X-User-UID")
     
@@ -42,22 +91,25 @@ def upload_profile_image() -> tuple:
         # Read file content
         file_content = file.read()
         
-        # Generate unique filename
-        file_ext = file.filename.rsplit('.', 1)[1].lower()
-        
-        #optimized image before upload 
-        optimized_image = optimize_image(file_content, max_size=(800,800), quality=85)
-        unique_filename = f"{uid}/{uuid_lib.uuid4()}.{file_ext}"     
+        # Every rendition from one decode (in the image process pool)
+        renditions = render_renditions_in_pool(file_content, AVATAR_SIZES, tuple(AVATAR_FORMATS), 85)
+        image_id = avatar_content_id(renditions)
         
-        # Upload to Supabase Storage
-        response = supabase.storage.from_(PROFILE_IMAGES_BUCKET).upload(
-            path=unique_filename,
-            file=optimized_image,
-            file_options={"content-type": f"image/{file_ext}"}
-        )
+        # Upload to Supabase Storage, skipping renditions this content already has there
+        bucket = supabase.storage.from_(PROFILE_IMAGES_BUCKET)
+        stored = {f.get("name") for f in bucket.list(avatar_dir(uid, image_id))}
+        missing = []
+        for size, by_format in renditions.items():
+            for fmt, data in by_format.items():
+                path = avatar_path(uid, image_id, size, fmt)
+                if path.rsplit("/", 1)[1] not in stored:
+                    missing.append((path, data, AVATAR_FORMATS[fmt][1]))
+        if missing:
+            # Roll back only into a directory this request created
+            upload_renditions(bucket, missing, rollback=not stored)
         
-        # Get public URL
-        public_url = supabase.storage.from_(PROFILE_IMAGES_BUCKET).get_public_url(unique_filename)
+        # Get public URL (of the largest JPEG)
+        public_url = bucket.get_public_url(avatar_path(uid, image_id, AVATAR_SIZES[0], "jpeg"))
         
         # Update profile with new image URL
         supabase.table("profiles").update({
@@ -67,9 +119,15 @@ def upload_profile_image() -> tuple:
         return jsonify({
             "message": "Profile image uploaded successfully",
             "url": public_url,
-            "response": response
+            "uploaded": len(missing),
+            "renditions": avatar_renditions(public_url),
+            "srcset": avatar_srcset(public_url)
         }), 200
         
+    except ValueError as e:
+        return jsonify({"error": "Invalid image", "details": str(e)}), 400
+    except ImageBusyError as e:
+        return jsonify({"error": "Image processing busy", "details": str(e)}), 503
     except Exception as e:
         return jsonify({"error": "Failed to upload image", "details": str(e)}), 500
 
@@ -99,15 +157,17 @@ def delete_profile_image() -> tuple:
         # Extract file path from URL
         image_url = profile.data.get("profile_image")
         
-        # Ensure image_url is a string before splitting
+        # Ensure image_url is a string before parsing
         if not isinstance(image_url, str) or not image_url:
             return jsonify({"error": "Invalid profile image URL"}), 400
         
         # Parse the path from the URL (after /storage/v1/object/public/profile-images/)
-        file_path = image_url.split(f"{PROFILE_IMAGES_BUCKET}/")[-1]
+        file_path = storage_path_from_url(image_url)
         
-        # Delete from storage
-        supabase.storage.from_(PROFILE_IMAGES_BUCKET).remove([file_path])
+        # Delete from storage (every rendition). URLs set by hand may point
+        # elsewhere or at someone else's folder; those only get unlinked.
+        if file_path and file_path.startswith(f"{uid}/"):
+            supabase.storage.from_(PROFILE_IMAGES_BUCKET).remove(avatar_files(file_path))
         
         # Update profile to remove image URL
         supabase.table("profiles").update({
@@ -0,0 +1,143 @@
+from flask import jsonify, request, g, url_for
+from app.middlewares.auth_middleware import require_auth
+from app.jobs.job_runner import JobLimitError, job_runner
+from app.jobs.transaction_jobs import JOB_KINDS
+from uuid import UUID
+
+
+def is_job_id(job_id):
+    try:
+        UUID(job_id)
+        return True
+    except ValueError:
+        return False
+
+
+def accepted(job, message):
+    """The 202 response for a job that was just queued."""
+    return jsonify({
+        "success": True,
+        "message": message,
+        "job": job.to_dict(),
+        "status_url": url_for("jobs.get_job", job_id=job.id)
+    }), 202
+
+
+def too_many_jobs(e):
+    return jsonify({
+        "error": "Too many background jobs",
+        "details": str(e)
+    }), 429
+
+
+#------------- Start job ---------------- #
+@require_auth
+def create_job():
+    """
+    Start a background job for the authenticated user.
+    
+    Expected JSON body:
+    {
+        "kind": "delete_all_transactions"  # or "rebuild_rollups"
+    }
+    
+    Responds 202 with the job; poll status_url for progress and the result.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        kind = data.get("kind")
+        if kind not in JOB_KINDS:
+            return jsonify({
+                "error": "Invalid job kind",
+                "details": f"kind must be one of: {', '.join(JOB_KINDS)}"
+            }), 400
+        
+        job = job_runner.submit(g.user_id, kind, JOB_KINDS[kind](g.user_id))
+        return accepted(job, "Job queued")
+        
+    except JobLimitError as e:
+        return too_many_jobs(e)
+    except ValueError as e:
+        return jsonify({
+            "error": "Validation error",
+            "details": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "error": "An unexpected error occurred",
+            "details": str(e)
+        }), 500
+
+
+#------------- List jobs ---------------- #
+@require_auth
+def list_jobs():
+    """
+    The authenticated user's most recent jobs, newest first.
+    
+    Query parameters:
+    - limit: Optional number of jobs (default 20, at most 100)
+    """
+    try:
+        limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+        jobs = job_runner.list(g.user_id, limit)
+        return jsonify({
+            "success": True,
+            "jobs": [job.to_dict() for job in jobs]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            "error": "An unexpected error occurred",
+            "details": str(e)
+        }), 500
+
+
+#------------- Get job status ---------------- #
+@require_auth
+def get_job(job_id):
+    """Status, progress and (once finished) result or error of one of the user's jobs."""
+    try:
+        job = job_runner.get(job_id, g.user_id) if is_job_id(job_id) else None
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        
+        return jsonify({
+            "success": True,
+            "job": job.to_dict()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            "error": "An unexpected error occurred",
+            "details": str(e)
+        }), 500
+
+
+#------------- Cancel job ---------------- #
+@require_auth
+def cancel_job(job_id):
+    """
+    Cancel one of the user's jobs.
+    
+    A queued job never starts; a running one stops at its next progress
+    report, keeping the work it already did. Poll status_url until the
+    status is "cancelled" (or finished, if the job completed first).
+    """
+    try:
+        job = job_runner.cancel(job_id, g.user_id) if is_job_id(job_id) else None
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        
+        return jsonify({
+            "success": True,
+            "message": "Cancellation requested" if job.active else "Job already finished",
+            "job": job.to_dict(),
+            "status_url": url_for("jobs.get_job", job_id=job.id)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            "error": "An unexpected error occurred",
+            "details": str(e)
+        }), 500
@@ -0,0 +1,33 @@
+import hmac
+import os
+
+from flask import jsonify, request
+
+from app.cache.token_cache import token_cache
+from app.cache.totals_cache import totals_cache
+from app.cache.single_flight import single_flight
+from app.cache.category_cache import category_cache
+from app.jobs.job_runner import job_runner
+
+# Shared secret for GET /api/metrics (sent as X-Metrics-Token); unset disables the endpoint
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+
+# ---------------- Cache counters ---------------- #
+def get_metrics():
+    """In-process cache, request coalescing and job counters for this worker."""
+    if not METRICS_TOKEN:
+        return jsonify({"error": "Not found"}), 404
+
+    supplied = request.headers.get("X-Metrics-Token", "")
+    if not hmac.compare_digest(supplied.encode("utf-8"), METRICS_TOKEN.encode("utf-8")):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    return jsonify({
+        "pid": os.getpid(),
+        "token_cache": token_cache.stats(),
+        "totals_cache": totals_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "category_cache": category_cache.stats(),
+        "jobs": job_runner.stats()
+    }), 200
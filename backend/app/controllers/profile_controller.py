@@ -1,11 +1,13 @@
 from flask import jsonify, request
 from app.supabase.supabase_client import supabase
+from app.helpers.avatar_helper import with_avatar_renditions
 
 
 # ---------------- Get User Profile ----------------
 def get_profile() -> tuple:
     """
-    Retrieves user profile data from the profiles table.
+    Retrieves user profile data from the profiles table, with the URLs of
+    every rendition of the profile image (see upload_profile_image).
     """
     uid = request.headers.get("X-User-UID")
 
@@ -18,7 +20,7 @@ def get_profile() -> tuple:
         if not profile.data:
             return jsonify({"error": "Profile not found"}), 404
 
-        return jsonify({"profile": profile.data}), 200
+        return jsonify({"profile": with_avatar_renditions(profile.data)}), 200
     except Exception as e:
         return jsonify({"error": "Failed to fetch profile", "details": str(e)}), 500
     
@@ -1,7 +1,22 @@
-from app.models.transaction_class import Transaction
-from flask import jsonify, request, g
+from app.models.transaction_class import Transaction, TransactionQuery
+from flask import Response, jsonify, request, g, stream_with_context
 from app.middlewares.auth_middleware import require_auth
+from app.helpers.fields_helper import parse_fields
+from app.repositories.paging import POSTGREST_MAX_ROWS
+from app.jobs.job_runner import JobLimitError, job_runner
+from app.jobs import transaction_jobs
+from app.controllers.jobs_controller import accepted, too_many_jobs
+from app.helpers.statement_parser import detect_format, parse_statement
+from app.helpers.export_helper import (
+    EXPORT_FORMATS, EXPORT_MIMETYPES, csv_chunks, file_chunks, gzip_chunks, jsonl_chunks, write_xlsx
+)
 from datetime import datetime, date
+from uuid import UUID
+import itertools
+import json
+import os
+import shutil
+import tempfile
 
 
 #------------- Create transaction ---------------- #
@@ -215,81 +230,177 @@ def update_transaction(transaction_id):
         }), 500
 
 
+#------------- Listing helpers ---------------- #
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def transaction_to_dict(tx, fields=None):
+    """Response representation of a transaction, limited to `fields` if given."""
+    tx_dict = {
+        "id": str(tx.id),
+        "title": tx.title,
+        "amount": float(tx.amount) if tx.amount is not None else 0,
+        "payment_method": tx.payment_method,
+        "category_id": str(tx.category_id),
+        "type": tx.type,
+        "description": tx.description,
+        "document_url": tx.document_url,
+        "date": str(tx.date) if tx.date else None,
+        "created_at": str(tx.created_at)
+    }
+    
+    if fields is not None:
+        tx_dict["category"] = tx.category
+        return {field: tx_dict[field] for field in fields}
+    
+    # Add category info if available
+    if hasattr(tx, 'category') and tx.category:
+        tx_dict["category"] = tx.category
+    
+    return tx_dict
+
+
+def list_filters():
+    """
+    TransactionQuery filters from the query string, shared by the list and
+    export endpoints: type, category_id, payment_method, order, start_date,
+    end_date, min_amount and max_amount.
+    
+    Raises:
+        ValueError: With the error message to return for a malformed value
+    """
+    filters = {
+        "type_": request.args.get("type", "").strip() or None,
+        "category_id": request.args.get("category_id", "").strip() or None,
+        "payment_method": request.args.get("payment_method", "").strip() or None,
+        "order": request.args.get("order", "desc").strip().lower() or "desc"
+    }
+    
+    # Parse dates if provided
+    for name in ("start_date", "end_date"):
+        raw = request.args.get(name, "").strip()
+        if raw:
+            try:
+                filters[name] = datetime.strptime(raw, "%Y-%m-%d").date()
+            except ValueError:
+                raise ValueError(f"{name} must be in YYYY-MM-DD format")
+    
+    # Parse amount bounds if provided
+    for name in ("min_amount", "max_amount"):
+        raw = request.args.get(name, "").strip()
+        if raw:
+            try:
+                filters[name] = float(raw)
+            except ValueError:
+                raise ValueError(f"{name} must be a valid number")
+    
+    return filters
+
+
+def wants_stream():
+    """True if the client asked for an NDJSON stream instead of one JSON document."""
+    if request.args.get("stream", "").strip().lower() in ("1", "true", "yes"):
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def stream_transactions(query, cursor=None):
+    """
+    Stream a query's transactions as NDJSON, one page in memory at a time.
+    
+    The first page is fetched before the response starts so bad cursors and
+    backend failures still get a proper status code. A failure on a later
+    page ends the stream with an {"error": ..., "details": ...} line.
+    """
+    pages = Transaction.iter_transaction_pages(query, cursor=cursor)
+    first_page = next(pages, [])
+    
+    def generate():
+        for tx in first_page:
+            yield json.dumps(transaction_to_dict(tx, query.fields)) + "\n"
+        try:
+            for page in pages:
+                for tx in page:
+                    yield json.dumps(transaction_to_dict(tx, query.fields)) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": "Failed to retrieve transactions", "details": str(e)}) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
 #------------- Get all transactions ---------------- #
 @require_auth
 def get_all_transactions():
     """
-    Get all transactions for the authenticated user.
+    Get transactions for the authenticated user. Filters combine and are
+    all applied by the database.
     
     Query parameters:
-    - limit: Optional limit on number of results (e.g., ?limit=50)
+    - limit: Optional page size (e.g., ?limit=50)
+    - cursor: Optional next_cursor from the previous page
     - type: Optional filter by type (e.g., ?type=income or ?type=expense)
     - start_date: Optional start date (e.g., ?start_date=2024-01-01)
     - end_date: Optional end date (e.g., ?end_date=2024-12-31)
+    - category_id: Optional category filter
+    - payment_method: Optional payment method filter (e.g., ?payment_method=cash)
+    - min_amount / max_amount: Optional amount bounds (inclusive)
+    - order: Optional 'desc' (newest first, default) or 'asc'
+    - fields: Optional comma-separated subset of fields to return
+      (e.g., ?fields=id,title,amount,date,category); category data is only
+      attached when "category" is requested
+    - stream: Optional ?stream=1 (or Accept: application/x-ndjson) to stream
+      every matching transaction as NDJSON, one object per line, fetched
+      page by page; limit then caps the total streamed
+    - categories: Optional 'embed' (default; each row carries "category") or
+      'side' (rows carry only category_id and the response has one
+      "categories": {id: {...}} table); 'side' is not available when streaming
     """
     try:
         user_id = g.user_id
         
         # Get query parameters
         limit = request.args.get("limit", type=int)
-        type_filter = request.args.get("type", "").strip()
-        start_date_str = request.args.get("start_date", "").strip()
-        end_date_str = request.args.get("end_date", "").strip()
+        cursor = request.args.get("cursor", "").strip() or None
+        fields = parse_fields(request.args.get("fields"), Transaction.FIELDS)
+        categories_mode = request.args.get("categories", "embed").strip().lower() or "embed"
         
-        # Parse dates if provided
-        start_date = None
-        end_date = None
+        if categories_mode not in ["embed", "side"]:
+            return jsonify({"error": "categories must be 'embed' or 'side'"}), 400
         
-        if start_date_str:
-            try:
-                start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-            except ValueError:
-                return jsonify({"error": "start_date must be in YYYY-MM-DD format"}), 400
+        side_categories = categories_mode == "side"
+        if side_categories:
+            if wants_stream():
+                return jsonify({"error": "categories=side is not available when streaming"}), 400
+            # Rows reference category_id; category data goes in the side table
+            fields = tuple(
+                f for f in Transaction.FIELDS
+                if f != "category" and (fields is None or f in fields or f == "category_id")
+            )
         
-        if end_date_str:
-            try:
-                end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
-            except ValueError:
-                return jsonify({"error": "end_date must be in YYYY-MM-DD format"}), 400
+        try:
+            filters = list_filters()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        # Get transactions based on filters
-        if start_date and end_date:
-            transactions = Transaction.get_transactions_by_date_range(user_id, start_date, end_date)
-        elif type_filter:
-            if type_filter not in ["income", "expense"]:
-                return jsonify({"error": "Type must be 'income' or 'expense'"}), 400
-            transactions = Transaction.get_transactions_by_type(user_id, type_filter)
-        else:
-            transactions = Transaction.get_all_transactions(user_id, limit=limit)
-        
-        # Format response
-        transactions_data = []
-        for tx in transactions:
-            tx_dict = {
-                "id": str(tx.id),
-                "title": tx.title,
-                "amount": float(tx.amount) if tx.amount is not None else 0,
-                "payment_method": tx.payment_method,
-                "category_id": str(tx.category_id),
-                "type": tx.type,
-                "description": tx.description,
-                "document_url": tx.document_url,
-                "date": str(tx.date) if tx.date else None,
-                "created_at": str(tx.created_at)
-            }
-            
-            # Add category info if available
-            if hasattr(tx, 'category') and tx.category:
-                tx_dict["category"] = tx.category
-            
-            transactions_data.append(tx_dict)
+        query = TransactionQuery(user_id, limit=limit, fields=fields, **filters)
+        if wants_stream():
+            return stream_transactions(query, cursor)
         
-        return jsonify({
+        transactions, next_cursor = Transaction.get_transactions(query, cursor=cursor)
+        transactions_data = [transaction_to_dict(tx, fields) for tx in transactions]
+        
+        response = {
             "success": True,
             "message": "Transactions retrieved successfully",
             "count": len(transactions_data),
-            "transactions": transactions_data
-        }), 200
+            "transactions": transactions_data,
+            "next_cursor": next_cursor
+        }
+        if side_categories:
+            response["categories"] = Transaction.category_table(user_id, [tx.category_id for tx in transactions])
+        
+        return jsonify(response), 200
         
     except ValueError as e:
         return jsonify({
@@ -308,38 +419,149 @@ def get_all_transactions():
         }), 500
 
 
+#------------- Export transactions ---------------- #
+# Rows read from the database per page while exporting; one below
+# max-rows, as each page query fetches one extra row to find the next page
+TRANSACTION_EXPORT_PAGE_SIZE = int(os.getenv("TRANSACTION_EXPORT_PAGE_SIZE", str(POSTGREST_MAX_ROWS - 1)))
+
+# Columns exported when ?fields= is not given
+EXPORT_COLUMNS = (
+    "id", "date", "title", "amount", "type", "category", "payment_method",
+    "description", "document_url", "created_at", "category_id"
+)
+
+
+@require_auth
+def export_transactions():
+    """
+    Download the authenticated user's transactions as a file.
+    
+    Query parameters:
+    - format: 'csv' (default), 'jsonl' or 'xlsx'
+    - gzip: Optional ?gzip=1 to download a gzip-compressed csv/jsonl file
+    - fields: Optional comma-separated subset of fields to export
+    - limit: Optional cap on the number of rows exported
+    - type, category_id, payment_method, start_date, end_date, min_amount,
+      max_amount, order: Same filters as GET /api/transactions/
+    
+    Rows are read from the database page by page. CSV and JSON Lines are
+    written to the response as each page arrives; XLSX is assembled in a
+    spooled temp file first and then sent. In CSV and XLSX the category
+    column holds the category name.
+    """
+    try:
+        user_id = g.user_id
+        
+        fmt = request.args.get("format", "csv").strip().lower() or "csv"
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        
+        compress = request.args.get("gzip", "").strip().lower() in ("1", "true", "yes")
+        if compress and fmt == "xlsx":
+            return jsonify({"error": "gzip is not available for xlsx, which is already compressed"}), 400
+        
+        limit = request.args.get("limit", type=int)
+        fields = parse_fields(request.args.get("fields"), Transaction.FIELDS)
+        
+        try:
+            filters = list_filters()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        query = TransactionQuery(user_id, limit=limit, fields=fields, **filters)
+        columns = fields or EXPORT_COLUMNS
+        
+        pages = Transaction.iter_transaction_pages(query, page_size=TRANSACTION_EXPORT_PAGE_SIZE)
+        # The first page is read before responding so failures get a status code
+        first_page = next(pages, [])
+        
+        def rows():
+            for page in itertools.chain([first_page], pages):
+                records = [transaction_to_dict(tx, fields) for tx in page]
+                if fmt != "jsonl":
+                    for record in records:
+                        if "category" in record:
+                            record["category"] = (record["category"] or {}).get("name")
+                yield records
+        
+        filename = f"transactions-{date.today():%Y%m%d}.{fmt}"
+        
+        if fmt == "xlsx":
+            workbook = write_xlsx(rows(), columns)
+            size = workbook.seek(0, os.SEEK_END)
+            workbook.seek(0)
+            return Response(
+                file_chunks(workbook),
+                mimetype=EXPORT_MIMETYPES[fmt],
+                headers={
+                    "Content-Disposition": f"attachment; filename={filename}",
+                    "Content-Length": str(size)
+                }
+            )
+        
+        chunks = csv_chunks(rows(), columns) if fmt == "csv" else jsonl_chunks(rows())
+        if compress:
+            chunks = gzip_chunks(chunks)
+            filename += ".gz"
+        
+        return Response(
+            stream_with_context(chunks),
+            mimetype="application/gzip" if compress else EXPORT_MIMETYPES[fmt],
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+        
+    except ValueError as e:
+        return jsonify({
+            "error": "Validation error", 
+            "details": str(e)
+        }), 400
+    except RuntimeError as e:
+        return jsonify({
+            "error": "Failed to export transactions", 
+            "details": str(e)
+        }), 500
+    except Exception as e:
+        return jsonify({
+            "error": "An unexpected error occurred", 
+            "details": str(e)
+        }), 500
+
+
 #------------- Get single transaction ---------------- #
 @require_auth
 def get_transaction(transaction_id):
-    """Get a specific transaction by ID."""
+    """
+    Get a specific transaction by ID.
+    
+    Query parameters:
+    - fields: Optional comma-separated subset of fields to return
+    """
     try:
         if not transaction_id:
             return jsonify({"error": "Transaction ID is required"}), 400
         
         user_id = g.user_id
-        transaction = Transaction.get_transaction_by_id(transaction_id, user_id)
+        fields = parse_fields(request.args.get("fields"), Transaction.FIELDS)
+        transaction = Transaction.get_transaction_by_id(transaction_id, user_id, fields=fields)
         
         if not transaction:
             return jsonify({"error": "Transaction not found"}), 404
         
+        transaction_data = transaction_to_dict(transaction, fields)
+        if fields is None:
+            transaction_data["category"] = transaction.category
+        
         return jsonify({
             "success": True,
             "message": "Transaction retrieved successfully",
-            "transaction": {
-                "id": str(transaction.id),
-                "title": transaction.title,
-                "amount": float(transaction.amount) if transaction.amount is not None else 0,
-                "payment_method": transaction.payment_method,
-                "category_id": str(transaction.category_id),
-                "type": transaction.type,
-                "description": transaction.description,
-                "document_url": transaction.document_url,
-                "date": str(transaction.date) if transaction.date else None,
-                "created_at": str(transaction.created_at),
-                "category": transaction.category if hasattr(transaction, 'category') else None
-            }
+            "transaction": transaction_data
         }), 200
         
+    except ValueError as e:
+        return jsonify({
+            "error": "Validation error", 
+            "details": str(e)
+        }), 400
     except RuntimeError as e:
         return jsonify({
             "error": "Failed to retrieve transaction", 
@@ -391,20 +613,308 @@ def delete_all_transactions():
     """
     Delete all transactions for the authenticated user.
     WARNING: This is a destructive operation!
+    
+    The deletion runs as a background job; poll status_url until its status
+    is "succeeded" (result.deleted_count holds the number deleted) or
+    "failed". progress.deleted counts the rows deleted so far, and
+    POST /api/jobs/<id>/cancel stops it after the current batch.
     """
     try:
         user_id = g.user_id
-        deleted_transactions = Transaction.delete_all_transactions(user_id)
+        job = job_runner.submit(user_id, "delete_all_transactions", transaction_jobs.delete_all_transactions(user_id))
+        return accepted(job, "Deleting all transactions in the background")
         
+    except JobLimitError as e:
+        return too_many_jobs(e)
+    except RuntimeError as e:
         return jsonify({
-            "success": True, 
-            "message": f"All transactions deleted successfully",
-            "deleted_count": len(deleted_transactions)
+            "error": "Failed to delete transactions", 
+            "details": str(e)
+        }), 500
+    except Exception as e:
+        return jsonify({
+            "error": "An unexpected error occurred", 
+            "details": str(e)
+        }), 500
+
+
+#------------- Batch operations ---------------- #
+# Upper bound on operations per batch request
+TRANSACTION_BATCH_MAX_OPERATIONS = int(os.getenv("TRANSACTION_BATCH_MAX_OPERATIONS", "500"))
+
+
+def parse_batch_operation(item):
+    """
+    Validate one batch operation the way the single-item endpoints do and
+    return the keyword arguments for Transaction.apply_batch.
+    
+    Raises:
+        ValueError: If the operation is invalid
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Operation must be an object")
+    
+    op = str(item.get("op", "")).strip().lower()
+    if op not in ["create", "update", "delete"]:
+        raise ValueError("op must be 'create', 'update' or 'delete'")
+    
+    parsed = {"op": op}
+    if op != "create":
+        transaction_id = str(item.get("id") or "").strip()
+        if not transaction_id:
+            raise ValueError("Transaction ID is required")
+        try:
+            parsed["transaction_id"] = str(UUID(transaction_id))
+        except ValueError:
+            raise ValueError("Transaction ID must be a valid UUID")
+        if op == "delete":
+            return parsed
+    
+    data = item.get("data")
+    if not isinstance(data, dict) or not data:
+        raise ValueError("data is required")
+    
+    parsed["title"] = str(data.get("title") or "").strip() or None
+    parsed["payment_method"] = str(data.get("payment_method") or "").strip() or None
+    parsed["category_id"] = str(data.get("category_id") or "").strip() or None
+    if parsed["category_id"]:
+        # Checked here: the batch's categories are looked up in one query,
+        # which a malformed id would fail for every operation
+        try:
+            parsed["category_id"] = str(UUID(parsed["category_id"]))
+        except ValueError:
+            raise ValueError("Category ID must be a valid UUID")
+    if op == "create" or "description" in data:
+        parsed["description"] = str(data.get("description") or "").strip() or (None if op == "create" else "")
+    if op == "create" or "document_url" in data:
+        parsed["document_url"] = str(data.get("document_url") or "").strip() or (None if op == "create" else "")
+    
+    amount = data.get("amount")
+    if amount is not None:
+        try:
+            amount = float(amount)
+        except (TypeError, ValueError):
+            raise ValueError("Amount must be a valid number")
+        if amount <= 0:
+            raise ValueError("Amount must be greater than 0")
+    parsed["amount"] = amount
+    
+    date_str = str(data.get("date") or "").strip()
+    parsed["date_"] = None
+    if date_str:
+        try:
+            parsed["date_"] = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValueError("Date must be in YYYY-MM-DD format")
+    
+    if op == "create":
+        if not parsed["title"]:
+            raise ValueError("Title is required")
+        if amount is None:
+            raise ValueError("Amount is required")
+        if not parsed["payment_method"]:
+            raise ValueError("Payment method is required")
+        if not parsed["category_id"]:
+            raise ValueError("Category ID is required")
+    return parsed
+
+
+@require_auth
+def batch_transactions():
+    """
+    Create, update and delete many transactions in one request.
+    
+    Expected JSON body:
+    {
+        "operations": [
+            {"op": "create", "data": {...same fields as POST /}},
+            {"op": "update", "id": "uuid-here", "data": {...same fields as PUT /<id>}},
+            {"op": "delete", "id": "uuid-here"}
+        ]
+    }
+    
+    Operations succeed or fail individually; the response has one result per
+    operation, in order:
+    {"index": 0, "op": "create", "success": true, "transaction": {...}}
+    {"index": 1, "op": "update", "success": false, "error": "..."}
+    """
+    try:
+        data = request.get_json(silent=True)
+        operations = data.get("operations") if isinstance(data, dict) else None
+        
+        if not isinstance(operations, list) or not operations:
+            return jsonify({"error": "operations must be a non-empty list"}), 400
+        
+        if len(operations) > TRANSACTION_BATCH_MAX_OPERATIONS:
+            return jsonify({
+                "error": f"At most {TRANSACTION_BATCH_MAX_OPERATIONS} operations per batch"
+            }), 400
+        
+        user_id = g.user_id
+        
+        # Invalid operations are reported without being sent to the model
+        results = [None] * len(operations)
+        valid = []
+        for index, item in enumerate(operations):
+            try:
+                valid.append((index, parse_batch_operation(item)))
+            except ValueError as e:
+                op = item.get("op") if isinstance(item, dict) else None
+                results[index] = {"index": index, "op": op, "success": False, "error": str(e)}
+        
+        applied = Transaction.apply_batch(user_id, [op for _, op in valid]) if valid else []
+        for (index, op), result in zip(valid, applied):
+            item = {"index": index, "op": op["op"], "success": result["success"]}
+            if result["success"]:
+                item["transaction"] = transaction_to_dict(result["transaction"])
+            else:
+                item["error"] = result["error"]
+            results[index] = item
+        
+        succeeded = sum(1 for result in results if result["success"])
+        return jsonify({
+            "success": succeeded == len(results),
+            "message": f"{succeeded} of {len(results)} operations succeeded",
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results
         }), 200
         
     except RuntimeError as e:
         return jsonify({
-            "error": "Failed to delete transactions", 
+            "error": "Failed to apply batch", 
+            "details": str(e)
+        }), 500
+    except Exception as e:
+        return jsonify({
+            "error": "An unexpected error occurred", 
+            "details": str(e)
+        }), 500
+
+
+# Background imports keep their copy of the upload in memory up to this size, then in a temp file
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+#------------- Import statement ---------------- #
+@require_auth
+def import_transactions():
+    """
+    Import a bank statement file (CSV, OFX or QIF) as transactions.
+    
+    Multipart form fields:
+    - file: The statement
+    - format: Optional 'csv', 'ofx' or 'qif' (defaults to the file extension)
+    - mapping: Optional JSON object naming the CSV column for each field,
+      e.g. {"date": "Booking Date", "title": "Payee", "amount": "Value"};
+      fields are date, title, amount, debit, credit, description, category
+      and payment_method, and unmapped ones are recognised from the header
+    - date_format: Optional strptime format for dates (e.g. %d/%m/%Y); by
+      default one format is picked per file, and rows whose dates read
+      both day- and month-first throughout the file are skipped
+    - batch_size: Optional rows written per batch
+    - payment_method: Optional payment method for rows without one
+      (defaults to bank_transfer)
+    - income_category_id / expense_category_id: Optional categories for
+      rows whose category is missing or unknown
+    - stream: Optional ?stream=1 (or Accept: application/x-ndjson) to get
+      one NDJSON progress line per batch while the import runs
+    - async: Optional ?async=1 to run the import as a background job
+      instead; responds 202 with a status_url whose progress is the
+      latest report
+    
+    Negative amounts are imported as expenses, positive ones as income.
+    Rows matching an existing transaction on date, amount and title are
+    skipped as duplicates.
+    """
+    try:
+        if 'file' not in request.files:
+            return jsonify({"error": "No file provided"}), 400
+        
+        file = request.files['file']
+        if not file.filename:
+            return jsonify({"error": "No file selected"}), 400
+        
+        fmt = detect_format(file.filename, request.form.get("format"))
+        
+        mapping = None
+        mapping_str = request.form.get("mapping", "").strip()
+        if mapping_str:
+            try:
+                mapping = json.loads(mapping_str)
+            except ValueError:
+                return jsonify({"error": "mapping must be a JSON object"}), 400
+            if not isinstance(mapping, dict):
+                return jsonify({"error": "mapping must be a JSON object"}), 400
+        
+        batch_size = request.form.get("batch_size", type=int)
+        if batch_size is not None and batch_size <= 0:
+            return jsonify({"error": "batch_size must be greater than 0"}), 400
+        
+        run_async = request.args.get("async", "").strip().lower() in ("1", "true", "yes")
+        stream = file.stream
+        if run_async:
+            # The request's upload is gone once we respond, so the job reads a copy
+            stream = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES)
+            shutil.copyfileobj(file.stream, stream)
+            stream.seek(0)
+        
+        rows = parse_statement(
+            stream,
+            fmt,
+            mapping=mapping,
+            date_format=request.form.get("date_format", "").strip() or None
+        )
+        progress = Transaction.import_transactions(
+            g.user_id,
+            rows,
+            batch_size=batch_size,
+            payment_method=request.form.get("payment_method", "").strip() or "bank_transfer",
+            income_category_id=request.form.get("income_category_id", "").strip() or None,
+            expense_category_id=request.form.get("expense_category_id", "").strip() or None
+        )
+        
+        if run_async:
+            try:
+                job = job_runner.submit(g.user_id, "import_transactions", transaction_jobs.import_transactions(progress, stream))
+            except Exception:
+                stream.close()
+                raise
+            return accepted(job, "Importing transactions in the background")
+        
+        # The first batch runs before responding so bad files still get a 400
+        report = next(progress)
+        
+        if wants_stream():
+            def generate():
+                yield json.dumps(report) + "\n"
+                try:
+                    for update in progress:
+                        yield json.dumps(update) + "\n"
+                except Exception as e:
+                    yield json.dumps({"error": "Failed to import transactions", "details": str(e)}) + "\n"
+            
+            return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+        
+        for report in progress:
+            pass
+        
+        return jsonify({
+            "success": True,
+            "message": f"Imported {report['imported']} transactions",
+            "import": report
+        }), 200
+        
+    except JobLimitError as e:
+        return too_many_jobs(e)
+    except ValueError as e:
+        return jsonify({
+            "error": "Validation error", 
+            "details": str(e)
+        }), 400
+    except RuntimeError as e:
+        return jsonify({
+            "error": "Failed to import transactions", 
             "details": str(e)
         }), 500
     except Exception as e:
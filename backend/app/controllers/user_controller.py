@@ -1,6 +1,7 @@
 # app/controllers/user_controller.py
-from flask import request, jsonify
-from app.supabase.supabase_client import supabase 
+from flask import request, jsonify, g
+from app.supabase.supabase_client import client_pool
+from app.cache.token_cache import token_cache
 import re
 from typing import Optional
 
@@ -26,35 +27,38 @@ def register_user() -> tuple:
         return jsonify({"error": "Please enter a valid email"}), 400
 
     try:
-        response = supabase.auth.sign_up({
-            "email": email,
-            "password": password,
-            "options": {"data": {"name": name}}
-        })
-
-        if not response.user:
-            return jsonify({"error": response.session or "Registration failed"}), 400
-
-        if response.user.email:
-            return jsonify({"error": "User email already exist"}), 500
+        # Signing up may sign the client in: never on the request's pooled client.
+        # The profile row is written as the new user when a session is returned.
+        with client_pool.auth_session() as auth_client:
+            response = auth_client.auth.sign_up({
+                "email": email,
+                "password": password,
+                "options": {"data": {"name": name}}
+            })
+
+            if not response.user:
+                return jsonify({"error": response.session or "Registration failed"}), 400
+
+            if response.user.email:
+                return jsonify({"error": "User email already exist"}), 500
         
-        # JSON-serializable user object
-        user_data = {
-            "id": response.user.id,
-            "email": response.user.email,
-            "created_at": str(response.user.created_at),
-            "user_metadata": response.user.user_metadata
-        }
-
-        # Insert into profiles table
-        uuid = response.user.id
-        supabase.table("profiles").insert({
-            "id": uuid,
-            "name": name,
-            "profile_image": ''
-        }).execute()
-
-        return jsonify({"message": "User registered successfully", "user": user_data}), 201
+            # JSON-serializable user object
+            user_data = {
+                "id": response.user.id,
+                "email": response.user.email,
+                "created_at": str(response.user.created_at),
+                "user_metadata": response.user.user_metadata
+            }
+
+            # Insert into profiles table
+            uuid = response.user.id
+            auth_client.table("profiles").insert({
+                "id": uuid,
+                "name": name,
+                "profile_image": ''
+            }).execute()
+
+            return jsonify({"message": "User registered successfully", "user": user_data}), 201
 
     except Exception as profile_error:
         return jsonify({"error": "Failed to create profile", "details": str(profile_error)}), 500
@@ -78,10 +82,11 @@ def login_user() -> tuple:
         return jsonify({"error": "Please enter a valid email"}), 400
 
     try:
-        response = supabase.auth.sign_in_with_password({
-            "email": email,
-            "password": password
-        })
+        with client_pool.auth_session() as auth_client:
+            response = auth_client.auth.sign_in_with_password({
+                "email": email,
+                "password": password
+            })
 
         if not response.user:
             return jsonify({"error": "Invalid email or password"}), 401
@@ -129,8 +134,13 @@ def update_password() -> tuple:
     try:
         # Extract token from "Bearer <token>" format
         token = access_token.replace("Bearer ", "") if access_token else ""
-        supabase.auth.set_session(token, '')
-        supabase.auth.update_user({"password": new_password})
+
+        # Use a client bound to this user only, never the shared one
+        with client_pool.user_session(token) as user_client:
+            user_client.auth.update_user({"password": new_password})
+
+        # Tokens validated before the change must be re-checked
+        token_cache.purge_user(g.user_id)
         return jsonify({"message": "Password updated successfully"}), 200
     except Exception as e:
         return jsonify({"error": "Failed to update password", "details": str(e)}), 500
@@ -150,8 +160,10 @@ def update_email() -> tuple:
         return jsonify({"error": "Access token required"}), 401
 
     try: 
-        supabase.auth.set_session(access_token, '')
-        supabase.auth.update_user({"email": new_email})
+        token = access_token.replace("Bearer ", "")
+        with client_pool.user_session(token) as user_client:
+            user_client.auth.update_user({"email": new_email})
+        token_cache.purge_user(g.user_id)
         return jsonify({"message": "Email updated successfully"}), 200
     except Exception as e:
         return jsonify({"error": "Failed to update email", "details": str(e)}), 500
@@ -173,7 +185,8 @@ def refresh_access_token() -> tuple:
 
     try:
         # Exchange refresh token for a new session
-        session_response = supabase.auth.refresh_session(refresh_token)
+        with client_pool.auth_session() as auth_client:
+            session_response = auth_client.auth.refresh_session(refresh_token)
 
         if not session_response.session:
             return jsonify({"error": "Invalid refresh token"}), 401
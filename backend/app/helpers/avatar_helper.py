@@ -0,0 +1,106 @@
+import hashlib
+import re
+from typing import Dict, List, Optional
+from urllib.parse import unquote, urlparse
+
+# Storage bucket holding profile images
+PROFILE_IMAGES_BUCKET = 'profile-images'
+
+# Rendition widths (bounding squares), largest first; the largest JPEG is profiles.profile_image
+AVATAR_SIZES = (800, 400, 160, 64)
+
+# format -> (file extension, content type)
+AVATAR_FORMATS = {
+    "webp": ("webp", "image/webp"),
+    "jpeg": ("jpg", "image/jpeg"),
+}
+
+# Renditions never change once written (other content gets another directory)
+AVATAR_CACHE_SECONDS = 31536000
+
+# [.../]<uid>/<image id>/<size>.jpg
+_MAIN_RENDITION = re.compile(rf"^(?P<base>.+/)(?P<size>{AVATAR_SIZES[0]})\.jpg$")
+
+
+def storage_path_from_url(url: Optional[str], bucket: str = PROFILE_IMAGES_BUCKET) -> Optional[str]:
+    """
+    Object path of a public storage URL (.../object/public/<bucket>/<path>),
+    or None if the URL does not point into `bucket`.
+    """
+    if not url:
+        return None
+    marker = f"/object/public/{bucket}/"
+    path = urlparse(url).path
+    if marker not in path:
+        return None
+    return unquote(path.split(marker, 1)[1]) or None
+
+
+def avatar_content_id(renditions: Dict[int, Dict[str, bytes]]) -> str:
+    """
+    Image id derived from the processed bytes of every rendition, so the
+    same photo uploaded twice lands in the same directory.
+    """
+    digest = hashlib.sha256()
+    for size in sorted(renditions):
+        for fmt in sorted(renditions[size]):
+            data = renditions[size][fmt]
+            digest.update(f"{size}.{fmt}:{len(data)}:".encode("utf-8"))
+            digest.update(data)
+    return digest.hexdigest()[:32]
+
+
+def avatar_dir(uid: str, image_id: str) -> str:
+    """Storage directory holding every rendition of one uploaded image."""
+    return f"{uid}/{image_id}"
+
+
+def avatar_path(uid: str, image_id: str, size: int, fmt: str) -> str:
+    """Storage path of one rendition: <uid>/<image id>/<size>.<ext>."""
+    return f"{avatar_dir(uid, image_id)}/{size}.{AVATAR_FORMATS[fmt][0]}"
+
+
+def avatar_renditions(profile_image: Optional[str]) -> Optional[Dict[str, Dict[str, str]]]:
+    """
+    URLs (or storage paths) of every rendition of a profile image,
+    {format: {size: url}}, worked out from the URL or path of its largest
+    JPEG (profiles.profile_image). None for images uploaded before
+    renditions existed.
+    """
+    match = _MAIN_RENDITION.match(profile_image or "")
+    if not match:
+        return None
+    base = match.group("base")
+    return {
+        fmt: {str(size): f"{base}{size}.{ext}" for size in sorted(AVATAR_SIZES)}
+        for fmt, (ext, _) in AVATAR_FORMATS.items()
+    }
+
+
+def avatar_files(path: str) -> List[str]:
+    """Storage paths of every rendition of an image, given its main path; legacy images have one."""
+    renditions = avatar_renditions(path)
+    if renditions is None:
+        return [path]
+    return [p for urls in renditions.values() for p in urls.values()]
+
+
+def avatar_srcset(profile_image: Optional[str]) -> Optional[Dict[str, str]]:
+    """HTML srcset strings ("<url> 64w, ...") per format for a profile image."""
+    renditions = avatar_renditions(profile_image)
+    if renditions is None:
+        return None
+    return {
+        fmt: ", ".join(f"{url} {size}w" for size, url in urls.items())
+        for fmt, urls in renditions.items()
+    }
+
+
+def with_avatar_renditions(profile: Dict) -> Dict:
+    """A profile row plus the rendition URLs and srcsets of its image."""
+    image = profile.get("profile_image")
+    return dict(
+        profile,
+        profile_image_renditions=avatar_renditions(image),
+        profile_image_srcset=avatar_srcset(image)
+    )
@@ -0,0 +1,45 @@
+import base64
+import json
+import re
+from typing import Any, Dict, Optional
+
+# Columns that define the listing order: date desc (undated last), created_at desc, id desc
+CURSOR_KEYS = ("date", "created_at", "id")
+
+# Cursor values end up in query filters, so only accept well-formed values
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_TIMESTAMP_RE = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}(:?\d{2})?)?$")
+_UUID_RE = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+
+
+def encode_cursor(record: Dict[str, Any]) -> str:
+    """Build an opaque page cursor from the last row of a page."""
+    payload = [record.get(key) for key in CURSOR_KEYS]
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Optional[str]]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(payload, list) or len(payload) != len(CURSOR_KEYS):
+        raise ValueError("Invalid cursor")
+
+    after = dict(zip(CURSOR_KEYS, payload))
+    if after["date"] is not None and not (isinstance(after["date"], str) and _DATE_RE.fullmatch(after["date"])):
+        raise ValueError("Invalid cursor")
+    if not (isinstance(after["created_at"], str) and _TIMESTAMP_RE.fullmatch(after["created_at"])):
+        raise ValueError("Invalid cursor")
+    if not (isinstance(after["id"], str) and _UUID_RE.fullmatch(after["id"])):
+        raise ValueError("Invalid cursor")
+    return after
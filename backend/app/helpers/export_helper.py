@@ -0,0 +1,156 @@
+import csv
+import io
+import json
+import re
+import tempfile
+import zipfile
+import zlib
+from typing import Any, Dict, IO, Iterable, Iterator, List, Sequence
+from xml.sax.saxutils import escape
+
+EXPORT_FORMATS = ("csv", "jsonl", "xlsx")
+
+EXPORT_MIMETYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# XLSX files stay in memory up to this size, then move to a temp file
+XLSX_SPOOL_BYTES = 8 * 1024 * 1024
+
+# Bytes per chunk when sending a finished file
+FILE_CHUNK_SIZE = 64 * 1024
+
+Row = Dict[str, Any]
+
+
+def csv_chunks(pages: Iterable[List[Row]], columns: Sequence[str]) -> Iterator[str]:
+    """CSV text for the header, then one chunk per page of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    for page in pages:
+        for row in page:
+            writer.writerow(["" if row.get(c) is None else row.get(c) for c in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def jsonl_chunks(pages: Iterable[List[Row]]) -> Iterator[str]:
+    """One JSON object per line, one chunk per page of rows."""
+    for page in pages:
+        yield "".join(json.dumps(row) + "\n" for row in page)
+
+
+def gzip_chunks(chunks: Iterable[str]) -> Iterator[bytes]:
+    """Gzip-compress a stream of text chunks as it is produced."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# ---------------- XLSX ---------------- #
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Transactions" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+# Characters XML 1.0 does not allow
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xlsx_cell(value: Any) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c t="n"><v>{value}</v></c>'
+    text = escape(_XML_INVALID.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values: Iterable[Any]) -> str:
+    return "<row>" + "".join(_xlsx_cell(v) for v in values) + "</row>"
+
+
+def write_xlsx(pages: Iterable[List[Row]], columns: Sequence[str]) -> IO[bytes]:
+    """
+    Write rows to a single-sheet XLSX workbook and return it, rewound.
+
+    The sheet is written row by row into the zip, which lives in a spooled
+    temp file, so memory use is bounded by XLSX_SPOOL_BYTES rather than by
+    the number of rows. Strings are stored inline; no styles are written.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_BYTES)
+    try:
+        with zipfile.ZipFile(spool, "w", zipfile.ZIP_DEFLATED) as workbook:
+            for name, xml in _XLSX_PARTS.items():
+                workbook.writestr(name, xml)
+
+            with workbook.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+                sheet.write(
+                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                )
+                sheet.write(_xlsx_row(columns).encode("utf-8"))
+                for page in pages:
+                    sheet.write("".join(_xlsx_row(row.get(c) for c in columns) for row in page).encode("utf-8"))
+                sheet.write(b"</sheetData></worksheet>")
+    except Exception:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return spool
+
+
+def file_chunks(file: IO[bytes]) -> Iterator[bytes]:
+    """Read a file in FILE_CHUNK_SIZE chunks, closing it at the end."""
+    try:
+        while True:
+            chunk = file.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        file.close()
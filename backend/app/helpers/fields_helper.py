@@ -0,0 +1,26 @@
+from typing import Optional, Sequence, Tuple
+
+
+def parse_fields(raw: Optional[str], allowed: Sequence[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a ?fields=a,b,c parameter against a whitelist.
+
+    Returns the requested fields in whitelist order, or None when the
+    parameter is absent (all fields).
+
+    Raises:
+        ValueError: If the list is empty or names an unknown field
+    """
+    if raw is None:
+        return None
+
+    requested = {f.strip() for f in raw.split(",") if f.strip()}
+    if not requested:
+        raise ValueError("fields must name at least one field")
+
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}"
+        )
+    return tuple(f for f in allowed if f in requested)
@@ -1,20 +1,210 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from PIL import Image
 from io import BytesIO
 
-def optimize_image(file_content, max_size=(800, 800), quality=85):
-    """Optimize image before uploading."""
-    img = Image.open(BytesIO(file_content))
-    
+# Largest image (width x height) accepted; checked from the header, before decoding
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", "40000000"))
+
+# Processes optimizing images (0 optimizes on the request thread)
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+# Images being optimized or waiting for a process; further uploads wait
+# up to IMAGE_QUEUE_TIMEOUT_SECONDS for a slot, then are turned away
+IMAGE_MAX_IN_FLIGHT = int(os.getenv("IMAGE_MAX_IN_FLIGHT", "4"))
+IMAGE_QUEUE_TIMEOUT = float(os.getenv("IMAGE_QUEUE_TIMEOUT_SECONDS", "5"))
+
+# Longest wait for one image to be optimized
+IMAGE_TIMEOUT = float(os.getenv("IMAGE_TIMEOUT_SECONDS", "30"))
+
+# How image processes are started; spawn where there is no forkserver (Windows)
+IMAGE_START_METHOD = os.getenv("IMAGE_START_METHOD") or (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+class ImageBusyError(Exception):
+    """Raised when IMAGE_MAX_IN_FLIGHT images are already being optimized."""
+
+
+def check_image_size(img):
+    """Reject an opened (not yet decoded) image above IMAGE_MAX_PIXELS."""
+    width, height = img.size
+    if width * height > IMAGE_MAX_PIXELS:
+        raise ValueError(f"Image is too large ({width}x{height}); at most {IMAGE_MAX_PIXELS} pixels are allowed")
+
+
+def open_image(file_content):
+    """Open an image, reading only its header, and check its size."""
+    try:
+        img = Image.open(BytesIO(file_content))
+    except (Image.UnidentifiedImageError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Unreadable image: {str(e)}")
+    check_image_size(img)
+    return img
+
+
+def decode_image(file_content, max_size):
+    """Decode an image as RGB, at reduced scale when it is far larger than max_size."""
+    img = open_image(file_content)
+
+    # JPEGs can be decoded at 1/2, 1/4 or 1/8 scale; ask for twice the
+    # final size so LANCZOS still has detail to work with
+    scale = min(max_size[0] / img.width, max_size[1] / img.height)
+    if scale < 0.5:
+        img.draft('RGB', (int(img.width * scale * 2), int(img.height * scale * 2)))
+
+    # Decode now: a truncated or corrupt file passes open_image, which
+    # only reads the header, and fails here
+    try:
+        img.load()
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Unreadable image: {str(e)}")
+
     # Convert RGBA to RGB if necessary
     if img.mode in ('RGBA', 'LA', 'P'):
         background = Image.new('RGB', img.size, (255, 255, 255))
         background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
         img = background
-    
+    elif img.mode not in ('RGB', 'L'):
+        # e.g. CMYK JPEGs or 16-bit PNGs, which WebP cannot store
+        img = img.convert('RGB')
+    return img
+
+
+def optimize_image(file_content, max_size=(800, 800), quality=85):
+    """Optimize image before uploading."""
+    img = decode_image(file_content, max_size)
+
     # Resize if too large
     img.thumbnail(max_size, Image.Resampling.LANCZOS)
-    
+
     # Save optimized
     output = BytesIO()
     img.save(output, format='JPEG', quality=quality, optimize=True)
-    return output.getvalue()
\ No newline at end of file
+    return output.getvalue()
+
+
+# Pillow format of each rendition format
+RENDITION_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+
+
+def render_renditions(file_content, sizes=(800, 400, 160, 64), formats=("webp", "jpeg"), quality=85):
+    """
+    Square-bounded renditions of an image in several sizes and formats.
+
+    The image is decoded once. Each size is resized from the previous,
+    larger rendition rather than from the original, so every step is a
+    small, cheap reduction.
+
+    Returns:
+        {size: {format: encoded bytes}}
+    """
+    sizes = sorted(set(sizes), reverse=True)
+    img = decode_image(file_content, (sizes[0], sizes[0]))
+
+    renditions = {}
+    for size in sizes:
+        img.thumbnail((size, size), Image.Resampling.LANCZOS)
+        renditions[size] = {}
+        for fmt in formats:
+            output = BytesIO()
+            if fmt == "jpeg":
+                img.save(output, format="JPEG", quality=quality, optimize=True, progressive=size >= 400)
+            else:
+                img.save(output, format=RENDITION_FORMATS[fmt], quality=quality, method=4)
+            renditions[size][fmt] = output.getvalue()
+    return renditions
+
+
+# ---------------- Process pool ---------------- #
+_pool = None
+_pool_lock = threading.Lock()
+_in_flight = threading.BoundedSemaphore(max(1, IMAGE_MAX_IN_FLIGHT))
+
+
+def _get_pool():
+    # Created on first use so each server worker gets its own pool. Not
+    # forked: this process runs request threads, and a fork can copy a
+    # lock another thread holds into the child, deadlocking it
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                context = multiprocessing.get_context(IMAGE_START_METHOD)
+            except ValueError as e:
+                # A server problem, not a bad image: never let it become a 400
+                raise RuntimeError(f"Image process pool unavailable: {str(e)}")
+            if IMAGE_START_METHOD == "forkserver":
+                # The server would otherwise preload __main__, i.e. the whole app
+                context.set_forkserver_preload([__name__])
+            _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=context)
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_in_pool(func, file_content, *args):
+    """
+    Call func(file_content, *args) on the image process pool, so decoding
+    and resizing neither hold this process's GIL nor grow its memory.
+
+    `func` must be a module-level function of this module (it is pickled
+    by name). The size check runs here first so oversized images never
+    reach the pool. At most IMAGE_MAX_IN_FLIGHT images are queued or
+    processed at once.
+
+    Raises:
+        ValueError: If the image is unreadable or too large
+        ImageBusyError: If no slot frees up within IMAGE_QUEUE_TIMEOUT_SECONDS
+        RuntimeError: If processing fails or times out
+    """
+    open_image(file_content)
+
+    if not _in_flight.acquire(timeout=IMAGE_QUEUE_TIMEOUT):
+        raise ImageBusyError("Too many images are being processed, try again shortly")
+
+    if IMAGE_WORKERS <= 0:
+        try:
+            return func(file_content, *args)
+        finally:
+            _in_flight.release()
+
+    try:
+        pool = _get_pool()
+        future = pool.submit(func, file_content, *args)
+    except Exception:
+        _in_flight.release()
+        raise
+    # The slot stays taken until the process is done, even if we stop waiting
+    future.add_done_callback(lambda _: _in_flight.release())
+
+    try:
+        return future.result(timeout=IMAGE_TIMEOUT)
+    except ValueError:
+        raise
+    except BrokenProcessPool as e:
+        # A worker died (e.g. killed for memory); start afresh next time
+        _discard_pool(pool)
+        raise RuntimeError(f"Image processing failed: {str(e)}")
+    except Exception as e:
+        raise RuntimeError(f"Image processing failed: {str(e) or type(e).__name__}")
+
+
+def optimize_image_in_pool(file_content, max_size=(800, 800), quality=85):
+    """optimize_image on the image process pool (see run_in_pool)."""
+    return run_in_pool(optimize_image, file_content, max_size, quality)
+
+
+def render_renditions_in_pool(file_content, sizes=(800, 400, 160, 64), formats=("webp", "jpeg"), quality=85):
+    """render_renditions on the image process pool (see run_in_pool)."""
+    return run_in_pool(render_renditions, file_content, sizes, formats, quality)
@@ -0,0 +1,187 @@
+import json
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, Optional
+
+import jwt
+
+# Algorithms Supabase uses for asymmetric signing keys published in the JWKS
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256", "EdDSA")
+
+
+class TokenVerificationError(Exception):
+    """Raised when a bearer token fails local verification."""
+
+
+class SigningKeyUnavailable(TokenVerificationError):
+    """Raised when no signing key can be found to verify a token."""
+
+
+def fetch_jwks_from_url(url: str, timeout: float = 5.0) -> Dict[str, Any]:
+    """Download a JWKS document from the given URL."""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+class JWKSCache:
+    """
+    Cached signing key set.
+
+    Keys are refetched every `refresh_interval` seconds. A token signed with an
+    unknown key ID forces an early refetch (at most once every
+    `min_refetch_interval` seconds) so key rotation is picked up immediately.
+    After a failed fetch the next attempt also waits `min_refetch_interval`
+    seconds, so an outage does not put a blocking fetch on every request.
+    """
+
+    def __init__(
+        self,
+        fetch_jwks: Callable[[], Dict[str, Any]],
+        refresh_interval: float = 600,
+        min_refetch_interval: float = 30
+    ):
+        self.fetch_jwks = fetch_jwks
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self._keys: Dict[Optional[str], jwt.PyJWK] = {}
+        self._fetched_at: Optional[float] = None
+        self._failed_at: Optional[float] = None
+        self._fetch_error = ""
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        jwks = self.fetch_jwks() or {}
+        keys = {}
+        for key_data in jwks.get("keys", []):
+            try:
+                key = jwt.PyJWK.from_dict(key_data)
+            except jwt.PyJWTError:
+                continue  # skip keys we can't use (e.g. unsupported key types)
+            keys[key.key_id] = key
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+
+    def load(self) -> int:
+        """Fetch the key set now and return the number of usable keys; fetch errors are raised."""
+        with self._lock:
+            self._refresh()
+            return len(self._keys)
+
+    def get_signing_key(self, kid: Optional[str]) -> jwt.PyJWK:
+        """
+        Return the signing key for a key ID, refetching the key set if it is
+        stale or the key ID is unknown.
+
+        Raises:
+            SigningKeyUnavailable: If the key set has no key with this ID
+        """
+        with self._lock:
+            now = time.monotonic()
+            age = None if self._fetched_at is None else now - self._fetched_at
+            key = self._keys.get(kid)
+
+            if key is not None and age is not None and age < self.refresh_interval:
+                return key
+
+            # Unknown key ID with a fresh key set: only refetch if we haven't just done so
+            if key is None and age is not None and age < self.min_refetch_interval:
+                raise SigningKeyUnavailable(f"Unknown signing key id: {kid}")
+
+            # Back off after a failed fetch, serving the previous key if there is one
+            if self._failed_at is not None and now - self._failed_at < self.min_refetch_interval:
+                if key is not None:
+                    return key
+                raise SigningKeyUnavailable(f"Failed to fetch signing keys: {self._fetch_error}")
+
+            try:
+                self._refresh()
+            except Exception as e:
+                self._failed_at = time.monotonic()
+                self._fetch_error = str(e)
+                # Keep serving the previous key if the refresh itself failed
+                if key is not None:
+                    return key
+                raise SigningKeyUnavailable(f"Failed to fetch signing keys: {str(e)}")
+            self._failed_at = None
+
+            key = self._keys.get(kid)
+            if key is None:
+                raise SigningKeyUnavailable(f"Unknown signing key id: {kid}")
+            return key
+
+
+class LocalTokenVerifier:
+    """Verifies Supabase access tokens locally instead of calling the Auth server."""
+
+    def __init__(
+        self,
+        jwks_cache: JWKSCache,
+        audience: Optional[str] = "authenticated",
+        issuer: Optional[str] = None,
+        hs256_secret: Optional[str] = None,
+        leeway: float = 0
+    ):
+        self.jwks_cache = jwks_cache
+        self.audience = audience
+        self.issuer = issuer
+        self.hs256_secret = hs256_secret
+        self.leeway = leeway
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Check the token's signature, expiry, audience and issuer.
+
+        Args:
+            token: Raw bearer token
+
+        Returns:
+            The verified JWT claims
+
+        Raises:
+            SigningKeyUnavailable: If no key is available to check the signature
+            TokenVerificationError: If the token is malformed, expired or forged
+        """
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(f"Malformed token: {str(e)}")
+
+        alg = header.get("alg")
+        if alg == "HS256":
+            # Legacy projects sign with the shared JWT secret instead of a published key
+            if not self.hs256_secret:
+                raise SigningKeyUnavailable("No JWT secret configured for HS256 tokens")
+            key: Any = self.hs256_secret
+        elif alg in ASYMMETRIC_ALGORITHMS:
+            key = self.jwks_cache.get_signing_key(header.get("kid")).key
+        else:
+            raise TokenVerificationError(f"Unsupported token algorithm: {alg}")
+
+        try:
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[alg],
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.leeway,
+                options={"require": ["exp", "sub"], "verify_aud": self.audience is not None}
+            )
+        except jwt.ExpiredSignatureError:
+            raise TokenVerificationError("Token has expired")
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(f"Invalid token: {str(e)}")
+
+
+def unverified_expiry(token: str) -> Optional[float]:
+    """
+    Read a token's `exp` claim without checking its signature.
+
+    Only use this on tokens that have already been validated elsewhere.
+    """
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        return None
+    return float(exp) if isinstance(exp, (int, float)) else None
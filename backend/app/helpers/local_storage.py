@@ -0,0 +1,95 @@
+import mimetypes
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+
+class LocalBucket:
+    """
+    A storage bucket kept in a local directory, for development and for
+    exercising storage maintenance (e.g. `flask avatars sweep --local-dir`)
+    without Supabase.
+
+    Implements the parts of storage3's bucket API the app uses (list,
+    upload, remove, exists, get_public_url) with the same argument and
+    result shapes: list returns folders as {"name", "id": None} and files
+    with "id", timestamps and metadata.size, sorted by name and paged with
+    options limit/offset.
+    """
+
+    def __init__(self, root: str, public_url: str = "http://localhost/storage/v1/object/public/local"):
+        self.root = os.path.abspath(root)
+        self.public_url = public_url.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _full_path(self, path: str) -> str:
+        full = os.path.abspath(os.path.join(self.root, path.strip("/")))
+        if full != self.root and not full.startswith(self.root + os.sep):
+            raise ValueError(f"Path outside the bucket: {path}")
+        return full
+
+    @staticmethod
+    def _timestamp(seconds: float) -> str:
+        return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+    def list(self, path: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        options = options or {}
+        directory = self._full_path(path or "")
+        if not os.path.isdir(directory):
+            return []
+
+        entries = []
+        for name in sorted(os.listdir(directory)):
+            full = os.path.join(directory, name)
+            if os.path.isdir(full):
+                entries.append({"name": name, "id": None, "metadata": None})
+                continue
+            stat = os.stat(full)
+            entries.append({
+                "name": name,
+                "id": os.path.relpath(full, self.root),
+                "created_at": self._timestamp(stat.st_mtime),
+                "updated_at": self._timestamp(stat.st_mtime),
+                "metadata": {"size": stat.st_size, "mimetype": mimetypes.guess_type(name)[0]}
+            })
+
+        offset = int(options.get("offset", 0))
+        limit = int(options.get("limit", 100))
+        return entries[offset:offset + limit]
+
+    def upload(self, path: str, file, file_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        full = self._full_path(path)
+        upsert = str((file_options or {}).get("upsert", "false")).lower() == "true"
+        if os.path.exists(full) and not upsert:
+            raise RuntimeError(f"The resource already exists: {path}")
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        if isinstance(file, (bytes, bytearray)):
+            with open(full, "wb") as out:
+                out.write(file)
+        elif isinstance(file, (str, os.PathLike)):
+            shutil.copyfile(file, full)
+        else:
+            with open(full, "wb") as out:
+                shutil.copyfileobj(file, out)
+        return {"path": path, "full_path": path}
+
+    def remove(self, paths: List[str]) -> List[Dict[str, Any]]:
+        removed = []
+        for path in paths:
+            full = self._full_path(path)
+            if os.path.isfile(full):
+                os.remove(full)
+                removed.append({"name": path})
+                # Storage has no real folders: drop ones left empty
+                parent = os.path.dirname(full)
+                while parent != self.root and not os.listdir(parent):
+                    os.rmdir(parent)
+                    parent = os.path.dirname(parent)
+        return removed
+
+    def exists(self, path: str) -> bool:
+        return os.path.isfile(self._full_path(path))
+
+    def get_public_url(self, path: str) -> str:
+        return f"{self.public_url}/{path.lstrip('/')}"
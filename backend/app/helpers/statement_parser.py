@@ -0,0 +1,349 @@
+import codecs
+import csv
+import io
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from collections import deque
+from typing import IO, Any, Deque, Dict, Iterable, Iterator, Optional, Sequence
+
+STATEMENT_FORMATS = ("csv", "ofx", "qif")
+
+# Candidates when no date format is given; one of them is picked per file (see resolve_dates)
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d.%m.%Y", "%Y/%m/%d", "%d-%m-%Y", "%Y%m%d", "%d/%m/%y", "%m/%d/%y")
+
+# Statement field -> CSV headers recognised for it (compared case-insensitively)
+CSV_COLUMNS = {
+    "date": ("date", "transaction date", "posted date", "posting date", "booking date", "value date"),
+    "title": ("title", "payee", "name", "merchant", "description", "details", "narrative"),
+    "amount": ("amount", "transaction amount", "value"),
+    "debit": ("debit", "withdrawal", "paid out", "money out"),
+    "credit": ("credit", "deposit", "paid in", "money in"),
+    "description": ("memo", "notes", "note", "reference"),
+    "category": ("category",),
+    "payment_method": ("payment method", "payment_method", "method"),
+}
+
+# Rows held back, at most, waiting for a date that shows which format the file uses
+DATE_DETECT_MAX_ROWS = 1000
+
+# Bytes read from an OFX file at a time
+OFX_CHUNK_SIZE = 64 * 1024
+
+_OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.IGNORECASE | re.DOTALL)
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+
+def detect_format(filename: Optional[str], requested: Optional[str] = None) -> str:
+    """The statement format from an explicit choice or the file extension."""
+    fmt = (requested or "").strip().lower()
+    if not fmt and filename and "." in filename:
+        fmt = filename.rsplit(".", 1)[1].lower()
+    if fmt not in STATEMENT_FORMATS:
+        raise ValueError(f"Format must be one of: {', '.join(STATEMENT_FORMATS)}")
+    return fmt
+
+
+def parse_amount(raw: Any) -> Decimal:
+    """
+    A signed amount from statement text, e.g. "-12.50", "(12.50)", "1,234.56",
+    "1.234,56" or "$ 12". Raises ValueError if it is not a number.
+    """
+    text = str(raw or "").strip()
+    negative = text.startswith("(") and text.endswith(")")
+    text = re.sub(r"[^\d,.\-+]", "", text)
+
+    # The last of "," and "." is the decimal separator when both appear;
+    # a lone "," followed by exactly two digits is one too
+    if "," in text and "." in text:
+        thousands = "," if text.rfind(".") > text.rfind(",") else "."
+        text = text.replace(thousands, "")
+    if re.search(r",\d{2}$", text) and "." not in text:
+        text = text.replace(",", ".")
+    text = text.replace(",", "")
+
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {raw!r}")
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount: {raw!r}")
+    return -abs(amount) if negative else amount
+
+
+def parse_date(raw: Any, formats: Sequence[str] = DATE_FORMATS) -> date:
+    """A date from statement text, trying each format in turn."""
+    text = str(raw or "").strip()
+    for fmt in formats:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date: {raw!r}")
+
+
+def resolve_dates(rows: Iterable[Dict[str, Any]], formats: Sequence[str] = DATE_FORMATS) -> Iterator[Dict[str, Any]]:
+    """
+    Parse the "date" text of statement rows with one date format per file.
+
+    Formats that fit every date seen so far stay candidates. A date that
+    reads differently under them (03/04/2024: 3 April or 4 March) is held
+    back, with the rows after it, until a date such as 12/31/2024 rules
+    the others out. Dates still ambiguous at the end of the file, or once
+    DATE_DETECT_MAX_ROWS rows are held, are yielded as errors asking for
+    a date format.
+    """
+    candidates = list(formats)
+    held: Deque[Dict[str, Any]] = deque()
+
+    def resolve(row, final=False):
+        # The row with its date parsed, an error row, or None while ambiguous
+        nonlocal candidates
+        if "error" in row or isinstance(row.get("date"), date):
+            return row
+        text = str(row.get("date") or "").strip()
+        readings = {}
+        for fmt in candidates:
+            try:
+                readings[fmt] = datetime.strptime(text, fmt).date()
+            except ValueError:
+                continue
+        if not readings:
+            if text and any(_parses(text, fmt) for fmt in formats):
+                return {"line": row["line"], "error": f"Date {text!r} does not match the format of the file's other dates"}
+            return {"line": row["line"], "error": f"Invalid date: {text!r}"}
+
+        candidates = [fmt for fmt in candidates if fmt in readings]
+        dates = set(readings.values())
+        if len(dates) == 1:
+            return dict(row, date=dates.pop())
+        if final:
+            return {"line": row["line"], "error": f"Ambiguous date {text!r}: set date_format (e.g. %d/%m/%Y)"}
+        return None
+
+    for row in rows:
+        held.append(resolve(row) or row)
+        while held:
+            ready = resolve(held[0], final=len(held) > DATE_DETECT_MAX_ROWS)
+            if ready is None:
+                break
+            held.popleft()
+            yield ready
+    while held:
+        yield resolve(held.popleft(), final=True)
+
+
+def _parses(text: str, fmt: str) -> bool:
+    try:
+        datetime.strptime(text, fmt)
+    except ValueError:
+        return False
+    return True
+
+
+def _row(line: int, **fields) -> Dict[str, Any]:
+    """A parsed statement row: line, date, amount (signed), title, description, category, payment_method."""
+    row = {"line": line, "description": None, "category": None, "payment_method": None}
+    row.update(fields)
+    return row
+
+
+# ---------------- CSV ---------------- #
+def csv_columns(header: Sequence[str], mapping: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+    """
+    Statement field -> column position for a CSV header. `mapping` names
+    the header to use for any field ({"title": "Payee", ...}); the others are
+    recognised from CSV_COLUMNS.
+    """
+    positions = {name.strip().lower(): i for i, name in enumerate(header)}
+    columns = {}
+
+    for field, name in (mapping or {}).items():
+        if field not in CSV_COLUMNS:
+            raise ValueError(f"Unknown mapping field: {field}")
+        if str(name).strip().lower() not in positions:
+            raise ValueError(f"Column not found: {name}")
+        columns[field] = positions[str(name).strip().lower()]
+
+    for field, aliases in CSV_COLUMNS.items():
+        if field in columns:
+            continue
+        taken = set(columns.values())
+        for alias in aliases:
+            if alias in positions and positions[alias] not in taken:
+                columns[field] = positions[alias]
+                break
+
+    if "date" not in columns:
+        raise ValueError("No date column found")
+    if "title" not in columns:
+        raise ValueError("No title/description column found")
+    if "amount" not in columns and "debit" not in columns and "credit" not in columns:
+        raise ValueError("No amount (or debit/credit) column found")
+    return columns
+
+
+def parse_csv(
+    stream: IO[bytes],
+    mapping: Optional[Dict[str, str]] = None,
+    date_formats: Sequence[str] = DATE_FORMATS
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield rows of a CSV statement one at a time. The first line is the
+    header. Rows that cannot be read are yielded as {"line", "error"}.
+    """
+    yield from resolve_dates(_csv_rows(stream, mapping), date_formats)
+
+
+def _csv_rows(stream: IO[bytes], mapping: Optional[Dict[str, str]]) -> Iterator[Dict[str, Any]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    reader = csv.reader(text)
+    try:
+        header = next(reader, None)
+    except csv.Error as e:
+        raise ValueError(f"Malformed CSV header: {str(e)}")
+    if not header:
+        raise ValueError("The file is empty")
+    columns = csv_columns(header, mapping)
+
+    def cell(values, field):
+        position = columns.get(field)
+        return values[position].strip() if position is not None and position < len(values) else ""
+
+    while True:
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # e.g. a NUL byte or an oversized field; the reader resumes on the next line
+            yield {"line": reader.line_num, "error": f"Malformed CSV: {str(e)}"}
+            continue
+        line = reader.line_num
+        if not any(v.strip() for v in values):
+            continue
+        try:
+            if cell(values, "amount"):
+                amount = parse_amount(cell(values, "amount"))
+            else:
+                debit, credit = cell(values, "debit"), cell(values, "credit")
+                if not debit and not credit:
+                    raise ValueError("Missing amount")
+                amount = (parse_amount(credit) if credit else 0) - (abs(parse_amount(debit)) if debit else 0)
+
+            yield _row(
+                line,
+                date=cell(values, "date"),
+                amount=amount,
+                title=cell(values, "title"),
+                description=cell(values, "description") or None,
+                category=cell(values, "category") or None,
+                payment_method=cell(values, "payment_method") or None
+            )
+        except ValueError as e:
+            yield {"line": line, "error": str(e)}
+
+
+# ---------------- OFX ---------------- #
+def _ofx_date(raw: str) -> date:
+    # YYYYMMDD, optionally followed by time and timezone
+    return parse_date(raw.strip()[:8], ("%Y%m%d",))
+
+
+def parse_ofx(stream: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the <STMTTRN> entries of an OFX statement (SGML 1.x or XML 2.x),
+    reading the file in chunks. "line" is the entry's position in the file.
+    """
+    # Incremental so characters split across chunks still decode
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    number = 0
+    while True:
+        chunk = stream.read(OFX_CHUNK_SIZE)
+        buffer += decoder.decode(chunk, final=not chunk)
+
+        end = 0
+        for match in _OFX_TRANSACTION.finditer(buffer):
+            end = match.end()
+            number += 1
+            fields = {name.upper(): value.strip() for name, value in _OFX_FIELD.findall(match.group(1))}
+            try:
+                yield _row(
+                    number,
+                    date=_ofx_date(fields.get("DTPOSTED", "")),
+                    amount=parse_amount(fields.get("TRNAMT")),
+                    title=fields.get("NAME") or fields.get("PAYEE") or fields.get("MEMO") or "",
+                    description=fields.get("MEMO") if fields.get("NAME") or fields.get("PAYEE") else None,
+                    payment_method=(fields.get("TRNTYPE") or "").lower() or None
+                )
+            except ValueError as e:
+                yield {"line": number, "error": str(e)}
+
+        # Keep only the unfinished entry, or a tail that may hold a split tag
+        buffer = buffer[end:]
+        start = buffer.upper().rfind("<STMTTRN>")
+        buffer = buffer[start:] if start >= 0 else buffer[-len("<STMTTRN>"):]
+        if not chunk:
+            return
+
+
+# ---------------- QIF ---------------- #
+QIF_DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y", "%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d")
+
+
+def parse_qif(stream: IO[bytes], date_formats: Sequence[str] = QIF_DATE_FORMATS) -> Iterator[Dict[str, Any]]:
+    """Yield the entries of a QIF statement; each ends with a "^" line."""
+    yield from resolve_dates(_qif_rows(stream), date_formats)
+
+
+def _qif_rows(stream: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace")
+    entry: Dict[str, str] = {}
+    start = None
+
+    for line, raw in enumerate(text, start=1):
+        raw = raw.strip()
+        if not raw or raw.startswith("!"):
+            continue
+        if raw != "^":
+            start = start or line
+            entry.setdefault(raw[0], raw[1:].strip())
+            continue
+
+        if entry:
+            try:
+                category = entry.get("L") or None
+                yield _row(
+                    start,
+                    # 12/31'24 style years
+                    date=entry.get("D", "").replace("'", "/").replace(" ", ""),
+                    amount=parse_amount(entry.get("T") or entry.get("U")),
+                    title=entry.get("P") or entry.get("M") or "",
+                    description=entry.get("M") if entry.get("P") else None,
+                    # [Account] categories are transfers, not spending categories
+                    category=None if category and category.startswith("[") else category
+                )
+            except ValueError as e:
+                yield {"line": start, "error": str(e)}
+        entry, start = {}, None
+
+
+def parse_statement(
+    stream: IO[bytes],
+    fmt: str,
+    mapping: Optional[Dict[str, str]] = None,
+    date_format: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the rows of an uploaded statement lazily, so memory does not grow
+    with the file. `mapping` and `date_format` only apply where the format
+    needs them (CSV columns; CSV and QIF dates).
+    """
+    if fmt == "csv":
+        return parse_csv(stream, mapping, (date_format,) if date_format else DATE_FORMATS)
+    if fmt == "ofx":
+        return parse_ofx(stream)
+    if fmt == "qif":
+        return parse_qif(stream, (date_format,) if date_format else QIF_DATE_FORMATS)
+    raise ValueError(f"Format must be one of: {', '.join(STATEMENT_FORMATS)}")
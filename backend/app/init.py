@@ -2,13 +2,32 @@ from flask import Flask
 from app.routes.user_routes import user_bp
 from app.routes.transaction_route import transactions_bp
 from app.routes.category_route import category_bp
+from app.routes.metrics_route import metrics_bp
+from app.routes.jobs_route import jobs_bp
+from app.supabase.supabase_client import release_request_client
+from app.middlewares.auth_middleware import check_auth_config
+from app.commands.rollup_commands import rollups_cli
+from app.commands.avatar_commands import avatars_cli
 
 
 def create_app():
+    # Refuse to start when bearer tokens could not be verified
+    check_auth_config()
+
     app = Flask(__name__)
     app.register_blueprint(user_bp, url_prefix = '/api/users')
     
     app.register_blueprint(transactions_bp, url_prefix = '/api/transactions')
     app.register_blueprint(category_bp, url_prefix = '/api/categories')
+    app.register_blueprint(metrics_bp, url_prefix = '/api/metrics')
+    app.register_blueprint(jobs_bp, url_prefix = '/api/jobs')
+
+    # Return each request's pooled Supabase client when the request ends
+    app.teardown_appcontext(release_request_client)
+
+    # CLI: flask --app run rollups rebuild|verify
+    app.cli.add_command(rollups_cli)
+    # CLI: flask --app run avatars sweep [--dry-run]
+    app.cli.add_command(avatars_cli)
     
     return app
\ No newline at end of file
@@ -0,0 +1,210 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.helpers.avatar_helper import PROFILE_IMAGES_BUCKET, avatar_files, storage_path_from_url
+from app.supabase.supabase_client import supabase
+
+# Objects per remove() call
+AVATAR_SWEEP_BATCH_SIZE = int(os.getenv("AVATAR_SWEEP_BATCH_SIZE", "100"))
+
+# Storage requests (list and remove) per second, at most
+AVATAR_SWEEP_RATE = float(os.getenv("AVATAR_SWEEP_REQUESTS_PER_SECOND", "5"))
+
+# Objects younger than this are kept: their upload may not have repointed the profile yet
+AVATAR_SWEEP_MIN_AGE = float(os.getenv("AVATAR_SWEEP_MIN_AGE_SECONDS", "3600"))
+
+# Entries per storage list call
+STORAGE_LIST_PAGE_SIZE = 100
+
+# Users whose profiles are looked up at once
+PROFILE_LOOKUP_BATCH_SIZE = 100
+
+# user ids -> {user id: profile_image} for the users that have a profile
+ProfileLookup = Callable[[List[str]], Dict[str, Optional[str]]]
+
+
+def supabase_profile_images(user_ids: List[str]) -> Dict[str, Optional[str]]:
+    """profiles.profile_image of each of `user_ids` that has a profile."""
+    res = supabase.table("profiles").select("id, profile_image").in_("id", user_ids).execute()
+    return {str(row["id"]): row.get("profile_image") for row in res.data or []}
+
+
+def _timestamp(value) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class AvatarSweeper:
+    """
+    Removes profile images that no profile points at any more.
+
+    Storage is walked one user prefix (<uid>/) at a time. Each object is
+    compared with the renditions of that user's profiles.profile_image,
+    and orphans are removed `batch_size` paths per remove() call. A user's
+    profile is looked up again just before their orphans are queued, so a
+    profile repointed meanwhile keeps its images. Storage
+    requests are spaced to stay under `rate` per second. With `dry_run`
+    nothing is removed; the counts are the same.
+
+    Left alone:
+    - prefixes of users without a profile row (a failed or wrong profile
+      lookup must not empty the bucket)
+    - objects younger than `min_age` seconds, or without a timestamp
+
+    `bucket` is a storage3 bucket (supabase.storage.from_(...)) or anything
+    with the same list/remove API, e.g. app.helpers.local_storage.LocalBucket.
+    """
+
+    def __init__(
+        self,
+        bucket,
+        profile_images: ProfileLookup = supabase_profile_images,
+        bucket_name: str = PROFILE_IMAGES_BUCKET,
+        batch_size: int = AVATAR_SWEEP_BATCH_SIZE,
+        rate: float = AVATAR_SWEEP_RATE,
+        min_age: float = AVATAR_SWEEP_MIN_AGE,
+        dry_run: bool = False,
+        on_orphan: Optional[Callable[[str, int], None]] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.bucket = bucket
+        self.profile_images = profile_images
+        self.bucket_name = bucket_name
+        self.batch_size = max(1, batch_size)
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.min_age = min_age
+        self.dry_run = dry_run
+        self.on_orphan = on_orphan
+        self.on_progress = on_progress
+        self.sleep = sleep
+        self._last_request = 0.0
+        self._pending: List[str] = []
+        self.stats = {
+            "dry_run": dry_run,
+            "users": 0,
+            "users_without_profile": 0,
+            "objects": 0,
+            "recent": 0,
+            "orphans": 0,
+            "orphan_bytes": 0,
+            "removed": 0
+        }
+
+    # ---------------- Storage requests ---------------- #
+    def _throttle(self):
+        wait = self._last_request + self.interval - time.monotonic()
+        if wait > 0:
+            self.sleep(wait)
+        self._last_request = time.monotonic()
+
+    def _list(self, prefix: str) -> Iterator[Dict[str, Any]]:
+        offset = 0
+        while True:
+            self._throttle()
+            entries = self.bucket.list(prefix, {
+                "limit": STORAGE_LIST_PAGE_SIZE,
+                "offset": offset,
+                "sortBy": {"column": "name", "order": "asc"}
+            })
+            yield from entries
+            if len(entries) < STORAGE_LIST_PAGE_SIZE:
+                return
+            offset += len(entries)
+
+    def _objects(self, prefix: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(path, entry) of every object under a prefix, recursively."""
+        for entry in self._list(prefix):
+            path = f"{prefix}/{entry['name']}" if prefix else entry["name"]
+            if entry.get("id") is None:
+                yield from self._objects(path)
+            else:
+                yield path, entry
+
+    def _flush(self):
+        batch, self._pending = self._pending, []
+        if not batch or self.dry_run:
+            return
+        self._throttle()
+        removed = self.bucket.remove(batch)
+        self.stats["removed"] += len(removed) if isinstance(removed, list) else len(batch)
+
+    # ---------------- Sweep ---------------- #
+    def _kept(self, profile_image: Optional[str]) -> set:
+        path = storage_path_from_url(profile_image, self.bucket_name)
+        return set(avatar_files(path)) if path else set()
+
+    def _sweep_user(self, user_id: str, profile_image: Optional[str], cutoff: datetime):
+        keep = self._kept(profile_image)
+
+        # Listed up front: removals would shift the offsets of later pages
+        orphans = []
+        for object_path, entry in list(self._objects(user_id)):
+            self.stats["objects"] += 1
+            if object_path in keep:
+                continue
+            written = _timestamp(entry.get("updated_at") or entry.get("created_at"))
+            if written is None or written > cutoff:
+                self.stats["recent"] += 1
+                continue
+            orphans.append((object_path, entry))
+
+        if not orphans:
+            return
+
+        # Re-read the profile: an upload that matched images already in
+        # storage repoints it to old objects, which the age check does not
+        # protect. Anything it now points at is kept.
+        current = self.profile_images([user_id])
+        if user_id not in current:
+            self.stats["users_without_profile"] += 1
+            return
+        keep = self._kept(current[user_id])
+
+        for object_path, entry in orphans:
+            if object_path in keep:
+                continue
+            size = int((entry.get("metadata") or {}).get("size") or 0)
+            self.stats["orphans"] += 1
+            self.stats["orphan_bytes"] += size
+            if self.on_orphan:
+                self.on_orphan(object_path, size)
+            self._pending.append(object_path)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def sweep(self, user_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Sweep the given users' prefixes (default: every prefix in the
+        bucket) and return the counts.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.min_age)
+        if user_ids is None:
+            user_ids = [entry["name"] for entry in self._list("") if entry.get("id") is None]
+
+        chunk: List[str] = []
+        for user_id in user_ids:
+            chunk.append(user_id)
+            if len(chunk) >= PROFILE_LOOKUP_BATCH_SIZE:
+                self._sweep_users(chunk, cutoff)
+                chunk = []
+        if chunk:
+            self._sweep_users(chunk, cutoff)
+
+        self._flush()
+        return dict(self.stats)
+
+    def _sweep_users(self, user_ids: List[str], cutoff: datetime):
+        profiles = self.profile_images(user_ids)
+        for user_id in user_ids:
+            self.stats["users"] += 1
+            if user_id not in profiles:
+                self.stats["users_without_profile"] += 1
+                continue
+            self._sweep_user(user_id, profiles[user_id], cutoff)
+        if self.on_progress:
+            self.on_progress(dict(self.stats))
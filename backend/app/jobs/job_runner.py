@@ -0,0 +1,279 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from app.repositories.repository_factory import get_job_repository
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+JOB_ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+# Seconds between progress writes to the jobs table (and so between cancellation checks)
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL_SECONDS", "1"))
+
+# Queued or running jobs not written to for this long are treated as
+# interrupted (their worker was restarted or killed)
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "900"))
+
+# Queued or running jobs allowed per user, across all workers
+JOB_MAX_PER_USER = int(os.getenv("JOB_MAX_PER_USER", "2"))
+
+# Jobs waiting for or holding a thread in this worker before new ones are refused
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "100"))
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once cancellation has been requested."""
+
+
+class JobLimitError(Exception):
+    """Raised by submit when a user or this worker has too many jobs in flight."""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _timestamp(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class Job:
+    """A unit of background work and what is known about it so far."""
+
+    def __init__(self, user_id: str, kind: str, job_id: Optional[str] = None):
+        self.id = job_id or str(uuid.uuid4())
+        self.user_id = user_id
+        self.kind = kind
+        self.status = JOB_QUEUED
+        self.progress: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.cancel_requested = False
+        self.created_at: Optional[datetime] = _now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.updated_at: Optional[datetime] = self.created_at
+        self._last_write = 0.0
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]):
+        job = cls(str(record["user_id"]), record["kind"], job_id=str(record["id"]))
+        job.status = record["status"]
+        job.progress = record.get("progress") or {}
+        job.result = record.get("result")
+        job.error = record.get("error")
+        job.cancel_requested = bool(record.get("cancel_requested"))
+        job.created_at = _timestamp(record.get("created_at"))
+        job.started_at = _timestamp(record.get("started_at"))
+        job.finished_at = _timestamp(record.get("finished_at"))
+        job.updated_at = _timestamp(record.get("updated_at"))
+        return job
+
+    @property
+    def active(self) -> bool:
+        return self.status in JOB_ACTIVE_STATUSES
+
+    def is_stale(self) -> bool:
+        """True for a queued or running job whose worker stopped writing to it."""
+        return (
+            self.active
+            and self.updated_at is not None
+            and _now() - self.updated_at > timedelta(seconds=JOB_STALE_SECONDS)
+        )
+
+    def update_progress(self, progress: Dict[str, Any]):
+        """
+        Replace the job's progress report (called from the job itself).
+
+        The report is written to the jobs table at most every
+        JOB_PROGRESS_INTERVAL seconds, and each write reads back whether the
+        job was cancelled. Raises JobCancelled once it was, so jobs stop at
+        their next report.
+        """
+        self.progress = dict(progress)
+        if not self.cancel_requested and time.monotonic() - self._last_write >= JOB_PROGRESS_INTERVAL:
+            self._last_write = time.monotonic()
+            record = get_job_repository().update_job(self.id, {"progress": self.progress})
+            self.cancel_requested = bool(record and record.get("cancel_requested"))
+        if self.cancel_requested:
+            raise JobCancelled()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested,
+            "created_at": _iso(self.created_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at)
+        }
+
+
+class JobRunner:
+    """
+    Runs jobs on a bounded thread pool, off the request path.
+
+    Every job has a row in the jobs table (sql/007_jobs.sql) holding its
+    status, progress and outcome, so any worker can report on it or cancel
+    it. Each user may have JOB_MAX_PER_USER jobs queued or running at once,
+    and a worker holds at most JOB_MAX_PENDING; submit raises JobLimitError
+    beyond that. Jobs whose worker died stop being updated and are reported
+    as failed once they go stale.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 100, max_per_user: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="jobs")
+        self.max_pending = max_pending
+        self.max_per_user = max_per_user
+        self._pending: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def _reject(self, message: str):
+        with self._lock:
+            self.rejected += 1
+        raise JobLimitError(message)
+
+    def submit(self, user_id: str, kind: str, work: Callable[[Job], Any]) -> Job:
+        """
+        Record and queue `work(job)`; its return value becomes the job's result.
+
+        Raises:
+            JobLimitError: If the user or this worker has too many jobs in flight
+        """
+        with self._lock:
+            pending = len(self._pending)
+        if pending >= self.max_pending:
+            self._reject("Too many background jobs are queued, try again later")
+
+        repository = get_job_repository()
+        updated_since = (_now() - timedelta(seconds=JOB_STALE_SECONDS)).isoformat()
+        if repository.count_active_jobs(user_id, updated_since) >= self.max_per_user:
+            self._reject(f"At most {self.max_per_user} background jobs can be queued or running at once")
+
+        job = Job(user_id, kind)
+        repository.insert_job({"id": job.id, "user_id": user_id, "kind": kind, "status": JOB_QUEUED})
+        with self._lock:
+            self._pending[job.id] = job
+            self.submitted += 1
+        self._executor.submit(self._run, job, work)
+        return job
+
+    def _run(self, job: Job, work: Callable[[Job], Any]):
+        repository = get_job_repository()
+        try:
+            job.started_at = _now()
+            record = repository.update_job(job.id, {"status": JOB_RUNNING, "started_at": job.started_at.isoformat()})
+            if job.cancel_requested or (record and record.get("cancel_requested")):
+                raise JobCancelled()
+
+            job.status = JOB_RUNNING
+            job._last_write = time.monotonic()
+            job.result = work(job)
+            job.status = JOB_SUCCEEDED
+        except JobCancelled:
+            job.status = JOB_CANCELLED
+            with self._lock:
+                self.cancelled += 1
+        except Exception as e:
+            job.error = str(e)
+            job.status = JOB_FAILED
+            with self._lock:
+                self.failed += 1
+            print(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+        finally:
+            job.finished_at = _now()
+            with self._lock:
+                self._pending.pop(job.id, None)
+
+        try:
+            repository.update_job(job.id, {
+                "status": job.status,
+                "progress": job.progress,
+                "result": job.result,
+                "error": job.error,
+                "finished_at": job.finished_at.isoformat()
+            })
+        except Exception as e:
+            # The row goes stale and is reported as interrupted
+            print(f"Failed to record outcome of job {job.id}: {str(e)}")
+
+    def _checked(self, record: Optional[Dict[str, Any]]) -> Optional[Job]:
+        if not record:
+            return None
+        job = Job.from_record(record)
+        if job.is_stale() and job.id not in self._pending:
+            job.status = JOB_FAILED
+            job.error = "Job was interrupted"
+            job.finished_at = _now()
+            get_job_repository().update_job(job.id, {
+                "status": job.status,
+                "error": job.error,
+                "finished_at": job.finished_at.isoformat()
+            })
+        return job
+
+    def get(self, job_id: str, user_id: str) -> Optional[Job]:
+        """A job owned by `user_id`, or None."""
+        return self._checked(get_job_repository().get_job(job_id, user_id))
+
+    def list(self, user_id: str, limit: int = 20) -> List[Job]:
+        """A user's most recent jobs, newest first."""
+        return [job for job in map(self._checked, get_job_repository().list_jobs(user_id, limit)) if job]
+
+    def cancel(self, job_id: str, user_id: str) -> Optional[Job]:
+        """
+        Request cancellation of a user's job, or None if there is no such job.
+
+        A queued job never starts; a running one stops at its next progress
+        report. Finished jobs are returned unchanged.
+        """
+        record = get_job_repository().request_job_cancel(job_id, user_id)
+        if not record:
+            return self.get(job_id, user_id)
+
+        # Running here: stop at the next report rather than the next write
+        with self._lock:
+            local = self._pending.get(job_id)
+        if local is not None:
+            local.cancel_requested = True
+        return Job.from_record(record)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "submitted": self.submitted,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "rejected": self.rejected
+            }
+
+
+job_runner = JobRunner(
+    workers=int(os.getenv("JOB_WORKERS", "2")),
+    max_pending=JOB_MAX_PENDING,
+    max_per_user=JOB_MAX_PER_USER
+)
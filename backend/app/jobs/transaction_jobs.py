@@ -0,0 +1,48 @@
+from typing import IO, Any, Callable, Dict, Iterator
+
+from app.jobs.job_runner import Job
+from app.models.transaction_class import TRANSACTION_ROLLUPS_ENABLED, Transaction
+
+JobWork = Callable[[Job], Any]
+
+
+def delete_all_transactions(user_id: str) -> JobWork:
+    """Delete every transaction of a user; progress.deleted counts rows so far."""
+    def work(job: Job):
+        deleted = Transaction.delete_all_transactions(user_id, on_progress=job.update_progress)
+        return {"deleted_count": deleted}
+    return work
+
+
+def rebuild_rollups(user_id: str) -> JobWork:
+    """Recompute a user's rollups from their transactions."""
+    if not TRANSACTION_ROLLUPS_ENABLED:
+        raise ValueError("Transaction rollups are not enabled")
+
+    def work(job: Job):
+        return {"buckets": Transaction.rebuild_rollups(user_id)}
+    return work
+
+
+def import_transactions(progress: Iterator[Dict[str, Any]], upload: IO[bytes]) -> JobWork:
+    """
+    Drain an import (see Transaction.import_transactions), reporting each
+    batch as progress. `upload` is the copy of the statement being read and
+    is closed when the job ends.
+    """
+    def work(job: Job):
+        try:
+            report: Dict[str, Any] = {}
+            for report in progress:
+                job.update_progress(report)
+            return report
+        finally:
+            upload.close()
+    return work
+
+
+# Jobs that POST /api/jobs starts from a kind alone: kind -> (user_id -> work)
+JOB_KINDS: Dict[str, Callable[[str], JobWork]] = {
+    "delete_all_transactions": delete_all_transactions,
+    "rebuild_rollups": rebuild_rollups,
+}
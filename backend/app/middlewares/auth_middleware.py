@@ -1,12 +1,122 @@
 from flask import request, jsonify, g
 from functools import wraps
-from app.supabase.supabase_client import supabase
+import logging
+import os
+from app.supabase.supabase_client import supabase, SUPABASE_URL
+from app.cache.token_cache import token_cache
+from app.helpers.jwt_helper import (
+    JWKSCache,
+    LocalTokenVerifier,
+    SigningKeyUnavailable,
+    TokenVerificationError,
+    fetch_jwks_from_url,
+    unverified_expiry,
+)
+
+logger = logging.getLogger(__name__)
+
+# Shared secret of projects that sign tokens with HS256; JWT_SECRET is the
+# name the app's .env has always used
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET") or os.getenv("JWT_SECRET") or None
+
+# "local" verifies tokens against the project's signing keys, "remote" asks
+# Supabase Auth. Defaults to local only once a JWT secret is configured.
+AUTH_VERIFY_MODE = (os.getenv("AUTH_VERIFY_MODE") or ("local" if SUPABASE_JWT_SECRET else "remote")).strip().lower()
+
+# In local mode, fall back to Supabase Auth when no signing key is available
+AUTH_REMOTE_FALLBACK = os.getenv("AUTH_REMOTE_FALLBACK", "false").strip().lower() in ("1", "true", "yes")
+
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL") or f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
+SUPABASE_JWKS_REFRESH_SECONDS = float(os.getenv("SUPABASE_JWKS_REFRESH_SECONDS", "600"))
+
+jwks_cache = JWKSCache(
+    fetch_jwks=lambda: fetch_jwks_from_url(SUPABASE_JWKS_URL),
+    refresh_interval=SUPABASE_JWKS_REFRESH_SECONDS
+)
+
+token_verifier = LocalTokenVerifier(
+    jwks_cache,
+    issuer=f"{SUPABASE_URL.rstrip('/')}/auth/v1",
+    hs256_secret=SUPABASE_JWT_SECRET
+)
+
+
+def check_auth_config():
+    """
+    Fail at startup, rather than with a 401 on every request, when tokens
+    could not be verified.
+
+    Raises:
+        RuntimeError: If AUTH_VERIFY_MODE is unknown, or local verification
+            has no JWT secret, no remote fallback and no usable published key
+    """
+    if AUTH_VERIFY_MODE not in ("local", "remote"):
+        raise RuntimeError(f"AUTH_VERIFY_MODE must be 'local' or 'remote', not {AUTH_VERIFY_MODE!r}")
+    if AUTH_VERIFY_MODE == "remote" or SUPABASE_JWT_SECRET or AUTH_REMOTE_FALLBACK:
+        return
+
+    try:
+        keys = jwks_cache.load()
+    except Exception as e:
+        raise RuntimeError(
+            f"AUTH_VERIFY_MODE=local: no SUPABASE_JWT_SECRET (or JWT_SECRET) is set and "
+            f"the signing keys at {SUPABASE_JWKS_URL} could not be fetched: {str(e)}"
+        )
+    if not keys:
+        raise RuntimeError(
+            f"AUTH_VERIFY_MODE=local: no SUPABASE_JWT_SECRET (or JWT_SECRET) is set and "
+            f"{SUPABASE_JWKS_URL} publishes no signing keys"
+        )
+
+
+def _authenticate_remote(token):
+    """Validate the token with a call to Supabase Auth."""
+    res = supabase.auth.get_user(token)
+
+    # Extract the user from the response
+    user = getattr(res, "user", None)
+    if not user:
+        return None
+
+    return user.id, user
+
+
+def _authenticate_local(token):
+    """Validate the token's signature and expiry without a network call."""
+    try:
+        claims = token_verifier.verify(token)
+    except SigningKeyUnavailable:
+        if AUTH_REMOTE_FALLBACK:
+            return _authenticate_remote(token)
+        raise
+
+    return claims["sub"], claims
+
+
+def authenticate_token(token):
+    """
+    Resolve a bearer token to (user_id, user).
+
+    Returns None if the token is not valid. In local mode `user` is the
+    token's claims; in remote mode it is the Supabase user object.
+    """
+    if AUTH_VERIFY_MODE == "remote":
+        return _authenticate_remote(token)
+    return _authenticate_local(token)
+
+
+def _token_expiry(token, user):
+    """Expiry (epoch seconds) of an already validated token."""
+    if isinstance(user, dict) and isinstance(user.get("exp"), (int, float)):
+        return float(user["exp"])
+    return unverified_expiry(token)
+
 
 def require_auth(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         auth_header = request.headers.get("Authorization")
-        
+
         if not auth_header:
             return jsonify({"error": "Authorization header missing"}), 401
 
@@ -16,21 +126,38 @@ def require_auth(f):
 
         token = parts[1]
 
-        try:
-            # Call Supabase
-            res = supabase.auth.get_user(token)
+        # Serve repeated tokens (and recently rejected ones) from the cache
+        cached = token_cache.get(token)
+        if cached is not None:
+            if not cached.valid:
+                return jsonify({"error": "Invalid or expired token", "details": cached.reason}), 401
+            g.user_id, g.user = cached.user_id, cached.user
+            return f(*args, **kwargs)
 
-            # Extract the user from the response
-            user = getattr(res, "user", None)
+        try:
+            identity = authenticate_token(token)
 
-            if not user:
+            if not identity:
+                token_cache.store_invalid(token, "Invalid or expired token")
                 return jsonify({"error": "Invalid or expired token"}), 401
 
             # Store only what you need (user.id)
-            g.user_id = user.id
-            g.user = user  # optional if you need full user details
+            g.user_id, g.user = identity
+            token_cache.store_valid(token, g.user_id, g.user, _token_expiry(token, g.user))
+
+        except SigningKeyUnavailable as e:
+            # Not the token's fault; don't remember the rejection
+            logger.warning("Cannot verify token locally: %s", e)
+            return jsonify({"error": "Unauthorized", "details": str(e)}), 401
+
+        except TokenVerificationError as e:
+            token_cache.store_invalid(token, str(e))
+            return jsonify({"error": "Invalid or expired token", "details": str(e)}), 401
 
         except Exception as e:
+            # Supabase Auth rejects bad tokens with a 401/403 error
+            if getattr(e, "status", None) in (401, 403):
+                token_cache.store_invalid(token, str(e))
             return jsonify({"error": "Unauthorized", "details": str(e)}), 401
 
         return f(*args, **kwargs)
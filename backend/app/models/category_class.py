@@ -1,6 +1,17 @@
-from app.supabase.supabase_client import supabase
+from app.repositories.repository_factory import get_category_repository
+from app.repositories.fields import CATEGORY_FIELDS
+from app.cache.single_flight import coalesce, single_flight
+from app.cache.category_cache import category_cache
+
+def embedded_category(record):
+    """The category fields embedded in transaction rows."""
+    return {key: record.get(key) for key in ("id", "name", "type", "icon")}
+
 
 class Category:
+    # Fields that can be requested with ?fields=
+    FIELDS = CATEGORY_FIELDS
+
     def __init__(self, id=None, name=None, type=None, icon=None, user_id=None):
         self.id = id
         self.name = name
@@ -8,6 +19,17 @@ class Category:
         self.icon = icon
         self.user_id = user_id
 
+    @classmethod
+    def from_record(cls, record):
+        """Build a Category from a database row, ignoring extra columns."""
+        return cls(
+            id=record.get("id"),
+            name=record.get("name"),
+            type=record.get("type"),
+            icon=record.get("icon"),
+            user_id=record.get("user_id")
+        )
+
     # ---------------- Create ---------------- #
     @classmethod
     def create_category(cls, name, type, icon, user_id):
@@ -17,19 +39,19 @@ class Category:
         data = {"name": name, "type": type, "icon": icon, "user_id": user_id}
 
         try:
-            res = supabase.table("categories").insert(data).execute()
+            record = get_category_repository().insert_category(data)
         except Exception as e:
             # Catch unique constraint violation
             if "unique_user_category" in str(e).lower():
                 raise ValueError(f"Category '{name}' of type '{type}' already exists for this user")
             raise RuntimeError(f"Failed to insert category: {str(e)}")
 
-        records = getattr(res, "data", None)
-        if not records:
+        if not record:
             raise RuntimeError("No data returned from Supabase after insert")
 
-        record_dict = {k: getattr(records[0], k) for k in records[0].__dict__ if not k.startswith("_")}
-        return cls(**record_dict)
+        category_cache.invalidate_user(user_id)
+        single_flight.forget(user_id)
+        return cls.from_record(record)
 
     # ---------------- Update ---------------- #
     @classmethod
@@ -45,14 +67,14 @@ class Category:
 
         # Fetch category to verify ownership
         try:
-            cat = supabase.table("categories").select("user_id").eq("id", id).execute()
+            cat = get_category_repository().get_category(id)
         except Exception as e:
             raise RuntimeError(f"Failed to fetch category: {str(e)}")
 
-        if not cat.data:
+        if not cat:
             raise RuntimeError(f"Category with id={id} not found")
 
-        record_user_id = getattr(cat.data[0], "user_id", None)
+        record_user_id = cat.get("user_id")
         if record_user_id is None:
             raise ValueError("Cannot update default categories")
         if record_user_id != user_id:
@@ -60,32 +82,33 @@ class Category:
 
         # Perform update
         try:
-            res = supabase.table("categories").update(updates).eq("id", id).eq("user_id", user_id).execute()
+            record = get_category_repository().update_category(id, user_id, updates)
         except Exception as e:
             # Catch unique constraint violation
             if "unique_user_category" in str(e).lower():
                 raise ValueError("Category with this name and type already exists for this user")
             raise RuntimeError(f"Failed to update category: {str(e)}")
 
-        if not getattr(res, "data", None):
+        if not record:
             raise RuntimeError("Update failed; no data returned")
 
-        record_dict = {k: getattr(res.data[0], k) for k in res.data[0].__dict__ if not k.startswith("_")}
-        return cls(**record_dict)
+        category_cache.invalidate_user(user_id)
+        single_flight.forget(user_id)
+        return cls.from_record(record)
 
     # ---------------- Delete ---------------- #
     @classmethod
     def delete_category(cls, id, user_id):
         # Fetch category to verify ownership
         try:
-            cat = supabase.table("categories").select("user_id").eq("id", id).execute()
+            cat = get_category_repository().get_category(id)
         except Exception as e:
             raise RuntimeError(f"Failed to fetch category: {str(e)}")
 
-        if not cat.data:
+        if not cat:
             raise RuntimeError(f"Category with id={id} not found")
 
-        record_user_id = getattr(cat.data[0], "user_id", None)
+        record_user_id = cat.get("user_id")
         if record_user_id is None:
             raise ValueError("Cannot delete default categories")
         if record_user_id != user_id:
@@ -93,9 +116,9 @@ class Category:
 
         # Check if category is referenced by transactions
         try:
-            transactions = supabase.table("transactions").select("id").eq("category_id", id).execute()
-            if transactions.data and len(transactions.data) > 0:
-                raise ValueError(f"Cannot delete category; {len(transactions.data)} transaction(s) reference it")
+            referenced = get_category_repository().count_category_transactions(id)
+            if referenced > 0:
+                raise ValueError(f"Cannot delete category; {referenced} transaction(s) reference it")
         except ValueError:
             raise
         except Exception:
@@ -103,44 +126,127 @@ class Category:
 
         # Perform deletion
         try:
-            res = supabase.table("categories").delete().eq("id", id).eq("user_id", user_id).execute()
+            record = get_category_repository().delete_category(id, user_id)
         except Exception as e:
             raise RuntimeError(f"Failed to delete category: {str(e)}")
 
-        if not getattr(res, "data", None):
+        if not record:
             raise RuntimeError("Delete failed; no data returned")
 
-        record_dict = {k: getattr(res.data[0], k) for k in res.data[0].__dict__ if not k.startswith("_")}
-        return cls(**record_dict)
+        category_cache.invalidate_user(user_id)
+        single_flight.forget(user_id)
+        return cls.from_record(record)
 
     # ---------------- Get all categories ---------------- #
     @classmethod
-    def get_all_categories(cls, user_id):
+    @coalesce(scope=lambda a: a["user_id"])
+    def get_all_categories(cls, user_id, fields=None):
+        # Served from the shared default set plus the user's cached categories;
+        # `fields` only narrows the query when the cache is disabled
+        repository = get_category_repository()
         try:
-            res = supabase.table("categories").select("*").or_(f"user_id.eq.{user_id},user_id.is.null").execute()
+            if category_cache.enabled:
+                records = (
+                    category_cache.defaults(repository.list_default_categories)
+                    + category_cache.user_categories(user_id, lambda: repository.list_user_categories(user_id))
+                )
+            else:
+                records = repository.list_categories(user_id, fields=fields)
         except Exception as e:
             raise RuntimeError(f"Failed to fetch categories: {str(e)}")
 
-        records = getattr(res, "data", None)
-        if not records:
-            return []
-
-        return [cls(**{k: getattr(r, k) for k in r.__dict__ if not k.startswith("_")}) for r in records]
+        return [cls.from_record(r) for r in records]
 
     # ---------------- Get category by ID ---------------- #
     @classmethod
-    def get_category_by_id(cls, id, user_id):
+    @coalesce(scope=lambda a: a["user_id"])
+    def get_category_by_id(cls, id, user_id, fields=None):
         try:
-            res = supabase.table("categories").select("*").eq("id", id).or_(f"user_id.eq.{user_id},user_id.is.null").execute()
+            record = get_category_repository().get_category_for_user(id, user_id, fields=fields)
         except Exception as e:
             raise RuntimeError(f"Failed to fetch category: {str(e)}")
 
-        records = getattr(res, "data", None)
-        if not records:
+        if not record:
             return None
 
-        record_dict = {k: getattr(records[0], k) for k in records[0].__dict__ if not k.startswith("_")}
-        return cls(**record_dict)
+        return cls.from_record(record)
+
+    # ---------------- Category map ---------------- #
+    @classmethod
+    def category_map(cls, user_id):
+        """
+        {category_id: {id, name, type, icon}} for every category the user can
+        use, built from the category cache. This is the shape transaction
+        rows embed as "category".
+        """
+        repository = get_category_repository()
+        try:
+            records = (
+                category_cache.defaults(repository.list_default_categories)
+                + category_cache.user_categories(user_id, lambda: repository.list_user_categories(user_id))
+            )
+        except Exception as e:
+            raise RuntimeError(f"Failed to fetch categories: {str(e)}")
+
+        return {str(r.get("id")): embedded_category(r) for r in records}
+
+    # ---------------- Lookup for writes ---------------- #
+    @classmethod
+    def find_for_user(cls, id, user_id):
+        """
+        The row of a category the user can use (their own or a default one),
+        or None. Served from the category cache; a miss is confirmed against
+        the database in case another worker created it.
+        """
+        repository = get_category_repository()
+        try:
+            if category_cache.enabled:
+                record = category_cache.find(
+                    user_id,
+                    id,
+                    repository.list_default_categories,
+                    lambda: repository.list_user_categories(user_id)
+                )
+                if record is not None:
+                    return record
+
+            record = repository.get_category_for_user(id, user_id)
+        except Exception as e:
+            raise RuntimeError(f"Failed to fetch category: {str(e)}")
+
+        if record is not None and category_cache.enabled:
+            # Our cached copy is behind; reload it on the next lookup
+            category_cache.invalidate_user(user_id)
+        return record
+
+    @classmethod
+    def find_many_for_user(cls, ids, user_id):
+        """
+        {category_id: row or None} for many IDs at once, like find_for_user.
+        IDs missing from the category cache are confirmed with one query.
+        """
+        repository = get_category_repository()
+        found = {}
+        try:
+            for id in {str(i) for i in ids if i}:
+                found[id] = category_cache.find(
+                    user_id,
+                    id,
+                    repository.list_default_categories,
+                    lambda: repository.list_user_categories(user_id)
+                ) if category_cache.enabled else None
+
+            missing = [id for id, record in found.items() if record is None]
+            if missing:
+                for record in repository.list_categories_by_ids(user_id, missing):
+                    found[str(record.get("id"))] = record
+        except Exception as e:
+            raise RuntimeError(f"Failed to fetch categories: {str(e)}")
+
+        if category_cache.enabled and any(found.get(id) is not None for id in missing):
+            # Our cached copy is behind; reload it on the next lookup
+            category_cache.invalidate_user(user_id)
+        return found
 
     def __repr__(self):
         return f"Category(id={self.id}, name='{self.name}', type='{self.type}', icon='{self.icon}', user_id={self.user_id})"
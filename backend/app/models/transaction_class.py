@@ -1,8 +1,84 @@
-from app.supabase.supabase_client import supabase
-from typing import Any, Dict, List, Optional, cast
+from app.repositories.repository_factory import get_transaction_repository
+from app.models.category_class import Category, embedded_category
+from app.cache.category_cache import category_cache
+from app.repositories.transaction_query import TransactionQuery
+from app.repositories.fields import TRANSACTION_FIELDS
+from app.repositories.paging import POSTGREST_MAX_ROWS
+from app.helpers.cursor_helper import decode_cursor, encode_cursor
+from app.cache.totals_cache import totals_cache
+from app.cache.single_flight import coalesce, single_flight
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
 from datetime import datetime, date
+from calendar import monthrange
+from decimal import Decimal
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Maintain per-user monthly rollups (sql/002_transaction_rollups.sql) and answer
+# month-aligned totals from them instead of scanning transactions
+TRANSACTION_ROLLUPS_ENABLED = os.getenv("TRANSACTION_ROLLUPS_ENABLED", "false").strip().lower() in ("1", "true", "yes")
+
+# Attach category data to transaction rows from the category cache instead of
+# joining categories in every transaction query
+TRANSACTION_HYDRATE_CATEGORIES = os.getenv("TRANSACTION_HYDRATE_CATEGORIES", "true").strip().lower() in ("1", "true", "yes")
+
+# Page size used when a cursor is given without a limit
+TRANSACTION_PAGE_SIZE = int(os.getenv("TRANSACTION_PAGE_SIZE", "50"))
+
+# Rows removed per statement by delete-all
+TRANSACTION_DELETE_BATCH_SIZE = int(os.getenv("TRANSACTION_DELETE_BATCH_SIZE", "1000"))
+
+# Rows written per insert when importing a statement, and the most a request may ask for
+TRANSACTION_IMPORT_BATCH_SIZE = int(os.getenv("TRANSACTION_IMPORT_BATCH_SIZE", "500"))
+TRANSACTION_IMPORT_MAX_BATCH_SIZE = int(os.getenv("TRANSACTION_IMPORT_MAX_BATCH_SIZE", "2000"))
+
+# Row errors listed in an import report; the rest are only counted
+TRANSACTION_IMPORT_MAX_ERRORS = 50
+
+
+def _rollup_delta(record: Dict[str, Any], sign: int) -> Dict[str, Any]:
+    """Rollup change for adding (sign=1) or removing (sign=-1) a transaction row."""
+    raw_date = str(record.get("date") or "")
+    # Undated transactions live in the (0, 0) bucket
+    year, month = (int(raw_date[:4]), int(raw_date[5:7])) if raw_date else (0, 0)
+    return {
+        "year": year,
+        "month": month,
+        "category_id": record.get("category_id"),
+        "type": record.get("type"),
+        "amount": sign * float(record.get("amount") or 0),
+        "count": sign
+    }
+
+
+def _hydrates_categories(fields: Optional[Sequence[str]]) -> bool:
+    """Whether category data for these fields comes from the cache rather than a join."""
+    wants_category = fields is None or "category" in fields
+    return wants_category and TRANSACTION_HYDRATE_CATEGORIES and category_cache.enabled
+
+
+def _without_category_join(fields: Optional[Sequence[str]]) -> tuple:
+    """The fields to read when category data is attached in memory: category_id instead of the join."""
+    requested = set(TRANSACTION_FIELDS if fields is None else fields)
+    requested.discard("category")
+    requested.add("category_id")
+    return tuple(f for f in TRANSACTION_FIELDS if f in requested)
+
+
+def _is_month_aligned(start_date: Optional[date], end_date: Optional[date]) -> bool:
+    """True if the window starts on a month's first day and ends on a month's last day."""
+    if start_date and start_date.day != 1:
+        return False
+    if end_date and end_date.day != monthrange(end_date.year, end_date.month)[1]:
+        return False
+    return True
 
 class Transaction:
+    # Fields that can be requested with ?fields=
+    FIELDS = TRANSACTION_FIELDS
+
     def __init__(
         self, id=None, title=None, amount=None, payment_method=None, 
         category_id=None, type_=None, description=None, user_id=None, 
@@ -22,6 +98,26 @@ class Transaction:
         self.category = category  # For nested category data
 
 
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]):
+        """Build a Transaction from a database row."""
+        return cls(
+            id=record.get("id"),
+            title=record.get("title"),
+            amount=record.get("amount"),
+            payment_method=record.get("payment_method"),
+            category_id=record.get("category_id"),
+            type_=record.get("type"),
+            description=record.get("description"),
+            user_id=record.get("user_id"),
+            created_at=record.get("created_at"),
+            document_url=record.get("document_url"),
+            date_=record.get("date"),
+            # Joined category data arrives as 'categories'; expose it as 'category'
+            category=record.get("categories", record.get("category"))
+        )
+
+
     #------------- Create transaction ---------------- #
     @classmethod
     def create_transaction(
@@ -61,21 +157,13 @@ class Transaction:
         
         # Validate category exists and user has access to it
         try:
-            cat_res = (
-                supabase
-                .table("categories")
-                .select("*")
-                .eq("id", category_id)
-                .or_(f"user_id.eq.{user_id},user_id.is.null")
-                .execute()
-            )
+            category = Category.find_for_user(category_id, user_id)
             
-            if not cat_res.data:
+            if not category:
                 raise ValueError(
                     f"Category not found or you don't have access to it"
                 )
             
-            category = cast(Dict[str, Any], cat_res.data[0])
             type_ = category.get("type")
             
             if type_ not in ["income", "expense"]:
@@ -100,16 +188,18 @@ class Transaction:
         }
 
         try:
-            res = supabase.table("transactions").insert(data).execute()
+            record = get_transaction_repository().insert_transaction(data)
             
-            if not res.data:
+            if not record:
                 raise RuntimeError("Failed to create transaction; no data returned")
-            
-            record = cast(Dict[str, Any], res.data[0])
-            return cls(**record)
         except Exception as e:
             raise RuntimeError(f"Failed to create transaction: {str(e)}")
 
+        cls._apply_rollups(user_id, [_rollup_delta(record, 1)])
+        totals_cache.invalidate(user_id, [record.get("date")])
+        single_flight.forget(user_id)
+        return cls.from_record(record)
+
 
     #------------- Update transaction ---------------- #
     @classmethod
@@ -166,19 +256,11 @@ class Transaction:
         # If category is being updated, validate it and update type
         if category_id is not None:
             try:
-                cat_res = (
-                    supabase
-                    .table("categories")
-                    .select("*")
-                    .eq("id", category_id)
-                    .or_(f"user_id.eq.{user_id},user_id.is.null")
-                    .execute()
-                )
+                category = Category.find_for_user(category_id, user_id)
                 
-                if not cat_res.data:
+                if not category:
                     raise ValueError("Category not found or you don't have access to it")
                 
-                category = cast(Dict[str, Any], cat_res.data[0])
                 updates["category_id"] = category_id
                 updates["type"] = category.get("type")
             except ValueError:
@@ -189,193 +271,173 @@ class Transaction:
         if not updates:
             raise ValueError("No fields to update")
         
+        # Moving amount, category or date shifts the row between rollup buckets
+        changes_totals = any(key in updates for key in ("amount", "category_id", "date"))
+        
         try:
-            res = (
-                supabase
-                .table("transactions")
-                .update(updates)
-                .eq("id", transaction_id)
-                .eq("user_id", user_id)
-                .execute()
-            )
+            # The row before and after the change come from the update itself
+            # (sql/004), so concurrent updates never share a stale `previous`
+            rows = get_transaction_repository().update_transactions(user_id, [{"id": transaction_id, **updates}])
             
-            if not res.data:
+            if not rows:
                 raise RuntimeError(
                     f"Transaction with id={transaction_id} not found or "
                     f"does not belong to user"
                 )
-            
-            record = cast(Dict[str, Any], res.data[0])
-            return cls(**record)
         except Exception as e:
             raise RuntimeError(f"Failed to update transaction: {str(e)}")
 
+        previous, record = rows[0]["previous"], rows[0]["updated"]
+        if changes_totals:
+            cls._apply_rollups(user_id, [_rollup_delta(previous, -1), _rollup_delta(record, 1)])
+            totals_cache.invalidate(user_id, [previous.get("date"), record.get("date")])
+        single_flight.forget(user_id)
+        return cls.from_record(record)
 
-    #------------- Get all transactions ---------------- #
+
+    #------------- Get transactions ---------------- #
     @classmethod
-    def get_all_transactions(cls, user_id: str, limit: Optional[int] = None):
+    @coalesce(scope=lambda a: a["query"].user_id)
+    def get_transactions(cls, query: TransactionQuery, cursor: Optional[str] = None):
         """
-        Fetch all transactions for a user including category info.
+        Fetch one page of a user's transactions including category info.
+        
+        All filters in the query are applied by the database. The page holds
+        at most `query.limit` rows; one extra row is fetched to know whether
+        another page follows. The cursor encodes the last returned row's sort
+        key, so every page is an index range scan regardless of depth.
         
         Args:
-            user_id: User ID from Supabase Auth
-            limit: Optional limit on number of results
+            query: Filters, ordering and page size
+            cursor: Optional next_cursor from a previous page
             
         Returns:
-            List of Transaction instances
+            Tuple of (list of Transaction instances, next_cursor or None)
             
         Raises:
+            ValueError: If the cursor is invalid
             RuntimeError: If query fails
         """
+        after = decode_cursor(cursor) if cursor else None
+        limit = query.limit
+        if after and not limit:
+            limit = TRANSACTION_PAGE_SIZE
+
+        hydrate = _hydrates_categories(query.fields)
+        fields = _without_category_join(query.fields) if hydrate else query.fields
+
         try:
-            query = (
-                supabase
-                .table("transactions")
-                .select("*, categories(id, name, type, icon)")
-                .eq("user_id", user_id)
-                .order("date", desc=True)
-                .order("created_at", desc=True)
+            records = get_transaction_repository().list_transactions(
+                query.replace(limit=limit + 1 if limit else None, after=after, fields=fields)
             )
-            
-            if limit:
-                query = query.limit(limit)
-            
-            res = query.execute()
-            transactions = res.data or []
-            
-            # Flatten nested category data
-            result = []
-            for tx in transactions:
-                tx_dict = cast(Dict[str, Any], tx)
-                # Rename 'categories' to 'category' for consistency
-                if "categories" in tx_dict:
-                    tx_dict["category"] = tx_dict.pop("categories")
-                result.append(cls(**tx_dict))
-            
-            return result
         except Exception as e:
             raise RuntimeError(f"Failed to get transactions: {str(e)}")
 
+        if hydrate:
+            cls.attach_categories(query.user_id, records)
 
-    #------------- Get transactions by date range ---------------- #
-    @classmethod
-    def get_transactions_by_date_range(
-        cls, 
-        user_id: str, 
-        start_date: date, 
-        end_date: date
-    ):
-        """
-        Get transactions within a date range.
-        
-        Args:
-            user_id: User ID
-            start_date: Start date (inclusive)
-            end_date: End date (inclusive)
-            
-        Returns:
-            List of Transaction instances
-        """
-        try:
-            res = (
-                supabase
-                .table("transactions")
-                .select("*, categories(id, name, type, icon)")
-                .eq("user_id", user_id)
-                .gte("date", start_date.isoformat())
-                .lte("date", end_date.isoformat())
-                .order("date", desc=True)
-                .execute()
-            )
-            
-            transactions = res.data or []
-            result = []
-            for tx in transactions:
-                tx_dict = cast(Dict[str, Any], tx)
-                if "categories" in tx_dict:
-                    tx_dict["category"] = tx_dict.pop("categories")
-                result.append(cls(**tx_dict))
-            
-            return result
-        except Exception as e:
-            raise RuntimeError(f"Failed to get transactions by date: {str(e)}")
+        next_cursor = None
+        if limit and len(records) > limit:
+            records = records[:limit]
+            next_cursor = encode_cursor(records[-1])
+        return [cls.from_record(record) for record in records], next_cursor
 
 
-    #------------- Get transactions by type ---------------- #
     @classmethod
-    def get_transactions_by_type(cls, user_id: str, type_: str):
+    def iter_transaction_pages(
+        cls,
+        query: TransactionQuery,
+        cursor: Optional[str] = None,
+        page_size: Optional[int] = None
+    ) -> Iterator[List["Transaction"]]:
         """
-        Get transactions filtered by type (income or expense).
+        Yield a query's transactions page by page, following cursors.
         
-        Args:
-            user_id: User ID
-            type_: 'income' or 'expense'
-            
-        Returns:
-            List of Transaction instances
-        """
-        if type_ not in ["income", "expense"]:
-            raise ValueError("Type must be 'income' or 'expense'")
+        Only one page is held at a time. `query.limit` caps the total number
+        of rows yielded across pages; `page_size` defaults to
+        TRANSACTION_PAGE_SIZE and is capped so that each page, with the
+        extra row fetched to detect a next page, is one PostgREST response.
         
-        try:
-            res = (
-                supabase
-                .table("transactions")
-                .select("*, categories(id, name, type, icon)")
-                .eq("user_id", user_id)
-                .eq("type", type_)
-                .order("date", desc=True)
-                .execute()
-            )
-            
-            transactions = res.data or []
-            result = []
-            for tx in transactions:
-                tx_dict = cast(Dict[str, Any], tx)
-                if "categories" in tx_dict:
-                    tx_dict["category"] = tx_dict.pop("categories")
-                result.append(cls(**tx_dict))
-            
-            return result
-        except Exception as e:
-            raise RuntimeError(f"Failed to get transactions by type: {str(e)}")
+        Raises:
+            ValueError: If the cursor is invalid
+            RuntimeError: If a page query fails
+        """
+        page_size = min(page_size or TRANSACTION_PAGE_SIZE, POSTGREST_MAX_ROWS - 1)
+        remaining = query.limit
+
+        while True:
+            size = min(page_size, remaining) if remaining else page_size
+            page, cursor = cls.get_transactions(query.replace(limit=size), cursor=cursor)
+            if page:
+                yield page
+
+            if remaining:
+                remaining -= len(page)
+                if remaining <= 0:
+                    return
+            if not cursor:
+                return
 
 
     #------------- Get single transaction ---------------- #
     @classmethod
-    def get_transaction_by_id(cls, transaction_id: str, user_id: str):
+    @coalesce(scope=lambda a: a["user_id"])
+    def get_transaction_by_id(cls, transaction_id: str, user_id: str, fields: Optional[Sequence[str]] = None):
         """
         Get a specific transaction by ID.
         
         Args:
             transaction_id: Transaction UUID
             user_id: User ID
+            fields: Optional subset of Transaction.FIELDS to read
             
         Returns:
             Transaction instance or None
         """
+        hydrate = _hydrates_categories(fields)
         try:
-            res = (
-                supabase
-                .table("transactions")
-                .select("*, categories(id, name, type, icon)")
-                .eq("id", transaction_id)
-                .eq("user_id", user_id)
-                .execute()
+            record = get_transaction_repository().get_transaction(
+                transaction_id,
+                user_id,
+                fields=_without_category_join(fields) if hydrate else fields
             )
             
-            if not res.data:
+            if not record:
                 return None
             
-            tx_dict = cast(Dict[str, Any], res.data[0])
-            if "categories" in tx_dict:
-                tx_dict["category"] = tx_dict.pop("categories")
-            
-            return cls(**tx_dict)
+            if hydrate:
+                cls.attach_categories(user_id, [record])
+            return cls.from_record(record)
         except Exception as e:
             raise RuntimeError(f"Failed to get transaction: {str(e)}")
 
 
+    @classmethod
+    def category_table(cls, user_id: str, category_ids) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        {category_id: {id, name, type, icon}} for the given IDs, from the
+        user's cached category map. IDs missing from the map (e.g. created by
+        another worker) are looked up individually; unknown ones map to None.
+        """
+        categories = Category.category_map(user_id)
+        table = {}
+        for category_id in {str(c) for c in category_ids if c}:
+            if category_id not in categories:
+                found = Category.find_for_user(category_id, user_id)
+                categories[category_id] = embedded_category(found) if found else None
+            table[category_id] = categories[category_id]
+        return table
+
+
+    @classmethod
+    def attach_categories(cls, user_id: str, records: List[Dict[str, Any]]):
+        """Set each record's "categories" from the user's category map, in place."""
+        table = cls.category_table(user_id, [record.get("category_id") for record in records])
+        for record in records:
+            category_id = record.get("category_id")
+            record["categories"] = table.get(str(category_id)) if category_id else None
+
+
     #------------- Delete transaction ---------------- #
     @classmethod
     def delete_transaction(cls, transaction_id: str, user_id: str):
@@ -393,61 +455,394 @@ class Transaction:
             RuntimeError: If transaction not found or delete fails
         """
         try:
-            res = (
-                supabase
-                .table("transactions")
-                .delete()
-                .eq("id", transaction_id)
-                .eq("user_id", user_id)
-                .execute()
-            )
+            record = get_transaction_repository().delete_transaction(transaction_id, user_id)
 
-            if not res.data:
+            if not record:
                 raise RuntimeError(
                     f"Transaction with id={transaction_id} not found or "
                     f"does not belong to user"
                 )
-            
-            record = cast(Dict[str, Any], res.data[0])
-            return cls(**record)
         except Exception as e:
             raise RuntimeError(f"Failed to delete transaction: {str(e)}")
 
+        cls._apply_rollups(user_id, [_rollup_delta(record, -1)])
+        totals_cache.invalidate(user_id, [record.get("date")])
+        single_flight.forget(user_id)
+        return cls.from_record(record)
+
 
     #------------- Delete all transactions ---------------- #
     @classmethod
-    def delete_all_transactions(cls, user_id: str):
+    def delete_all_transactions(
+        cls,
+        user_id: str,
+        batch_size: Optional[int] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> int:
         """
         Delete all transactions for a specific user.
         WARNING: This is a destructive operation!
         
+        Rows are deleted TRANSACTION_DELETE_BATCH_SIZE at a time, each batch
+        in its own short transaction, and only per-bucket totals come back.
+        Rollups and cached totals are adjusted after every batch, so they
+        match what is left while the deletion runs. Meant to run as a
+        background job (see DELETE /api/transactions/all).
+        
         Args:
             user_id: User ID
+            batch_size: Rows per batch (default TRANSACTION_DELETE_BATCH_SIZE)
+            on_progress: Optional callback given {"deleted": n} after each
+                batch; an exception it raises stops the deletion and propagates
             
         Returns:
-            List of deleted Transaction instances
+            Number of transactions deleted
         """
-        try:
-            res = (
-                supabase
-                .table("transactions")
-                .delete()
-                .eq("user_id", user_id)
-                .execute()
-            )
+        batch_size = batch_size or TRANSACTION_DELETE_BATCH_SIZE
+        deleted = 0
+        
+        while True:
+            try:
+                deltas = get_transaction_repository().delete_transactions_batch(user_id, batch_size)
+                if not deltas:
+                    break
+                
+                deleted -= sum(int(delta["count"]) for delta in deltas)
+                cls._apply_rollups(user_id, [dict(delta, amount=float(delta["amount"])) for delta in deltas])
+                totals_cache.invalidate_user(user_id)
+                single_flight.forget(user_id)
+            except Exception as e:
+                raise RuntimeError(f"Failed to delete all transactions: {str(e)}")
+            
+            # Outside the try: the callback may stop the deletion between batches
+            if on_progress:
+                on_progress({"deleted": deleted})
+        
+        return deleted
 
-            deleted_records = res.data or []
-            return [cls(**cast(Dict[str, Any], record)) for record in deleted_records]
-        except Exception as e:
-            raise RuntimeError(f"Failed to delete all transactions: {str(e)}")
+
+    #------------- Batch operations ---------------- #
+    @classmethod
+    def apply_batch(cls, user_id: str, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Apply many creates, updates and deletes with a handful of queries.
+
+        Categories are validated with one lookup, creates go in one multi-row
+        insert, updates in one statement (sql/004_batch_transaction_updates.sql)
+        and deletes in one statement, in that order. Rollups and cached totals
+        are adjusted once for the whole batch. Each operation succeeds or
+        fails on its own.
+
+        Args:
+            user_id: User ID
+            operations: Dicts with "op" ("create", "update" or "delete") and
+                the keyword arguments of create_transaction (minus user_id),
+                update_transaction or delete_transaction respectively
+
+        Returns:
+            One {"success", "transaction"} or {"success", "error"} dict per
+            operation, in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(operations)
+
+        def fail(index, message):
+            results[index] = {"success": False, "error": message}
+
+        categories = Category.find_many_for_user(
+            [op.get("category_id") for op in operations if op.get("op") in ("create", "update")],
+            user_id
+        )
+
+        creates: List[tuple] = []                 # (index, row)
+        updates: Dict[str, Dict[str, Any]] = {}   # transaction_id -> merged changes
+        update_indexes: Dict[str, List[int]] = {}
+        delete_indexes: Dict[str, List[int]] = {}
+
+        for index, op in enumerate(operations):
+            kind = op.get("op")
+            category = categories.get(str(op.get("category_id"))) if op.get("category_id") else None
+            amount = op.get("amount")
+
+            if kind not in ("create", "update", "delete"):
+                fail(index, "Operation must be 'create', 'update' or 'delete'")
+            elif kind != "create" and not op.get("transaction_id"):
+                fail(index, "Transaction ID is required")
+            elif kind != "delete" and amount is not None and amount <= 0:
+                fail(index, "Amount must be greater than 0")
+            elif kind != "delete" and op.get("category_id") and not category:
+                fail(index, "Category not found or you don't have access to it")
+            elif kind == "create":
+                if not category or category.get("type") not in ["income", "expense"]:
+                    fail(index, "Invalid category type")
+                    continue
+                date_ = op.get("date_")
+                creates.append((index, {
+                    "title": op.get("title"),
+                    "amount": float(amount),
+                    "payment_method": op.get("payment_method"),
+                    "category_id": op.get("category_id"),
+                    "type": category.get("type"),
+                    "description": op.get("description"),
+                    "user_id": user_id,
+                    "document_url": op.get("document_url"),
+                    "date": date_.isoformat() if date_ else None
+                }))
+            elif kind == "update":
+                changes = {
+                    key: op[key] for key in ("title", "payment_method", "description", "document_url")
+                    if op.get(key) is not None
+                }
+                if amount is not None:
+                    changes["amount"] = float(amount)
+                if op.get("date_") is not None:
+                    changes["date"] = op["date_"].isoformat()
+                if category:
+                    changes["category_id"] = op["category_id"]
+                    changes["type"] = category.get("type")
+                if not changes:
+                    fail(index, "No fields to update")
+                    continue
+                # Later updates of the same transaction win field by field
+                transaction_id = str(op["transaction_id"])
+                updates.setdefault(transaction_id, {}).update(changes)
+                update_indexes.setdefault(transaction_id, []).append(index)
+            else:
+                delete_indexes.setdefault(str(op["transaction_id"]), []).append(index)
+
+        repository = get_transaction_repository()
+        deltas: List[Dict[str, Any]] = []
+        touched_dates: List[Any] = []
+
+        if creates:
+            try:
+                records = repository.insert_transactions([row for _, row in creates])
+                if len(records) != len(creates):
+                    raise RuntimeError("no data returned")
+            except Exception as e:
+                for index, _ in creates:
+                    fail(index, f"Failed to create transaction: {str(e)}")
+            else:
+                for (index, _), record in zip(creates, records):
+                    results[index] = {"success": True, "transaction": cls.from_record(record)}
+                    deltas.append(_rollup_delta(record, 1))
+                    touched_dates.append(record.get("date"))
+
+        if updates:
+            try:
+                changed = {
+                    str(row["id"]): row
+                    for row in repository.update_transactions(
+                        user_id,
+                        [{"id": transaction_id, **changes} for transaction_id, changes in updates.items()]
+                    )
+                }
+            except Exception as e:
+                for indexes in update_indexes.values():
+                    for index in indexes:
+                        fail(index, f"Failed to update transaction: {str(e)}")
+            else:
+                for transaction_id, indexes in update_indexes.items():
+                    row = changed.get(transaction_id)
+                    if not row:
+                        for index in indexes:
+                            fail(index, f"Transaction with id={transaction_id} not found or does not belong to user")
+                        continue
+
+                    previous, record = row["previous"], row["updated"]
+                    for index in indexes:
+                        results[index] = {"success": True, "transaction": cls.from_record(record)}
+                    if any(key in updates[transaction_id] for key in ("amount", "category_id", "date")):
+                        deltas += [_rollup_delta(previous, -1), _rollup_delta(record, 1)]
+                        touched_dates += [previous.get("date"), record.get("date")]
+
+        if delete_indexes:
+            try:
+                deleted = {
+                    str(record["id"]): record
+                    for record in repository.delete_transactions(user_id, list(delete_indexes))
+                }
+            except Exception as e:
+                for indexes in delete_indexes.values():
+                    for index in indexes:
+                        fail(index, f"Failed to delete transaction: {str(e)}")
+            else:
+                for transaction_id, indexes in delete_indexes.items():
+                    record = deleted.get(transaction_id)
+                    for index in indexes:
+                        if record:
+                            results[index] = {"success": True, "transaction": cls.from_record(record)}
+                        else:
+                            fail(index, f"Transaction with id={transaction_id} not found or does not belong to user")
+                    if record:
+                        deltas.append(_rollup_delta(record, -1))
+                        touched_dates.append(record.get("date"))
+
+        cls._apply_rollups(user_id, deltas)
+        if touched_dates:
+            totals_cache.invalidate(user_id, touched_dates)
+        single_flight.forget(user_id)
+        return results
+
+
+    #------------- Import statement ---------------- #
+    @classmethod
+    def import_transactions(
+        cls,
+        user_id: str,
+        rows: Iterable[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+        payment_method: str = "bank_transfer",
+        income_category_id: Optional[str] = None,
+        expense_category_id: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Import parsed statement rows (see app.helpers.statement_parser),
+        yielding a progress report after every batch written.
+        
+        Rows are consumed lazily and written `batch_size` at a time with one
+        multi-row insert, so memory use does not depend on the number of
+        rows. Negative amounts are expenses and positive ones income. A row's
+        category name is resolved against the user's categories of that type
+        in memory; rows without one fall back to `income_category_id` /
+        `expense_category_id`, or are skipped. A category of the other type
+        never decides the direction of a row.
+        Rows matching an existing transaction on (date, amount, title),
+        including ones imported by earlier batches, are skipped as duplicates.
+        
+        Args:
+            user_id: User ID
+            rows: Parsed rows; {"line", "error"} rows are reported as skipped
+            batch_size: Rows per insert (default TRANSACTION_IMPORT_BATCH_SIZE)
+            payment_method: Used for rows that do not name one
+            income_category_id: Optional fallback category for income rows
+            expense_category_id: Optional fallback category for expense rows
+            
+        Yields:
+            {"processed", "imported", "duplicates", "skipped", "errors", "done"};
+            the last report has done=True
+            
+        Raises:
+            ValueError: If a fallback category is not available to the user or
+                is not of its type
+            RuntimeError: If a batch cannot be written (earlier batches stay imported)
+        """
+        batch_size = max(1, min(batch_size or TRANSACTION_IMPORT_BATCH_SIZE, TRANSACTION_IMPORT_MAX_BATCH_SIZE))
+        
+        fallbacks = {"income": income_category_id, "expense": expense_category_id}
+        found = Category.find_many_for_user([c for c in fallbacks.values() if c], user_id)
+        for type_, category_id in fallbacks.items():
+            if category_id and not found.get(str(category_id)):
+                raise ValueError(f"Fallback {type_} category not found or you don't have access to it")
+            if category_id and found[str(category_id)].get("type") != type_:
+                raise ValueError(f"Fallback {type_} category must be an {type_} category")
+        
+        # Category names resolved in memory: name -> {type: category row}
+        by_name: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for category in Category.category_map(user_id).values():
+            by_name.setdefault(str(category.get("name") or "").strip().lower(), {})[category.get("type")] = category
+        
+        progress = {"processed": 0, "imported": 0, "duplicates": 0, "skipped": 0, "errors": [], "done": False}
+        
+        def skip(line, message):
+            progress["skipped"] += 1
+            if len(progress["errors"]) < TRANSACTION_IMPORT_MAX_ERRORS:
+                progress["errors"].append({"line": line, "error": message})
+        
+        def prepare(row):
+            amount = Decimal(row["amount"])
+            title = (row.get("title") or "").strip()
+            if not title:
+                raise ValueError("Missing title")
+            if amount == 0:
+                raise ValueError("Amount must not be 0")
+            
+            sign_type = "expense" if amount < 0 else "income"
+            # Only a category of the amount's type: one of the other type
+            # would turn a debit into a credit or the reverse
+            named = by_name.get((row.get("category") or "").strip().lower(), {})
+            category = named.get(sign_type)
+            if category is None and fallbacks[sign_type]:
+                category = found[str(fallbacks[sign_type])]
+            if category is None:
+                raise ValueError(f"No {sign_type} category for {row.get('category') or 'uncategorized'}")
+            
+            return {
+                "title": title,
+                "amount": float(abs(amount)),
+                "payment_method": row.get("payment_method") or payment_method,
+                "category_id": category.get("id"),
+                "type": sign_type,
+                "description": row.get("description"),
+                "user_id": user_id,
+                "document_url": None,
+                "date": row["date"].isoformat() if row.get("date") else None
+            }
+        
+        def write(batch):
+            # Duplicates within the batch, then against what is stored
+            unique, seen = [], set()
+            for data in batch:
+                key = (data["date"], Decimal(str(data["amount"])).normalize(), data["title"].lower())
+                if key in seen:
+                    progress["duplicates"] += 1
+                    continue
+                seen.add(key)
+                unique.append(data)
+            
+            repository = get_transaction_repository()
+            try:
+                existing = set(repository.existing_imports(
+                    user_id,
+                    [{"date": d["date"], "amount": d["amount"], "title": d["title"]} for d in unique]
+                ))
+                new_rows = [d for position, d in enumerate(unique) if position not in existing]
+                records = repository.insert_transactions(new_rows) if new_rows else []
+            except Exception as e:
+                raise RuntimeError(f"Failed to import transactions: {str(e)}")
+            
+            progress["duplicates"] += len(existing)
+            progress["imported"] += len(records)
+            cls._apply_rollups(user_id, [_rollup_delta(record, 1) for record in records])
+            if records:
+                totals_cache.invalidate(user_id, {record.get("date") for record in records})
+                single_flight.forget(user_id)
+        
+        batch = []
+        for row in rows:
+            progress["processed"] += 1
+            if "error" in row:
+                skip(row.get("line"), row["error"])
+                continue
+            try:
+                batch.append(prepare(row))
+            except ValueError as e:
+                skip(row.get("line"), str(e))
+                continue
+            
+            if len(batch) >= batch_size:
+                write(batch)
+                batch = []
+                yield dict(progress, errors=list(progress["errors"]))
+        
+        if batch:
+            write(batch)
+        progress["done"] = True
+        yield progress
 
 
     #------------- Get financial totals ---------------- #
     @classmethod
+    @coalesce(scope=lambda a: a["user_id"])
     def get_totals(cls, user_id: str, start_date: Optional[date] = None, end_date: Optional[date] = None):
         """
         Returns totals per category, total income, total expense, and net balance.
         
+        The aggregation runs in the database (GROUP BY category and type), so
+        only one row per category crosses the wire. When rollups are enabled
+        and the window covers whole months, it is read from the monthly
+        rollups instead of the raw transactions. Results are cached per
+        user and window (see TotalsCache) and dropped by the write paths.
+        
         Args:
             user_id: User ID
             start_date: Optional start date for filtering
@@ -456,80 +851,83 @@ class Transaction:
         Returns:
             Dictionary with financial summary
         """
+        def compute():
+            repository = get_transaction_repository()
+            if TRANSACTION_ROLLUPS_ENABLED and _is_month_aligned(start_date, end_date):
+                rows = repository.aggregate_rollup_totals(user_id, start_date, end_date)
+            else:
+                rows = repository.aggregate_totals(user_id, start_date, end_date)
+            return cls.summarize_totals(rows)
+
         try:
-            query = (
-                supabase
-                .table("transactions")
-                .select("amount, type, category_id, categories(name, type, icon)")
-                .eq("user_id", user_id)
-            )
-            
-            # Add date filters if provided
-            if start_date:
-                query = query.gte("date", start_date.isoformat())
-            if end_date:
-                query = query.lte("date", end_date.isoformat())
-            
-            res = query.execute()
-            transactions = res.data or []
+            return totals_cache.get_or_compute(user_id, start_date, end_date, compute)
+        except Exception as e:
+            raise RuntimeError(f"Failed to get totals: {str(e)}")
 
-            totals_per_category = {}
-            total_income = 0.0
-            total_expense = 0.0
+
+    @staticmethod
+    def summarize_totals(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build the totals response from per-(category, type) aggregate rows.
+        
+        Args:
+            rows: Rows with category_name, category_icon, tx_type, total and tx_count
             
-            # Also track by type for summary
-            income_by_category = {}
-            expense_by_category = {}
+        Returns:
+            Dictionary with financial summary
+        """
+        totals_per_category = {}
+        total_income = 0.0
+        total_expense = 0.0
+        transaction_count = 0
+        
+        # Also track by type for summary
+        income_by_category = {}
+        expense_by_category = {}
 
-            for tx in transactions:
-                if not isinstance(tx, dict):
-                    continue
-                
-                # Get category info
-                cat = tx.get("categories")
-                cat_name = cat.get("name", "Unknown") if isinstance(cat, dict) else "Unknown"
-                
-                # Get amount
-                amt = tx.get("amount", 0)
-                amount = float(amt) if isinstance(amt, (int, float)) else 0.0
-                
-                # Get type
-                tx_type = tx.get("type")
-                
-                # Add to category totals
-                if cat_name not in totals_per_category:
-                    totals_per_category[cat_name] = {
-                        "total": 0.0,
-                        "type": tx_type,
-                        "icon": cat.get("icon") if isinstance(cat, dict) else None
-                    }
-                totals_per_category[cat_name]["total"] += amount
-                
-                # Add to income/expense totals
-                if tx_type == "income":
-                    total_income += amount
-                    income_by_category[cat_name] = income_by_category.get(cat_name, 0.0) + amount
-                else:
-                    total_expense += amount
-                    expense_by_category[cat_name] = expense_by_category.get(cat_name, 0.0) + amount
+        for row in rows:
+            cat_name = row.get("category_name") or "Unknown"
+            tx_type = row.get("tx_type")
+            
+            try:
+                amount = float(row.get("total") or 0)
+            except (TypeError, ValueError):
+                amount = 0.0
+            transaction_count += int(row.get("tx_count") or 0)
+            
+            # Add to category totals
+            if cat_name not in totals_per_category:
+                totals_per_category[cat_name] = {
+                    "total": 0.0,
+                    "type": tx_type,
+                    "icon": row.get("category_icon")
+                }
+            totals_per_category[cat_name]["total"] += amount
+            
+            # Add to income/expense totals
+            if tx_type == "income":
+                total_income += amount
+                income_by_category[cat_name] = income_by_category.get(cat_name, 0.0) + amount
+            else:
+                total_expense += amount
+                expense_by_category[cat_name] = expense_by_category.get(cat_name, 0.0) + amount
 
-            net_balance = total_income - total_expense
+        net_balance = total_income - total_expense
 
-            return {
-                "totals_per_category": totals_per_category,
-                "income_by_category": income_by_category,
-                "expense_by_category": expense_by_category,
-                "total_income": round(total_income, 2),
-                "total_expense": round(total_expense, 2),
-                "net_balance": round(net_balance, 2),
-                "transaction_count": len(transactions)
-            }
-        except Exception as e:
-            raise RuntimeError(f"Failed to get totals: {str(e)}")
+        return {
+            "totals_per_category": totals_per_category,
+            "income_by_category": income_by_category,
+            "expense_by_category": expense_by_category,
+            "total_income": round(total_income, 2),
+            "total_expense": round(total_expense, 2),
+            "net_balance": round(net_balance, 2),
+            "transaction_count": transaction_count
+        }
 
 
     #------------- Get monthly summary ---------------- #
     @classmethod
+    @coalesce(scope=lambda a: a["user_id"])
     def get_monthly_summary(cls, user_id: str, year: int, month: int):
         """
         Get financial summary for a specific month.
@@ -542,8 +940,6 @@ class Transaction:
         Returns:
             Dictionary with monthly summary
         """
-        from calendar import monthrange
-        
         # Get first and last day of the month
         start_date = date(year, month, 1)
         last_day = monthrange(year, month)[1]
@@ -552,6 +948,57 @@ class Transaction:
         return cls.get_totals(user_id, start_date, end_date)
 
 
+    #------------- Rollup maintenance ---------------- #
+    @classmethod
+    def _apply_rollups(cls, user_id: str, deltas: List[Dict[str, Any]]):
+        """
+        Apply rollup deltas after a successful write.
+        
+        A failure here does not undo the write; `flask rollups verify` finds
+        the drift and `flask rollups rebuild` repairs it.
+        """
+        if not TRANSACTION_ROLLUPS_ENABLED or not deltas:
+            return
+        try:
+            get_transaction_repository().apply_rollup_deltas(user_id, deltas)
+        except Exception as e:
+            logger.warning("Failed to update transaction rollups for user %s: %s", user_id, e)
+
+
+    @classmethod
+    def rebuild_rollups(cls, user_id: Optional[str] = None) -> int:
+        """
+        Recompute rollups from raw transactions (e.g. after a backfill).
+        
+        Args:
+            user_id: Only rebuild this user's rollups (default: everyone)
+            
+        Returns:
+            Number of rollup buckets written
+        """
+        try:
+            return get_transaction_repository().rebuild_rollups(user_id)
+        except Exception as e:
+            raise RuntimeError(f"Failed to rebuild rollups: {str(e)}")
+
+
+    @classmethod
+    def verify_rollups(cls, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Compare rollups against raw transactions.
+        
+        Args:
+            user_id: Only check this user's rollups (default: everyone)
+            
+        Returns:
+            Mismatching buckets (empty when the rollups are consistent)
+        """
+        try:
+            return get_transaction_repository().verify_rollups(user_id)
+        except Exception as e:
+            raise RuntimeError(f"Failed to verify rollups: {str(e)}")
+
+
     def __repr__(self):
         """String representation for debugging."""
         return (
@@ -0,0 +1,194 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.repositories.transaction_query import TransactionQuery
+
+
+class TransactionRepository:
+    """
+    Data-access interface for the transactions table.
+
+    Rows are plain dicts shaped like PostgREST responses: joined category data
+    is nested under a "categories" key.
+    """
+
+    def insert_transaction(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Insert a transaction and return the stored row."""
+        raise NotImplementedError
+
+    def update_transaction(self, transaction_id: str, user_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a user's transaction. Returns None if no row matched."""
+        raise NotImplementedError
+
+    def insert_transactions(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert many transactions in one statement and return the stored rows in input order."""
+        raise NotImplementedError
+
+    def update_transactions(self, user_id: str, updates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Apply many partial updates ({"id", ...columns}) to a user's transactions at once.
+
+        Returns {id, previous, updated} for each row that matched; rows the
+        user does not own are skipped.
+        """
+        raise NotImplementedError
+
+    def existing_imports(self, user_id: str, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Positions of the {date, amount, title} rows the user already has a
+        transaction for, matched on sql/005_transaction_import_hash.sql.
+        """
+        raise NotImplementedError
+
+    def list_transactions(self, query: TransactionQuery) -> List[Dict[str, Any]]:
+        """
+        Transactions with category info matching a query, in its order.
+
+        Every matching row is returned up to `query.limit`, however many
+        that is; backends with a per-response row cap read it in ranges.
+        """
+        raise NotImplementedError
+
+    def get_transaction(
+        self,
+        transaction_id: str,
+        user_id: str,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        A single transaction with category info, or None.
+
+        `fields` limits the columns read (see TRANSACTION_FIELDS); category
+        info is only joined when "category" is among them.
+        """
+        raise NotImplementedError
+
+    def delete_transaction(self, transaction_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Delete a user's transaction and return it, or None if no row matched."""
+        raise NotImplementedError
+
+    def delete_transactions(self, user_id: str, transaction_ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """Delete some of a user's transactions and return the rows deleted."""
+        raise NotImplementedError
+
+    def delete_transactions_batch(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Delete up to `limit` of a user's transactions.
+
+        Returns the deleted amounts per rollup bucket as negative
+        {year, month, category_id, type, amount, count} deltas, not the rows;
+        an empty list means the user has no transactions left.
+        """
+        raise NotImplementedError
+
+    def aggregate_totals(
+        self,
+        user_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Sum and count of amounts per (category, type) computed in the database.
+
+        Rows carry category_id, category_name, category_type, category_icon,
+        tx_type, total and tx_count.
+        """
+        raise NotImplementedError
+
+    def aggregate_rollup_totals(
+        self,
+        user_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """Same rows as aggregate_totals, read from the monthly rollups of the months spanned."""
+        raise NotImplementedError
+
+    def apply_rollup_deltas(self, user_id: str, deltas: List[Dict[str, Any]]):
+        """Add {year, month, category_id, type, amount, count} deltas to the rollups."""
+        raise NotImplementedError
+
+    def delete_rollups(self, user_id: str):
+        """Remove every rollup bucket for a user."""
+        raise NotImplementedError
+
+    def rebuild_rollups(self, user_id: Optional[str] = None) -> int:
+        """Recompute rollups from raw transactions. Returns the number of buckets written."""
+        raise NotImplementedError
+
+    def verify_rollups(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Buckets where the rollups disagree with the raw transactions."""
+        raise NotImplementedError
+
+
+class CategoryRepository:
+    """Data-access interface for the categories table."""
+
+    def insert_category(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def get_category(self, id: str) -> Optional[Dict[str, Any]]:
+        """A category by ID regardless of owner, or None."""
+        raise NotImplementedError
+
+    def get_category_for_user(
+        self,
+        id: str,
+        user_id: str,
+        fields: Optional[Sequence[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """A category the user can use (their own or a default one), or None."""
+        raise NotImplementedError
+
+    def list_categories(self, user_id: str, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """The user's own categories plus the default ones, limited to `fields` if given."""
+        raise NotImplementedError
+
+    def list_categories_by_ids(self, user_id: str, ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """The categories among `ids` the user can use (their own or default ones)."""
+        raise NotImplementedError
+
+    def list_default_categories(self) -> List[Dict[str, Any]]:
+        """The default categories shared by every user (user_id is null)."""
+        raise NotImplementedError
+
+    def list_user_categories(self, user_id: str) -> List[Dict[str, Any]]:
+        """Only the user's own categories."""
+        raise NotImplementedError
+
+    def update_category(self, id: str, user_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def delete_category(self, id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def count_category_transactions(self, id: str) -> int:
+        """Number of transactions referencing a category."""
+        raise NotImplementedError
+
+
+class JobRepository:
+    """Data-access interface for the jobs table (sql/007_jobs.sql)."""
+
+    def insert_job(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def update_job(self, job_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a job, bumping updated_at, and return the stored row."""
+        raise NotImplementedError
+
+    def get_job(self, job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """A user's job, or None."""
+        raise NotImplementedError
+
+    def list_jobs(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        """A user's most recent jobs, newest first."""
+        raise NotImplementedError
+
+    def count_active_jobs(self, user_id: str, updated_since: str) -> int:
+        """Queued or running jobs of a user written to since `updated_since` (ISO timestamp)."""
+        raise NotImplementedError
+
+    def request_job_cancel(self, job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Flag a user's queued or running job for cancellation; None if there is no such job."""
+        raise NotImplementedError
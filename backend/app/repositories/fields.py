@@ -0,0 +1,19 @@
+from typing import Optional, Sequence
+
+# Fields clients may ask for with ?fields=. For transactions, "category" is the
+# joined category (id, name, type, icon); leaving it out skips the join.
+TRANSACTION_FIELDS = (
+    "id", "title", "amount", "payment_method", "category_id", "type",
+    "description", "document_url", "date", "created_at", "category"
+)
+CATEGORY_FIELDS = ("id", "name", "type", "icon", "user_id")
+
+# Always read for listings, since keyset cursors are built from them
+TRANSACTION_SORT_FIELDS = ("date", "created_at", "id")
+
+
+def field_mask(fields: Optional[Sequence[str]], allowed: Sequence[str]) -> str:
+    """Short stable tag for a projection, used in prepared statement names."""
+    if fields is None:
+        return "all"
+    return format(sum(1 << allowed.index(f) for f in fields), "x")
@@ -0,0 +1,84 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# PostgREST's max-rows; no single response holds more rows than this
+POSTGREST_MAX_ROWS = int(os.getenv("POSTGREST_MAX_ROWS", "1000"))
+
+# Threads fetching the next page while the current one is consumed (0 disables prefetching)
+PAGE_PREFETCH_WORKERS = int(os.getenv("PAGE_PREFETCH_WORKERS", "4"))
+
+Rows = List[Dict[str, Any]]
+# (first, last) row positions, inclusive -> those rows
+RangeFetcher = Callable[[int, int], Rows]
+
+_executor = ThreadPoolExecutor(max_workers=PAGE_PREFETCH_WORKERS, thread_name_prefix="page-prefetch") if PAGE_PREFETCH_WORKERS > 0 else None
+
+
+def _fetch(fetch_range: RangeFetcher, start: int, end: int, prefetch: bool) -> "Future[Rows]":
+    if prefetch and _executor is not None:
+        return _executor.submit(fetch_range, start, end)
+    future: "Future[Rows]" = Future()
+    try:
+        future.set_result(fetch_range(start, end))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def iter_ranges(
+    fetch_range: RangeFetcher,
+    page_size: int = POSTGREST_MAX_ROWS,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    prefetch: bool = True
+) -> Iterator[Rows]:
+    """
+    Yield a result set page by page, fetching each page by row range.
+
+    Since a page's range does not depend on the previous page's rows, the
+    next page is requested in the background as soon as the current one
+    arrives, so the caller's work on one page overlaps the round trip for
+    the next. Iteration stops at the first short page or once `limit` rows
+    have been yielded. `fetch_range` must read a stably ordered result,
+    and runs on a worker thread when prefetching, so it must not depend on
+    request-local state.
+    """
+    page_size = min(page_size, limit) if limit else page_size
+    remaining = limit
+
+    def range_at(start):
+        size = min(page_size, remaining) if remaining is not None else page_size
+        return start, start + size - 1
+
+    start, end = range_at(offset)
+    pending = _fetch(fetch_range, start, end, prefetch=False)
+
+    while True:
+        rows = pending.result()
+        full = len(rows) >= end - start + 1
+        if remaining is not None:
+            remaining -= len(rows)
+        more = full and (remaining is None or remaining > 0)
+
+        if more:
+            # Start on the next page before handing this one over
+            start, end = range_at(end + 1)
+            pending = _fetch(fetch_range, start, end, prefetch)
+        if rows:
+            yield rows
+        if not more:
+            return
+
+
+def fetch_all(
+    fetch_range: RangeFetcher,
+    page_size: int = POSTGREST_MAX_ROWS,
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> Rows:
+    """Every row of a result set (up to `limit`), read with iter_ranges."""
+    rows: Rows = []
+    for page in iter_ranges(fetch_range, page_size, limit, offset):
+        rows.extend(page)
+    return rows
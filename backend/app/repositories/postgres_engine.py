@@ -0,0 +1,114 @@
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from uuid import UUID
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """Connection that remembers which statements it has already prepared."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+def normalize_value(value: Any) -> Any:
+    """Convert driver types to the JSON-friendly values PostgREST would return."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _rows(cursor) -> List[Dict[str, Any]]:
+    if cursor.description is None:
+        return []
+    columns = [d.name for d in cursor.description]
+    return [
+        {col: normalize_value(val) for col, val in zip(columns, row)}
+        for row in cursor.fetchall()
+    ]
+
+
+class PostgresEngine:
+    """
+    Pooled direct connection to Postgres.
+
+    Hot queries are registered once with `register()` and run as server-side
+    prepared statements: each pooled connection prepares a statement the first
+    time it runs it and reuses the plan afterwards.
+    """
+
+    def __init__(self, dsn: str, min_connections: int = 1, max_connections: int = 10):
+        self._pool = ThreadedConnectionPool(
+            min_connections,
+            max_connections,
+            dsn,
+            connection_factory=PreparingConnection
+        )
+        self._statements: Dict[str, str] = {}
+
+    def register(self, name: str, sql: str):
+        """Register a statement using $1, $2, ... placeholders."""
+        self._statements[name] = sql
+
+    @property
+    def statements(self) -> Dict[str, str]:
+        return self._statements
+
+    @contextmanager
+    def connection(self) -> Iterator[PreparingConnection]:
+        """Borrow a connection; commits on success and rolls back on error."""
+        conn = self._pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self._pool.putconn(conn, close=bool(conn.closed))
+
+    def _execute_prepared(self, conn: PreparingConnection, name: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+        with conn.cursor() as cur:
+            if name not in conn.prepared:
+                cur.execute(f"PREPARE {name} AS {self._statements[name]}")
+                conn.prepared.add(name)
+
+            if params:
+                placeholders = ", ".join(["%s"] * len(params))
+                cur.execute(f"EXECUTE {name} ({placeholders})", tuple(params))
+            else:
+                cur.execute(f"EXECUTE {name}")
+            return _rows(cur)
+
+    def fetch_prepared(self, name: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        """Run a registered statement and return its rows as dicts."""
+        with self.connection() as conn:
+            try:
+                return self._execute_prepared(conn, name, params)
+            except psycopg2.errors.InvalidSqlStatementName:
+                # The session lost its prepared statements (e.g. DISCARD ALL); prepare again
+                conn.rollback()
+                conn.prepared.discard(name)
+                return self._execute_prepared(conn, name, params)
+
+    def fetch(self, sql: str, params: Optional[Sequence[Any]] = None) -> List[Dict[str, Any]]:
+        """Run an ad-hoc statement using %s placeholders and return its rows."""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                return _rows(cur)
+
+    def close(self):
+        self._pool.closeall()
@@ -0,0 +1,413 @@
+import json
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.repositories.base import CategoryRepository, JobRepository, TransactionRepository
+from app.repositories.fields import CATEGORY_FIELDS, TRANSACTION_FIELDS, TRANSACTION_SORT_FIELDS, field_mask
+from app.repositories.postgres_engine import PostgresEngine
+from app.repositories.transaction_query import TransactionQuery
+
+TRANSACTION_COLUMNS = (
+    "id", "title", "amount", "payment_method", "category_id", "type",
+    "description", "user_id", "created_at", "document_url", "date"
+)
+CATEGORY_COLUMNS = ("id", "name", "type", "icon", "user_id")
+
+# Writable columns; anything else in an insert/update is rejected
+TRANSACTION_WRITE_COLUMNS = set(TRANSACTION_COLUMNS) - {"id", "created_at"}
+CATEGORY_WRITE_COLUMNS = {"name", "type", "icon", "user_id"}
+JOB_WRITE_COLUMNS = {
+    "id", "user_id", "kind", "status", "progress", "result", "error",
+    "cancel_requested", "started_at", "finished_at"
+}
+# Passed as JSON text and cast
+JOB_JSON_COLUMNS = {"progress", "result"}
+
+_CATEGORY_JOIN_SELECT = (
+    "c.id AS category__id, c.name AS category__name,"
+    " c.type AS category__type, c.icon AS category__icon"
+)
+_TRANSACTION_SELECT = ", ".join(f"t.{col}" for col in TRANSACTION_COLUMNS) + ", " + _CATEGORY_JOIN_SELECT
+_TRANSACTION_FROM = "transactions t LEFT JOIN categories c ON c.id = t.category_id"
+
+# Listing order: date (undated rows sort as the oldest), then created_at, then
+# id. Expressed as a single sort key so keyset pages are an index range scan
+# (see sql/003_transaction_keyset_index.sql).
+_SORT_KEY = "(COALESCE(t.date, '-infinity'::date), t.created_at, t.id)"
+
+# TransactionQuery field -> condition; only the fields that are set make it
+# into a statement, so each filter combination gets its own prepared plan
+_LIST_FILTERS = (
+    ("start_date", "t.date >= {}::date"),
+    ("end_date", "t.date <= {}::date"),
+    ("type_", "t.type::text = {}::text"),
+    ("category_id", "t.category_id = {}::uuid"),
+    ("payment_method", "t.payment_method::text = {}::text"),
+    ("min_amount", "t.amount >= {}::numeric"),
+    ("max_amount", "t.amount <= {}::numeric"),
+)
+
+STATEMENTS = {
+    "spendmate_get_transaction": f"""
+        SELECT {_TRANSACTION_SELECT}
+        FROM transactions t
+        LEFT JOIN categories c ON c.id = t.category_id
+        WHERE t.id = $1::uuid AND t.user_id = $2::uuid
+    """,
+    "spendmate_aggregate_totals": """
+        SELECT t.category_id,
+               c.name::text AS category_name, c.type::text AS category_type, c.icon::text AS category_icon,
+               t.type::text AS tx_type, sum(t.amount) AS total, count(*) AS tx_count
+        FROM transactions t
+        LEFT JOIN categories c ON c.id = t.category_id
+        WHERE t.user_id = $1::uuid
+          AND ($2::date IS NULL OR t.date >= $2::date)
+          AND ($3::date IS NULL OR t.date <= $3::date)
+        GROUP BY t.category_id, c.name, c.type, c.icon, t.type
+    """,
+    "spendmate_rollup_totals": """
+        SELECT * FROM transaction_rollup_totals($1::uuid, $2::date, $3::date)
+    """,
+}
+
+# Category reads; the column list is filled in per projection
+_CATEGORY_STATEMENTS = {
+    "spendmate_list_categories": """
+        SELECT {columns}
+        FROM categories
+        WHERE user_id = $1::uuid OR user_id IS NULL
+    """,
+    "spendmate_get_category_for_user": """
+        SELECT {columns}
+        FROM categories
+        WHERE id = $1::uuid AND (user_id = $2::uuid OR user_id IS NULL)
+    """,
+    "spendmate_list_default_categories": """
+        SELECT {columns}
+        FROM categories
+        WHERE user_id IS NULL
+    """,
+    "spendmate_list_user_categories": """
+        SELECT {columns}
+        FROM categories
+        WHERE user_id = $1::uuid
+    """,
+}
+STATEMENTS.update({
+    name: sql.format(columns=", ".join(CATEGORY_COLUMNS))
+    for name, sql in _CATEGORY_STATEMENTS.items()
+})
+
+
+def nest_category(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Move category__* columns under a "categories" key, like a PostgREST embed."""
+    category = {}
+    for key in [k for k in row if k.startswith("category__")]:
+        category[key[len("category__"):]] = row.pop(key)
+
+    if category:
+        has_data = any(v is not None for v in category.values())
+        row["categories"] = category if has_data else None
+    return row
+
+
+def _checked_columns(data: Dict[str, Any], allowed: set) -> List[str]:
+    unknown = set(data) - allowed
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+    return list(data)
+
+
+def _first(rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    return rows[0] if rows else None
+
+
+def _iso(value: Optional[date]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class PostgresTransactionRepository(TransactionRepository):
+    """Transactions over a pooled direct connection, skipping the PostgREST hop."""
+
+    def __init__(self, engine: PostgresEngine):
+        self.engine = engine
+
+    def insert_transaction(self, data):
+        columns = _checked_columns(data, TRANSACTION_WRITE_COLUMNS)
+        sql = (
+            f"INSERT INTO transactions ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))}) RETURNING *"
+        )
+        return _first(self.engine.fetch(sql, [data[c] for c in columns]))
+
+    def insert_transactions(self, rows):
+        if not rows:
+            return []
+        columns: List[str] = []
+        for row in rows:
+            columns += [c for c in _checked_columns(row, TRANSACTION_WRITE_COLUMNS) if c not in columns]
+
+        # One multi-row VALUES list; Postgres returns the rows in the same order
+        values = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(rows))
+        sql = f"INSERT INTO transactions ({', '.join(columns)}) VALUES {values} RETURNING *"
+        return self.engine.fetch(sql, [row.get(c) for row in rows for c in columns])
+
+    def update_transactions(self, user_id, updates):
+        if not updates:
+            return []
+        for update in updates:
+            _checked_columns(update, TRANSACTION_WRITE_COLUMNS | {"id"})
+        # See sql/004_batch_transaction_updates.sql
+        return self.engine.fetch(
+            "SELECT * FROM batch_update_transactions(%s, %s::jsonb)",
+            (user_id, json.dumps(updates, default=str))
+        )
+
+    def existing_imports(self, user_id, rows):
+        if not rows:
+            return []
+        # See sql/005_transaction_import_hash.sql
+        found = self.engine.fetch(
+            "SELECT position FROM existing_transaction_imports(%s, %s::jsonb) AS position",
+            (user_id, json.dumps(rows, default=str))
+        )
+        return [int(row["position"]) for row in found]
+
+    def update_transaction(self, transaction_id, user_id, updates):
+        columns = _checked_columns(updates, TRANSACTION_WRITE_COLUMNS)
+        assignments = ", ".join(f"{c} = %s" for c in columns)
+        sql = f"UPDATE transactions SET {assignments} WHERE id = %s AND user_id = %s RETURNING *"
+        return _first(self.engine.fetch(sql, [updates[c] for c in columns] + [transaction_id, user_id]))
+
+    def list_transactions(self, query: TransactionQuery):
+        name, sql, params = build_list_statement(query)
+        if name not in self.engine.statements:
+            self.engine.register(name, sql)
+        rows = self.engine.fetch_prepared(name, params)
+        return [nest_category(row) for row in rows]
+
+    def get_transaction(self, transaction_id, user_id, fields=None):
+        if fields is None:
+            name = "spendmate_get_transaction"
+        else:
+            name = f"spendmate_get_transaction_{field_mask(fields, TRANSACTION_FIELDS)}"
+            if name not in self.engine.statements:
+                select, from_ = _transaction_projection(fields)
+                self.engine.register(name, f"SELECT {select} FROM {from_} WHERE t.id = $1::uuid AND t.user_id = $2::uuid")
+
+        rows = self.engine.fetch_prepared(name, (transaction_id, user_id))
+        return _first([nest_category(row) for row in rows])
+
+    def delete_transaction(self, transaction_id, user_id):
+        sql = "DELETE FROM transactions WHERE id = %s AND user_id = %s RETURNING *"
+        return _first(self.engine.fetch(sql, (transaction_id, user_id)))
+
+    def delete_transactions(self, user_id, transaction_ids):
+        if not transaction_ids:
+            return []
+        sql = "DELETE FROM transactions WHERE user_id = %s AND id = ANY(%s::uuid[]) RETURNING *"
+        return self.engine.fetch(sql, (user_id, list(transaction_ids)))
+
+    def delete_transactions_batch(self, user_id, limit):
+        # See sql/006_delete_transactions_batch.sql
+        return self.engine.fetch("SELECT * FROM delete_transactions_batch(%s, %s)", (user_id, limit))
+
+    def aggregate_totals(self, user_id, start_date=None, end_date=None):
+        return self.engine.fetch_prepared(
+            "spendmate_aggregate_totals",
+            (user_id, _iso(start_date), _iso(end_date))
+        )
+
+    # Rollup functions are defined in sql/002_transaction_rollups.sql
+    def aggregate_rollup_totals(self, user_id, start_date=None, end_date=None):
+        return self.engine.fetch_prepared(
+            "spendmate_rollup_totals",
+            (user_id, _iso(start_date), _iso(end_date))
+        )
+
+    def apply_rollup_deltas(self, user_id, deltas):
+        self.engine.fetch(
+            "SELECT apply_transaction_rollup_deltas(%s, %s::jsonb)",
+            (user_id, json.dumps(deltas))
+        )
+
+    def delete_rollups(self, user_id):
+        self.engine.fetch("DELETE FROM transaction_rollups WHERE user_id = %s", (user_id,))
+
+    def rebuild_rollups(self, user_id=None):
+        rows = self.engine.fetch("SELECT rebuild_transaction_rollups(%s) AS written", (user_id,))
+        return int(rows[0]["written"]) if rows else 0
+
+    def verify_rollups(self, user_id=None):
+        return self.engine.fetch("SELECT * FROM verify_transaction_rollups(%s)", (user_id,))
+
+
+class PostgresCategoryRepository(CategoryRepository):
+    """Categories over a pooled direct connection."""
+
+    def __init__(self, engine: PostgresEngine):
+        self.engine = engine
+
+    def insert_category(self, data):
+        columns = _checked_columns(data, CATEGORY_WRITE_COLUMNS)
+        sql = (
+            f"INSERT INTO categories ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))}) RETURNING *"
+        )
+        return _first(self.engine.fetch(sql, [data[c] for c in columns]))
+
+    def get_category(self, id):
+        return _first(self.engine.fetch("SELECT * FROM categories WHERE id = %s", (id,)))
+
+    def get_category_for_user(self, id, user_id, fields=None):
+        name = self._projected("spendmate_get_category_for_user", fields)
+        return _first(self.engine.fetch_prepared(name, (id, user_id)))
+
+    def list_categories(self, user_id, fields=None):
+        name = self._projected("spendmate_list_categories", fields)
+        return self.engine.fetch_prepared(name, (user_id,))
+
+    def list_categories_by_ids(self, user_id, ids):
+        if not ids:
+            return []
+        sql = "SELECT * FROM categories WHERE id = ANY(%s::uuid[]) AND (user_id = %s OR user_id IS NULL)"
+        return self.engine.fetch(sql, (list(ids), user_id))
+
+    def list_default_categories(self):
+        return self.engine.fetch_prepared("spendmate_list_default_categories")
+
+    def list_user_categories(self, user_id):
+        return self.engine.fetch_prepared("spendmate_list_user_categories", (user_id,))
+
+    def _projected(self, name: str, fields: Optional[Sequence[str]]) -> str:
+        """Name of a registered category statement narrowed to `fields`, registering it if needed."""
+        if fields is None:
+            return name
+
+        projected = f"{name}_{field_mask(fields, CATEGORY_FIELDS)}"
+        if projected not in self.engine.statements:
+            self.engine.register(projected, _CATEGORY_STATEMENTS[name].format(columns=", ".join(fields)))
+        return projected
+
+    def update_category(self, id, user_id, updates):
+        columns = _checked_columns(updates, CATEGORY_WRITE_COLUMNS)
+        assignments = ", ".join(f"{c} = %s" for c in columns)
+        sql = f"UPDATE categories SET {assignments} WHERE id = %s AND user_id = %s RETURNING *"
+        return _first(self.engine.fetch(sql, [updates[c] for c in columns] + [id, user_id]))
+
+    def delete_category(self, id, user_id):
+        sql = "DELETE FROM categories WHERE id = %s AND user_id = %s RETURNING *"
+        return _first(self.engine.fetch(sql, (id, user_id)))
+
+    def count_category_transactions(self, id):
+        rows = self.engine.fetch("SELECT count(*) AS count FROM transactions WHERE category_id = %s", (id,))
+        return int(rows[0]["count"]) if rows else 0
+
+
+class PostgresJobRepository(JobRepository):
+    """Jobs over a pooled direct connection."""
+
+    def __init__(self, engine: PostgresEngine):
+        self.engine = engine
+
+    @staticmethod
+    def _values(data: Dict[str, Any], columns: List[str]) -> Tuple[List[str], List[Any]]:
+        placeholders = ["%s::jsonb" if c in JOB_JSON_COLUMNS else "%s" for c in columns]
+        values = [json.dumps(data[c]) if c in JOB_JSON_COLUMNS else data[c] for c in columns]
+        return placeholders, values
+
+    def insert_job(self, data):
+        columns = _checked_columns(data, JOB_WRITE_COLUMNS)
+        placeholders, values = self._values(data, columns)
+        sql = f"INSERT INTO jobs ({', '.join(columns)}) VALUES ({', '.join(placeholders)}) RETURNING *"
+        return _first(self.engine.fetch(sql, values))
+
+    def update_job(self, job_id, updates):
+        columns = _checked_columns(updates, JOB_WRITE_COLUMNS)
+        placeholders, values = self._values(updates, columns)
+        assignments = ", ".join(f"{c} = {p}" for c, p in zip(columns, placeholders))
+        sql = f"UPDATE jobs SET {assignments}, updated_at = now() WHERE id = %s RETURNING *"
+        return _first(self.engine.fetch(sql, values + [job_id]))
+
+    def get_job(self, job_id, user_id):
+        return _first(self.engine.fetch("SELECT * FROM jobs WHERE id = %s AND user_id = %s", (job_id, user_id)))
+
+    def list_jobs(self, user_id, limit):
+        sql = "SELECT * FROM jobs WHERE user_id = %s ORDER BY created_at DESC LIMIT %s"
+        return self.engine.fetch(sql, (user_id, limit))
+
+    def count_active_jobs(self, user_id, updated_since):
+        sql = (
+            "SELECT count(*) AS count FROM jobs "
+            "WHERE user_id = %s AND status IN ('queued', 'running') AND updated_at >= %s"
+        )
+        rows = self.engine.fetch(sql, (user_id, updated_since))
+        return int(rows[0]["count"]) if rows else 0
+
+    def request_job_cancel(self, job_id, user_id):
+        sql = (
+            "UPDATE jobs SET cancel_requested = true, updated_at = now() "
+            "WHERE id = %s AND user_id = %s AND status IN ('queued', 'running') RETURNING *"
+        )
+        return _first(self.engine.fetch(sql, (job_id, user_id)))
+
+
+def _transaction_projection(fields: Optional[Sequence[str]], include: Sequence[str] = ()) -> Tuple[str, str]:
+    """SELECT list and FROM clause for the requested fields; joins categories only when asked for."""
+    if fields is None:
+        return _TRANSACTION_SELECT, _TRANSACTION_FROM
+
+    columns = [f for f in fields if f != "category"]
+    columns += [f for f in include if f not in columns]
+    select = ", ".join(f"t.{col}" for col in columns)
+    if "category" in fields:
+        return f"{select}, {_CATEGORY_JOIN_SELECT}", _TRANSACTION_FROM
+    return select, "transactions t"
+
+
+def build_list_statement(query: TransactionQuery) -> Tuple[str, str, List[Any]]:
+    """The statement name, SQL and parameters listing transactions for a query."""
+    params: List[Any] = [query.user_id]
+    conditions = ["t.user_id = $1::uuid"]
+    # Bitmask of the parts in use; Postgres truncates names past 63 characters
+    shape = 0
+
+    for bit, (field, condition) in enumerate(_LIST_FILTERS):
+        value = getattr(query, field)
+        if value is None or value == "":
+            continue
+        params.append(_iso(value) if isinstance(value, date) else value)
+        conditions.append(condition.format(f"${len(params)}"))
+        shape |= 1 << bit
+
+    direction = "DESC" if query.descending else "ASC"
+    if query.after:
+        after = query.after
+        params.extend([after["date"] or "-infinity", after["created_at"], after["id"]])
+        n = len(params)
+        comparison = "<" if query.descending else ">"
+        conditions.append(f"{_SORT_KEY} {comparison} (${n - 2}::date, ${n - 1}::timestamptz, ${n}::uuid)")
+        shape |= 1 << len(_LIST_FILTERS)
+
+    select, from_ = _transaction_projection(query.fields, TRANSACTION_SORT_FIELDS)
+    sql = (
+        f"SELECT {select} FROM {from_} "
+        f"WHERE {' AND '.join(conditions)} "
+        f"ORDER BY COALESCE(t.date, '-infinity'::date) {direction}, "
+        f"t.created_at {direction}, t.id {direction}"
+    )
+    if query.limit:
+        params.append(query.limit)
+        sql += f" LIMIT ${len(params)}::bigint"
+        shape |= 1 << (len(_LIST_FILTERS) + 1)
+
+    name = (
+        f"spendmate_list_transactions_{shape:x}_{direction.lower()}"
+        f"_{field_mask(query.fields, TRANSACTION_FIELDS)}"
+    )
+    return name, sql, params
+
+
+def register_statements(engine: PostgresEngine):
+    for name, sql in STATEMENTS.items():
+        engine.register(name, sql)
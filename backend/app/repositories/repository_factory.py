@@ -0,0 +1,84 @@
+import os
+import threading
+from typing import Optional
+
+from app.repositories.base import CategoryRepository, JobRepository, TransactionRepository
+
+# "supabase" goes through PostgREST, "postgres" talks to the database directly
+DATA_BACKEND = os.getenv("DATA_BACKEND", "supabase").strip().lower()
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_POOL_MIN = int(os.getenv("DATABASE_POOL_MIN", "1"))
+DATABASE_POOL_MAX = int(os.getenv("DATABASE_POOL_MAX", "10"))
+
+_lock = threading.Lock()
+_transaction_repository: Optional[TransactionRepository] = None
+_category_repository: Optional[CategoryRepository] = None
+_job_repository: Optional[JobRepository] = None
+
+
+def _build_repositories():
+    global _transaction_repository, _category_repository, _job_repository
+
+    if DATA_BACKEND == "postgres":
+        if not DATABASE_URL:
+            raise ValueError("DATABASE_URL environment variable must be set when DATA_BACKEND=postgres")
+
+        # Imported lazily so psycopg2 is only needed when this backend is used
+        from app.repositories.postgres_engine import PostgresEngine
+        from app.repositories.postgres_repository import (
+            PostgresCategoryRepository,
+            PostgresJobRepository,
+            PostgresTransactionRepository,
+            register_statements,
+        )
+
+        engine = PostgresEngine(DATABASE_URL, DATABASE_POOL_MIN, DATABASE_POOL_MAX)
+        register_statements(engine)
+        _transaction_repository = PostgresTransactionRepository(engine)
+        _category_repository = PostgresCategoryRepository(engine)
+        _job_repository = PostgresJobRepository(engine)
+
+    elif DATA_BACKEND == "supabase":
+        from app.repositories.supabase_repository import (
+            SupabaseCategoryRepository,
+            SupabaseJobRepository,
+            SupabaseTransactionRepository,
+        )
+
+        _transaction_repository = SupabaseTransactionRepository()
+        _category_repository = SupabaseCategoryRepository()
+        _job_repository = SupabaseJobRepository()
+
+    else:
+        raise ValueError(f"Unknown DATA_BACKEND '{DATA_BACKEND}'; expected 'supabase' or 'postgres'")
+
+
+def get_transaction_repository() -> TransactionRepository:
+    """The configured transactions data-access backend."""
+    if _transaction_repository is None:
+        with _lock:
+            if _transaction_repository is None:
+                _build_repositories()
+    assert _transaction_repository is not None
+    return _transaction_repository
+
+
+def get_category_repository() -> CategoryRepository:
+    """The configured categories data-access backend."""
+    if _category_repository is None:
+        with _lock:
+            if _category_repository is None:
+                _build_repositories()
+    assert _category_repository is not None
+    return _category_repository
+
+
+def get_job_repository() -> JobRepository:
+    """The configured jobs data-access backend."""
+    if _job_repository is None:
+        with _lock:
+            if _job_repository is None:
+                _build_repositories()
+    assert _job_repository is not None
+    return _job_repository
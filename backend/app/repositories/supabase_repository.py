@@ -0,0 +1,348 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, cast
+
+from postgrest import CountMethod
+from app.supabase.supabase_client import supabase, get_client
+from app.repositories.base import CategoryRepository, JobRepository, TransactionRepository
+from app.repositories.fields import TRANSACTION_SORT_FIELDS
+from app.repositories.paging import POSTGREST_MAX_ROWS, fetch_all
+from app.repositories.transaction_query import TransactionQuery
+
+TRANSACTION_SELECT = "*, categories(id, name, type, icon)"
+CATEGORY_EMBED = "categories(id, name, type, icon)"
+
+
+def _first(res) -> Optional[Dict[str, Any]]:
+    records = getattr(res, "data", None)
+    if not records:
+        return None
+    return cast(Dict[str, Any], records[0])
+
+
+def _all(res) -> List[Dict[str, Any]]:
+    return [cast(Dict[str, Any], r) for r in (getattr(res, "data", None) or [])]
+
+
+def _read_all(build, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Every row of the request made by `build(client)` (up to `limit`), read in
+    ranges of at most POSTGREST_MAX_ROWS so the result is never cut short.
+    `build` must order the rows stably. The request's client is resolved
+    here since later ranges are fetched on a prefetch thread.
+    """
+    client = get_client()
+    return fetch_all(lambda start, end: _all(build(client).range(start, end).execute()), limit=limit)
+
+
+def _transaction_select(fields: Optional[Sequence[str]], include: Sequence[str] = ()) -> str:
+    """PostgREST select for the requested fields; the category embed only when asked for."""
+    if fields is None:
+        return TRANSACTION_SELECT
+
+    columns = [f for f in fields if f != "category"]
+    columns += [f for f in include if f not in columns]
+    if "category" in fields:
+        columns.append(CATEGORY_EMBED)
+    return ", ".join(columns)
+
+
+def _category_select(fields: Optional[Sequence[str]]) -> str:
+    return ", ".join(fields) if fields is not None else "*"
+
+
+def _after(request, after: Dict[str, Any], descending: bool):
+    """
+    Keep only rows past the keyset cursor `after` in the listing order.
+
+    The plain sort_date bound is what Postgres uses as the index range
+    (sql/008_transaction_listing_view.sql); the or= then only has to
+    settle ties within the cursor's own day.
+    """
+    op, bound = ("lt", "lte") if descending else ("gt", "gte")
+    # Values were validated by decode_cursor; timestamps need quoting in filters
+    sort_date = after["date"] or "-infinity"
+    created_at, id_ = f'"{after["created_at"]}"', after["id"]
+    later_in_day = f"created_at.{op}.{created_at},and(created_at.eq.{created_at},id.{op}.{id_})"
+
+    return (
+        request
+        .filter("sort_date", bound, sort_date)
+        .or_(f"sort_date.{op}.{sort_date},and(sort_date.eq.{sort_date},or({later_in_day}))")
+    )
+
+
+def _list_request(client, query: TransactionQuery):
+    """The listing request for a query, without its row limit."""
+    request = (
+        client
+        .table("transactions_listing")
+        .select(_transaction_select(query.fields, TRANSACTION_SORT_FIELDS))
+        .eq("user_id", query.user_id)
+    )
+
+    if query.start_date:
+        request = request.gte("date", query.start_date.isoformat())
+    if query.end_date:
+        request = request.lte("date", query.end_date.isoformat())
+    if query.type_:
+        request = request.eq("type", query.type_)
+    if query.category_id:
+        request = request.eq("category_id", query.category_id)
+    if query.payment_method:
+        request = request.eq("payment_method", query.payment_method)
+    if query.min_amount is not None:
+        request = request.gte("amount", query.min_amount)
+    if query.max_amount is not None:
+        request = request.lte("amount", query.max_amount)
+
+    if query.after:
+        request = _after(request, query.after, query.descending)
+
+    desc = query.descending
+    return (
+        request
+        # sort_date puts undated rows as the oldest in either direction
+        .order("sort_date", desc=desc)
+        .order("created_at", desc=desc)
+        .order("id", desc=desc)
+    )
+
+
+class SupabaseTransactionRepository(TransactionRepository):
+    """Transactions through PostgREST."""
+
+    def insert_transaction(self, data):
+        return _first(supabase.table("transactions").insert(data).execute())
+
+    def insert_transactions(self, rows):
+        if not rows:
+            return []
+        return _all(supabase.table("transactions").insert(rows).execute())
+
+    def update_transactions(self, user_id, updates):
+        if not updates:
+            return []
+        # See sql/004_batch_transaction_updates.sql
+        res = supabase.rpc("batch_update_transactions", {
+            "p_user_id": user_id,
+            "p_updates": updates
+        }).execute()
+        return _all(res)
+
+    def existing_imports(self, user_id, rows):
+        if not rows:
+            return []
+        # See sql/005_transaction_import_hash.sql; sent in max-rows slices so
+        # the returned positions are never cut short
+        positions = []
+        for start in range(0, len(rows), POSTGREST_MAX_ROWS):
+            res = supabase.rpc("existing_transaction_imports", {
+                "p_user_id": user_id,
+                "p_rows": rows[start:start + POSTGREST_MAX_ROWS]
+            }).execute()
+            positions += [start + int(position) for position in (res.data or [])]
+        return positions
+
+    def update_transaction(self, transaction_id, user_id, updates):
+        res = (
+            supabase
+            .table("transactions")
+            .update(updates)
+            .eq("id", transaction_id)
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return _first(res)
+
+    def list_transactions(self, query: TransactionQuery):
+        if query.limit and query.limit <= POSTGREST_MAX_ROWS:
+            return _all(_list_request(supabase, query).limit(query.limit).execute())
+        return _read_all(lambda client: _list_request(client, query), limit=query.limit)
+
+    def get_transaction(self, transaction_id, user_id, fields=None):
+        res = (
+            supabase
+            .table("transactions")
+            .select(_transaction_select(fields))
+            .eq("id", transaction_id)
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return _first(res)
+
+    def delete_transaction(self, transaction_id, user_id):
+        res = (
+            supabase
+            .table("transactions")
+            .delete()
+            .eq("id", transaction_id)
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return _first(res)
+
+    def delete_transactions(self, user_id, transaction_ids):
+        if not transaction_ids:
+            return []
+        res = (
+            supabase
+            .table("transactions")
+            .delete()
+            .eq("user_id", user_id)
+            .in_("id", list(transaction_ids))
+            .execute()
+        )
+        return _all(res)
+
+    def delete_transactions_batch(self, user_id, limit):
+        # See sql/006_delete_transactions_batch.sql
+        res = supabase.rpc("delete_transactions_batch", {"p_user_id": user_id, "p_limit": limit}).execute()
+        return _all(res)
+
+    def aggregate_totals(self, user_id, start_date=None, end_date=None):
+        # See sql/001_transaction_totals.sql
+        params = {
+            "p_user_id": user_id,
+            "p_start_date": start_date.isoformat() if start_date else None,
+            "p_end_date": end_date.isoformat() if end_date else None
+        }
+        return _read_all(lambda client: client.rpc("transaction_totals", params).order("category_id").order("tx_type"))
+
+    # Rollup functions are defined in sql/002_transaction_rollups.sql
+    def aggregate_rollup_totals(self, user_id, start_date=None, end_date=None):
+        params = {
+            "p_user_id": user_id,
+            "p_start_month": start_date.isoformat() if start_date else None,
+            "p_end_month": end_date.isoformat() if end_date else None
+        }
+        return _read_all(lambda client: client.rpc("transaction_rollup_totals", params).order("category_id").order("tx_type"))
+
+    def apply_rollup_deltas(self, user_id, deltas):
+        supabase.rpc("apply_transaction_rollup_deltas", {
+            "p_user_id": user_id,
+            "p_deltas": deltas
+        }).execute()
+
+    def delete_rollups(self, user_id):
+        supabase.table("transaction_rollups").delete().eq("user_id", user_id).execute()
+
+    def rebuild_rollups(self, user_id=None):
+        res = supabase.rpc("rebuild_transaction_rollups", {"p_user_id": user_id}).execute()
+        return int(res.data or 0)
+
+    def verify_rollups(self, user_id=None):
+        return _read_all(
+            lambda client: (
+                client.rpc("verify_transaction_rollups", {"p_user_id": user_id})
+                .order("user_id").order("year").order("month").order("category_id").order("type")
+            )
+        )
+
+
+class SupabaseCategoryRepository(CategoryRepository):
+    """Categories through PostgREST."""
+
+    def insert_category(self, data):
+        return _first(supabase.table("categories").insert(data).execute())
+
+    def get_category(self, id):
+        return _first(supabase.table("categories").select("*").eq("id", id).execute())
+
+    def get_category_for_user(self, id, user_id, fields=None):
+        res = (
+            supabase
+            .table("categories")
+            .select(_category_select(fields))
+            .eq("id", id)
+            .or_(f"user_id.eq.{user_id},user_id.is.null")
+            .execute()
+        )
+        return _first(res)
+
+    def list_categories(self, user_id, fields=None):
+        return _read_all(
+            lambda client: (
+                client.table("categories").select(_category_select(fields))
+                .or_(f"user_id.eq.{user_id},user_id.is.null").order("id")
+            )
+        )
+
+    def list_categories_by_ids(self, user_id, ids):
+        if not ids:
+            return []
+        res = (
+            supabase
+            .table("categories")
+            .select("*")
+            .in_("id", list(ids))
+            .or_(f"user_id.eq.{user_id},user_id.is.null")
+            .execute()
+        )
+        return _all(res)
+
+    def list_default_categories(self):
+        return _read_all(lambda client: client.table("categories").select("*").is_("user_id", "null").order("id"))
+
+    def list_user_categories(self, user_id):
+        return _read_all(lambda client: client.table("categories").select("*").eq("user_id", user_id).order("id"))
+
+    def update_category(self, id, user_id, updates):
+        return _first(supabase.table("categories").update(updates).eq("id", id).eq("user_id", user_id).execute())
+
+    def delete_category(self, id, user_id):
+        return _first(supabase.table("categories").delete().eq("id", id).eq("user_id", user_id).execute())
+
+    def count_category_transactions(self, id):
+        res = supabase.table("transactions").select("id", count=CountMethod.exact).eq("category_id", id).limit(1).execute()
+        return res.count or 0
+
+
+class SupabaseJobRepository(JobRepository):
+    """Jobs through PostgREST."""
+
+    def insert_job(self, data):
+        return _first(supabase.table("jobs").insert(data).execute())
+
+    def update_job(self, job_id, updates):
+        updates = dict(updates, updated_at=datetime.now(timezone.utc).isoformat())
+        return _first(supabase.table("jobs").update(updates).eq("id", job_id).execute())
+
+    def get_job(self, job_id, user_id):
+        return _first(supabase.table("jobs").select("*").eq("id", job_id).eq("user_id", user_id).execute())
+
+    def list_jobs(self, user_id, limit):
+        res = (
+            supabase
+            .table("jobs")
+            .select("*")
+            .eq("user_id", user_id)
+            .order("created_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return _all(res)
+
+    def count_active_jobs(self, user_id, updated_since):
+        res = (
+            supabase
+            .table("jobs")
+            .select("id", count=CountMethod.exact)
+            .eq("user_id", user_id)
+            .in_("status", ["queued", "running"])
+            .gte("updated_at", updated_since)
+            .limit(1)
+            .execute()
+        )
+        return res.count or 0
+
+    def request_job_cancel(self, job_id, user_id):
+        res = (
+            supabase
+            .table("jobs")
+            .update({"cancel_requested": True, "updated_at": datetime.now(timezone.utc).isoformat()})
+            .eq("id", job_id)
+            .eq("user_id", user_id)
+            .in_("status", ["queued", "running"])
+            .execute()
+        )
+        return _first(res)
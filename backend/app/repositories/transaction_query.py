@@ -0,0 +1,92 @@
+from datetime import date
+from typing import Any, Dict, Optional, Sequence
+
+from app.repositories.fields import TRANSACTION_FIELDS
+
+TRANSACTION_TYPES = ("income", "expense")
+SORT_ORDERS = ("desc", "asc")
+
+
+class TransactionQuery:
+    """
+    Filters, ordering and page bounds for listing a user's transactions.
+
+    Every field narrows the query sent to the database; repositories push all
+    of them down instead of filtering rows in Python. Rows are ordered by date
+    (undated rows sort as the oldest), then created_at, then id, newest first
+    unless `order` is "asc".
+
+    `after` holds the date, created_at and id of the last row already seen
+    (see app.helpers.cursor_helper); only rows after it in the requested order
+    are returned. `fields` limits the columns read (see TRANSACTION_FIELDS);
+    the sort columns are always included.
+    """
+
+    def __init__(
+        self,
+        user_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        type_: Optional[str] = None,
+        category_id: Optional[str] = None,
+        payment_method: Optional[str] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        limit: Optional[int] = None,
+        order: str = "desc",
+        after: Optional[Dict[str, Any]] = None,
+        fields: Optional[Sequence[str]] = None
+    ):
+        if not user_id:
+            raise ValueError("User ID is required")
+        if type_ is not None and type_ not in TRANSACTION_TYPES:
+            raise ValueError("Type must be 'income' or 'expense'")
+        if order not in SORT_ORDERS:
+            raise ValueError("Order must be 'asc' or 'desc'")
+        if limit is not None and limit <= 0:
+            raise ValueError("Limit must be greater than 0")
+        if start_date and end_date and start_date > end_date:
+            raise ValueError("start_date must be on or before end_date")
+        if min_amount is not None and max_amount is not None and min_amount > max_amount:
+            raise ValueError("min_amount must be less than or equal to max_amount")
+        if fields is not None and (not fields or set(fields) - set(TRANSACTION_FIELDS)):
+            raise ValueError("Unknown or empty transaction fields")
+
+        self.user_id = user_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.type_ = type_
+        self.category_id = category_id
+        self.payment_method = payment_method
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.limit = limit
+        self.order = order
+        self.after = after
+        self.fields = tuple(fields) if fields is not None else None
+
+    @property
+    def descending(self) -> bool:
+        return self.order == "desc"
+
+    def _key(self) -> tuple:
+        values = dict(vars(self))
+        if values["after"] is not None:
+            values["after"] = tuple(sorted(values["after"].items()))
+        return tuple(sorted(values.items()))
+
+    def __eq__(self, other):
+        return isinstance(other, TransactionQuery) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def replace(self, **changes) -> "TransactionQuery":
+        """A copy of this query with some fields changed."""
+        fields = dict(vars(self))
+        fields.update(changes)
+        return TransactionQuery(**fields)
+
+    def __repr__(self):
+        active = {k: v for k, v in vars(self).items() if v is not None}
+        return f"<TransactionQuery {active}>"
@@ -0,0 +1,9 @@
+from flask import Blueprint
+from app.controllers import jobs_controller
+
+jobs_bp = Blueprint('jobs', __name__)
+
+jobs_bp.route('/', methods=['POST'])(jobs_controller.create_job)
+jobs_bp.route('/', methods=['GET'])(jobs_controller.list_jobs)
+jobs_bp.route('/<job_id>', methods=['GET'])(jobs_controller.get_job)
+jobs_bp.route('/<job_id>/cancel', methods=['POST'])(jobs_controller.cancel_job)
@@ -13,6 +13,9 @@ transactions_bp.route('/<transaction_id>', methods=['DELETE'])(transactions_cont
 
 # Bulk operations
 transactions_bp.route('/all', methods=['DELETE'])(transactions_controller.delete_all_transactions)
+transactions_bp.route('/batch', methods=['POST'])(transactions_controller.batch_transactions)
+transactions_bp.route('/import', methods=['POST'])(transactions_controller.import_transactions)
+transactions_bp.route('/export', methods=['GET'])(transactions_controller.export_transactions)
 
 # Analytics endpoints
 transactions_bp.route('/totals', methods=['GET'])(transactions_controller.get_totals)
@@ -1,5 +1,11 @@
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+from flask import g, has_app_context
+from werkzeug.local import LocalProxy
+from contextlib import contextmanager
+from typing import Callable, Iterator, cast
+import httpx
 import os
+import queue
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,5 +16,129 @@ SUPABASE_URL = os.getenv('SUPABASE_URL')
 
 if not SUPABASE_KEY or not SUPABASE_URL:
 	raise ValueError("SUPABASE_KEY and SUPABASE_URL environment variables must be set")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# Number of pre-built clients handed out to concurrent requests
+SUPABASE_POOL_SIZE = int(os.getenv('SUPABASE_POOL_SIZE', '8'))
+# Seconds a request waits for a free client before failing
+SUPABASE_POOL_TIMEOUT = float(os.getenv('SUPABASE_POOL_TIMEOUT', '10'))
+SUPABASE_HTTP_TIMEOUT = float(os.getenv('SUPABASE_HTTP_TIMEOUT', '30'))
+
+# One connection pool shared by every client so keep-alive connections stay warm
+http_client = httpx.Client(
+	http2=True,
+	follow_redirects=True,
+	timeout=SUPABASE_HTTP_TIMEOUT,
+	limits=httpx.Limits(
+		max_connections=SUPABASE_POOL_SIZE * 2,
+		max_keepalive_connections=SUPABASE_POOL_SIZE,
+		keepalive_expiry=60
+	)
+)
+
+
+def build_client() -> Client:
+	"""Create a server-side client: no persisted session, no refresh timers."""
+	return create_client(SUPABASE_URL, SUPABASE_KEY, options=ClientOptions(
+		auto_refresh_token=False,
+		persist_session=False,
+		httpx_client=http_client
+	))
+
+
+class SupabaseClientPool:
+	"""
+	Fixed-size pool of pre-built Supabase clients.
+
+	Each request borrows its own client, so a session set for one user can
+	never be seen by another request running on a different thread.
+	"""
+
+	def __init__(self, size: int, timeout: float, factory: Callable[[], Client] = build_client):
+		self.size = size
+		self.timeout = timeout
+		self.factory = factory
+		# LIFO hands out the most recently used (warmest) client first
+		self._idle: "queue.LifoQueue[Client]" = queue.LifoQueue()
+		for _ in range(size):
+			self._idle.put(factory())
+
+	def acquire(self) -> Client:
+		try:
+			return self._idle.get(timeout=self.timeout)
+		except queue.Empty:
+			raise RuntimeError(f"No Supabase client available after {self.timeout}s (pool size {self.size})")
+
+	def release(self, client: Client, dirty: bool = False):
+		"""
+		Return a client to the pool. Clients that carried a user session are
+		replaced with a fresh one instead of being reused.
+		"""
+		self._idle.put(self.factory() if dirty else client)
+
+	@contextmanager
+	def connection(self) -> Iterator[Client]:
+		client = self.acquire()
+		try:
+			yield client
+		finally:
+			self.release(client)
+
+	@contextmanager
+	def auth_session(self) -> Iterator[Client]:
+		"""
+		Borrow a client for sign-in, sign-up or session refresh. Those calls
+		switch the client's Authorization header to the user's JWT, so it is
+		replaced rather than reused afterwards.
+		"""
+		client = self.acquire()
+		try:
+			yield client
+		finally:
+			self.release(client, dirty=True)
+
+	@contextmanager
+	def user_session(self, access_token: str) -> Iterator[Client]:
+		"""Borrow a client authenticated as the user owning `access_token`."""
+		client = self.acquire()
+		try:
+			client.auth.set_session(access_token, '')
+			yield client
+		finally:
+			self.release(client, dirty=True)
+
+
+client_pool = SupabaseClientPool(SUPABASE_POOL_SIZE, SUPABASE_POOL_TIMEOUT)
+
+# Used outside of a request (CLI commands, background work)
+shared_client = build_client()
+
+
+def get_client() -> Client:
+	"""Return the client bound to the current request, borrowing one on first use."""
+	if not has_app_context():
+		return shared_client
+
+	client = g.get('supabase_client')
+	if client is None:
+		client = client_pool.acquire()
+		g.supabase_client = client
+	return client
+
+
+def is_signed_in(client: Client) -> bool:
+	"""True once an auth call has replaced the project key with a user's JWT."""
+	return client.options.headers.get('Authorization') != f"Bearer {SUPABASE_KEY}"
+
+
+def release_request_client(exc=None):
+	"""
+	Teardown hook: give the request's client back to the pool. A client
+	that picked up a user's session is replaced, so the next request is
+	not served with that user's identity.
+	"""
+	client = g.pop('supabase_client', None)
+	if client is not None:
+		client_pool.release(client, dirty=is_signed_in(client))
+
+
+supabase: Client = cast(Client, LocalProxy(get_client))
@@ -0,0 +1,112 @@
+"""
+Benchmark auth overhead per request for require_auth.
+
+Compares the remote mode (one Supabase Auth round trip per request, simulated
+with a fixed latency) against local verification with a stand-in signing key
+set, and both against a warm token cache. Run from the backend directory:
+
+    python -m benchmarks.bench_auth --requests 2000 --remote-latency-ms 40
+"""
+import argparse
+import os
+import time
+import uuid
+from types import SimpleNamespace
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "benchmark-anon-key")
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec
+from flask import Flask, g
+
+from app.cache.token_cache import TokenCache
+from app.helpers.jwt_helper import JWKSCache, LocalTokenVerifier
+from app.middlewares import auth_middleware
+
+KEY_ID = "bench-key"
+ISSUER = f"{os.environ['SUPABASE_URL'].rstrip('/')}/auth/v1"
+
+
+def build_key_set():
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    public_jwk = jwt.algorithms.ECAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    public_jwk.update({"kid": KEY_ID, "alg": "ES256", "use": "sig"})
+    return private_key, {"keys": [public_jwk]}
+
+
+def issue_token(private_key, user_id):
+    now = int(time.time())
+    claims = {
+        "sub": user_id,
+        "aud": "authenticated",
+        "role": "authenticated",
+        "iss": ISSUER,
+        "iat": now,
+        "exp": now + 3600
+    }
+    return jwt.encode(claims, private_key, algorithm="ES256", headers={"kid": KEY_ID})
+
+
+class RemoteAuthStandIn:
+    """Mimics supabase.auth.get_user with a fixed network round trip."""
+
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+
+    def get_user(self, token):
+        time.sleep(self.latency_s)
+        claims = jwt.decode(token, options={"verify_signature": False})
+        return SimpleNamespace(user=SimpleNamespace(id=claims["sub"]))
+
+
+def run(app, view, token, requests):
+    headers = {"Authorization": f"Bearer {token}"}
+    start = time.perf_counter()
+    for _ in range(requests):
+        with app.test_request_context("/", headers=headers):
+            view()
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--remote-latency-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    private_key, key_set = build_key_set()
+    token = issue_token(private_key, str(uuid.uuid4()))
+
+    auth_middleware.supabase = SimpleNamespace(auth=RemoteAuthStandIn(args.remote_latency_ms / 1000))
+    auth_middleware.token_verifier = LocalTokenVerifier(
+        JWKSCache(fetch_jwks=lambda: key_set),
+        issuer=ISSUER
+    )
+
+    app = Flask(__name__)
+    view = auth_middleware.require_auth(lambda: g.user_id)
+
+    # The remote path is dominated by the simulated round trip; keep it short
+    remote_requests = max(1, min(args.requests, 100))
+
+    # A zero-sized token cache stores nothing, so every request is validated
+    auth_middleware.token_cache = TokenCache(max_entries=0)
+
+    auth_middleware.AUTH_VERIFY_MODE = "remote"
+    remote = run(app, view, token, remote_requests)
+
+    auth_middleware.AUTH_VERIFY_MODE = "local"
+    local = run(app, view, token, args.requests)
+
+    auth_middleware.token_cache = TokenCache()
+    cached = run(app, view, token, args.requests)
+
+    print(f"remote get_user : {remote * 1000:8.3f} ms/request ({remote_requests} requests)")
+    print(f"local verify    : {local * 1000:8.3f} ms/request ({args.requests} requests)")
+    print(f"token cache hit : {cached * 1000:8.3f} ms/request ({args.requests} requests)")
+    print(f"speedup         : {remote / local:8.1f}x local, {remote / cached:8.1f}x cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Micro-benchmark for Transaction.get_totals: per-row Python aggregation versus
+database-side GROUP BY, for users with 1k / 10k / 100k transactions.
+
+Without DATABASE_URL, the wire is simulated in-process: the old path encodes
+and decodes every row as JSON (the PostgREST hop) and loops over it, while the
+new path does the same for the aggregate rows only.
+
+With DATABASE_URL set, rows are seeded for --user-id in a real database and
+both queries run against it. Seeded rows are removed afterwards. Run from the
+backend directory:
+
+    python -m benchmarks.bench_totals
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_totals --user-id <uuid>
+"""
+import argparse
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+SIZES = (1_000, 10_000, 100_000)
+CATEGORIES = [
+    {"id": f"00000000-0000-0000-0000-{i:012d}", "name": f"Category {i}",
+     "type": "income" if i < 3 else "expense", "icon": f"icon-{i}"}
+    for i in range(12)
+]
+
+
+def summarize_rows(transactions):
+    """The previous get_totals loop over every transaction row."""
+    totals_per_category = {}
+    total_income = total_expense = 0.0
+    income_by_category, expense_by_category = {}, {}
+
+    for tx in transactions:
+        cat = tx.get("categories")
+        cat_name = cat.get("name", "Unknown") if isinstance(cat, dict) else "Unknown"
+        amt = tx.get("amount", 0)
+        amount = float(amt) if isinstance(amt, (int, float)) else 0.0
+        tx_type = tx.get("type")
+
+        if cat_name not in totals_per_category:
+            totals_per_category[cat_name] = {"total": 0.0, "type": tx_type, "icon": cat.get("icon")}
+        totals_per_category[cat_name]["total"] += amount
+
+        if tx_type == "income":
+            total_income += amount
+            income_by_category[cat_name] = income_by_category.get(cat_name, 0.0) + amount
+        else:
+            total_expense += amount
+            expense_by_category[cat_name] = expense_by_category.get(cat_name, 0.0) + amount
+
+    return totals_per_category, total_income, total_expense, len(transactions)
+
+
+def make_rows(n):
+    rows = []
+    for _ in range(n):
+        cat = random.choice(CATEGORIES)
+        rows.append({
+            "amount": round(random.uniform(1, 500), 2),
+            "type": cat["type"],
+            "category_id": cat["id"],
+            "categories": {"name": cat["name"], "type": cat["type"], "icon": cat["icon"]},
+        })
+    return rows
+
+
+def aggregate_in_database(rows):
+    """What the GROUP BY returns for these rows."""
+    groups = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        groups[(row["category_id"], row["type"])][0] += row["amount"]
+        groups[(row["category_id"], row["type"])][1] += 1
+
+    by_id = {c["id"]: c for c in CATEGORIES}
+    return [
+        {"category_id": cid, "category_name": by_id[cid]["name"], "category_type": by_id[cid]["type"],
+         "category_icon": by_id[cid]["icon"], "tx_type": tx_type, "total": total, "tx_count": count}
+        for (cid, tx_type), (total, count) in groups.items()
+    ]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run_simulated(summarize_totals, repeat):
+    print(f"{'rows':>8}{'per-row ms':>14}{'aggregate ms':>15}{'payload rows':>14}")
+    for n in SIZES:
+        rows = make_rows(n)
+        raw_payload = json.dumps(rows)
+        aggregate_payload = json.dumps(aggregate_in_database(rows))
+
+        before = timed(lambda: summarize_rows(json.loads(raw_payload)), repeat)
+        after = timed(lambda: summarize_totals(json.loads(aggregate_payload)), repeat)
+        print(f"{n:>8}{before:>14.2f}{after:>15.3f}{len(json.loads(aggregate_payload)):>14}")
+
+
+def run_database(summarize_totals, user_id, repeat):
+    from app.repositories.postgres_engine import PostgresEngine
+    from app.repositories.postgres_repository import PostgresTransactionRepository, register_statements
+
+    engine = PostgresEngine(os.environ["DATABASE_URL"], 1, 2)
+    register_statements(engine)
+    repo = PostgresTransactionRepository(engine)
+
+    categories = engine.fetch("SELECT id, type FROM categories WHERE user_id IS NULL OR user_id = %s", (user_id,))
+    if not categories:
+        raise SystemExit("No categories visible to this user; cannot seed transactions")
+
+    row_query = """
+        SELECT t.amount, t.type, t.category_id, c.name, c.type AS category_type, c.icon
+        FROM transactions t LEFT JOIN categories c ON c.id = t.category_id
+        WHERE t.user_id = %s
+    """
+
+    def per_row():
+        rows = engine.fetch(row_query, (user_id,))
+        summarize_rows([
+            {"amount": r["amount"], "type": r["type"],
+             "categories": {"name": r["name"], "type": r["category_type"], "icon": r["icon"]}}
+            for r in rows
+        ])
+
+    print(f"{'rows':>8}{'per-row ms':>14}{'aggregate ms':>15}")
+    seeded = 0
+    try:
+        for n in SIZES:
+            with engine.connection() as conn, conn.cursor() as cur:
+                today = date.today()
+                for _ in range(n - seeded):
+                    cat = random.choice(categories)
+                    cur.execute(
+                        "INSERT INTO transactions (title, amount, payment_method, category_id, type, user_id, date, description) "
+                        "VALUES ('Bench', %s, 'card', %s, %s, %s, %s, 'bench-seed')",
+                        (round(random.uniform(1, 500), 2), cat["id"], cat["type"], user_id,
+                         today - timedelta(days=random.randint(0, 730)))
+                    )
+            seeded = n
+
+            before = timed(per_row, repeat)
+            after = timed(lambda: summarize_totals(repo.aggregate_totals(user_id)), repeat)
+            print(f"{n:>8}{before:>14.2f}{after:>15.2f}")
+    finally:
+        engine.fetch("DELETE FROM transactions WHERE user_id = %s AND description = 'bench-seed'", (user_id,))
+        engine.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+    os.environ.setdefault("SUPABASE_KEY", "benchmark-anon-key")
+    from app.models.transaction_class import Transaction
+
+    if os.getenv("DATABASE_URL") and args.user_id:
+        run_database(Transaction.summarize_totals, args.user_id, args.repeat)
+    else:
+        run_simulated(Transaction.summarize_totals, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from app.init import create_app
 
-app = create_app()
-
+# Built only when run directly: image workers re-import this module, and
+# `flask --app run` finds create_app on its own
 if __name__ == "__main__":
+    app = create_app()
     app.run(debug=True)
@@ -0,0 +1,39 @@
+-- Aggregated totals for Transaction.get_totals / get_monthly_summary.
+-- Returns one row per (category, transaction type) in the date window instead
+-- of every transaction row.
+
+create or replace function public.transaction_totals(
+    p_user_id uuid,
+    p_start_date date default null,
+    p_end_date date default null
+)
+returns table (
+    category_id uuid,
+    category_name text,
+    category_type text,
+    category_icon text,
+    tx_type text,
+    total numeric,
+    tx_count bigint
+)
+language sql
+stable
+as $$
+    select
+        t.category_id,
+        c.name::text,
+        c.type::text,
+        c.icon::text,
+        t.type::text,
+        sum(t.amount),
+        count(*)
+    from public.transactions t
+    left join public.categories c on c.id = t.category_id
+    where t.user_id = p_user_id
+      and (p_start_date is null or t.date >= p_start_date)
+      and (p_end_date is null or t.date <= p_end_date)
+    group by t.category_id, c.name, c.type, c.icon, t.type
+$$;
+
+create index if not exists transactions_user_id_date_idx
+    on public.transactions (user_id, date);
@@ -0,0 +1,169 @@
+-- Per-user monthly rollups of transactions by category and type.
+-- Maintained incrementally by the Transaction write paths; rebuilt or
+-- checked with `flask --app run rollups rebuild|verify`.
+-- Transactions without a date are kept in the (0, 0) bucket so all-time
+-- totals still include them.
+
+create table if not exists public.transaction_rollups (
+    user_id uuid not null,
+    year integer not null,
+    month integer not null,
+    category_id uuid not null,
+    type text not null,
+    total numeric not null default 0,
+    tx_count bigint not null default 0,
+    primary key (user_id, year, month, category_id, type)
+);
+
+
+-- p_deltas: [{"year", "month", "category_id", "type", "amount", "count"}, ...]
+-- Deltas of concurrent writes may arrive in any order, so a bucket can go
+-- below zero for a moment; only empty buckets are removed, or a late +1
+-- would recreate one that should have been cancelled out.
+create or replace function public.apply_transaction_rollup_deltas(
+    p_user_id uuid,
+    p_deltas jsonb
+)
+returns void
+language sql
+as $$
+    insert into public.transaction_rollups as r
+        (user_id, year, month, category_id, type, total, tx_count)
+    select
+        p_user_id,
+        (d->>'year')::integer,
+        (d->>'month')::integer,
+        (d->>'category_id')::uuid,
+        d->>'type',
+        sum((d->>'amount')::numeric),
+        sum((d->>'count')::bigint)
+    from jsonb_array_elements(p_deltas) d
+    group by 1, 2, 3, 4, 5
+    on conflict (user_id, year, month, category_id, type) do update
+        set total = r.total + excluded.total,
+            tx_count = r.tx_count + excluded.tx_count;
+
+    delete from public.transaction_rollups
+    where user_id = p_user_id and tx_count = 0;
+$$;
+
+
+create or replace function public.transaction_rollup_totals(
+    p_user_id uuid,
+    p_start_month date default null,
+    p_end_month date default null
+)
+returns table (
+    category_id uuid,
+    category_name text,
+    category_type text,
+    category_icon text,
+    tx_type text,
+    total numeric,
+    tx_count bigint
+)
+language sql
+stable
+as $$
+    select
+        r.category_id,
+        c.name::text,
+        c.type::text,
+        c.icon::text,
+        r.type,
+        sum(r.total),
+        sum(r.tx_count)::bigint
+    from public.transaction_rollups r
+    left join public.categories c on c.id = r.category_id
+    where r.user_id = p_user_id
+      -- any date bound excludes undated transactions, like "date >= x" does
+      and ((p_start_month is null and p_end_month is null) or r.year > 0)
+      and (p_start_month is null
+           or (r.year, r.month) >= (extract(year from p_start_month)::integer, extract(month from p_start_month)::integer))
+      and (p_end_month is null
+           or (r.year, r.month) <= (extract(year from p_end_month)::integer, extract(month from p_end_month)::integer))
+    group by r.category_id, c.name, c.type, c.icon, r.type
+$$;
+
+
+-- Recompute rollups from raw transactions for one user, or everyone when null.
+create or replace function public.rebuild_transaction_rollups(p_user_id uuid default null)
+returns bigint
+language plpgsql
+as $$
+declare
+    inserted bigint;
+begin
+    delete from public.transaction_rollups
+    where p_user_id is null or user_id = p_user_id;
+
+    insert into public.transaction_rollups
+        (user_id, year, month, category_id, type, total, tx_count)
+    select
+        t.user_id,
+        coalesce(extract(year from t.date)::integer, 0),
+        coalesce(extract(month from t.date)::integer, 0),
+        t.category_id,
+        t.type::text,
+        sum(t.amount),
+        count(*)
+    from public.transactions t
+    where p_user_id is null or t.user_id = p_user_id
+    group by 1, 2, 3, 4, 5;
+
+    get diagnostics inserted = row_count;
+    return inserted;
+end;
+$$;
+
+
+-- Buckets where the rollups disagree with the raw transactions.
+create or replace function public.verify_transaction_rollups(p_user_id uuid default null)
+returns table (
+    user_id uuid,
+    year integer,
+    month integer,
+    category_id uuid,
+    type text,
+    rollup_total numeric,
+    actual_total numeric,
+    rollup_count bigint,
+    actual_count bigint
+)
+language sql
+stable
+as $$
+    with actual as (
+        select
+            t.user_id,
+            coalesce(extract(year from t.date)::integer, 0) as year,
+            coalesce(extract(month from t.date)::integer, 0) as month,
+            t.category_id,
+            t.type::text as type,
+            sum(t.amount) as total,
+            count(*) as tx_count
+        from public.transactions t
+        where p_user_id is null or t.user_id = p_user_id
+        group by 1, 2, 3, 4, 5
+    ),
+    rolled as (
+        select r.user_id, r.year, r.month, r.category_id, r.type, r.total, r.tx_count
+        from public.transaction_rollups r
+        where p_user_id is null or r.user_id = p_user_id
+    )
+    select
+        coalesce(a.user_id, r.user_id),
+        coalesce(a.year, r.year),
+        coalesce(a.month, r.month),
+        coalesce(a.category_id, r.category_id),
+        coalesce(a.type, r.type),
+        r.total,
+        a.total,
+        r.tx_count,
+        a.tx_count
+    from actual a
+    full outer join rolled r
+        on r.user_id = a.user_id and r.year = a.year and r.month = a.month
+       and r.category_id = a.category_id and r.type = a.type
+    where r.total is distinct from a.total or r.tx_count is distinct from a.tx_count
+$$;
@@ -0,0 +1,11 @@
+-- Indexes backing keyset pagination of GET /api/transactions.
+-- Listing order: date desc (undated last), created_at desc, id desc.
+
+-- Used by the PostgREST (DATA_BACKEND=supabase) listing
+create index if not exists transactions_user_listing_idx
+    on public.transactions (user_id, date desc nulls last, created_at desc, id desc);
+
+-- Used by the direct Postgres (DATA_BACKEND=postgres) listing, which pages
+-- with a single row comparison on this sort key
+create index if not exists transactions_user_keyset_idx
+    on public.transactions (user_id, (coalesce(date, '-infinity'::date)) desc, created_at desc, id desc);
@@ -0,0 +1,43 @@
+-- Apply many partial transaction updates in one statement, for
+-- POST /api/transactions/batch.
+-- p_updates: [{"id": ..., "title"?, "amount"?, "payment_method"?, "category_id"?,
+--              "type"?, "description"?, "document_url"?, "date"?}, ...]
+-- Only the listed columns can change; rows not owned by p_user_id are skipped.
+-- Returns each updated row before and after the change so callers can adjust
+-- rollups and caches.
+
+create or replace function public.batch_update_transactions(
+    p_user_id uuid,
+    p_updates jsonb
+)
+returns table (id uuid, previous jsonb, updated jsonb)
+language sql
+as $$
+    with input as (
+        select distinct on ((u->>'id')::uuid)
+            (u->>'id')::uuid as id,
+            u - 'id' - 'user_id' - 'created_at' as changes
+        from jsonb_array_elements(p_updates) with ordinality as e(u, ord)
+        order by (u->>'id')::uuid, ord desc
+    ),
+    updated as (
+        update public.transactions t
+        set (title, amount, payment_method, category_id, type, description, document_url, date) = (
+            select r.title, r.amount, r.payment_method, r.category_id, r.type,
+                   r.description, r.document_url, r.date
+            from jsonb_populate_record(t, i.changes) r
+        )
+        from input i,
+             -- locked copy of the row as it was before this update
+             (
+                 select p.*
+                 from public.transactions p
+                 where p.user_id = p_user_id and p.id in (select id from input)
+                 for update
+             ) previous
+        where t.id = i.id and previous.id = t.id and t.user_id = p_user_id
+        returning t.id, to_jsonb(previous) as previous, to_jsonb(t) as updated
+    )
+    select u.id, u.previous, u.updated
+    from updated u
+$$;
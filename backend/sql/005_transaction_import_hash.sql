@@ -0,0 +1,50 @@
+-- Duplicate detection for statement imports (POST /api/transactions/import).
+-- A transaction's import hash covers (date, amount, title); the expression
+-- index lets each import batch check its rows against everything the user
+-- already has without loading their history.
+
+create or replace function public.transaction_import_hash(
+    p_date date,
+    p_amount numeric,
+    p_title text
+)
+returns text
+language sql
+immutable
+as $$
+    -- Days since 2000-01-01 rather than date::text, which depends on DateStyle
+    select md5(
+        coalesce((p_date - date '2000-01-01')::text, '')
+        || '|' || coalesce(trim_scale(p_amount)::text, '')
+        || '|' || lower(coalesce(p_title, ''))
+    )
+$$;
+
+create index if not exists transactions_user_import_hash_idx
+    on public.transactions (user_id, public.transaction_import_hash(date, amount, title));
+
+
+-- p_rows: [{"date", "amount", "title"}, ...]
+-- Returns the zero-based positions of the rows the user already has.
+create or replace function public.existing_transaction_imports(
+    p_user_id uuid,
+    p_rows jsonb
+)
+returns setof integer
+language sql
+stable
+as $$
+    select (r.ord - 1)::integer
+    from jsonb_array_elements(p_rows) with ordinality as r(row_, ord)
+    where exists (
+        select 1
+        from public.transactions t
+        where t.user_id = p_user_id
+          and public.transaction_import_hash(t.date, t.amount, t.title)
+            = public.transaction_import_hash(
+                (r.row_->>'date')::date,
+                (r.row_->>'amount')::numeric,
+                r.row_->>'title'
+            )
+    )
+$$;
@@ -0,0 +1,43 @@
+-- Delete up to p_limit of a user's transactions in one short transaction,
+-- for the background delete-all job. Only per-bucket totals of what was
+-- deleted come back, shaped like rollup deltas (negative amounts and
+-- counts), never the rows themselves. An empty result means nothing is left.
+
+create or replace function public.delete_transactions_batch(
+    p_user_id uuid,
+    p_limit integer
+)
+returns table (
+    year integer,
+    month integer,
+    category_id uuid,
+    type text,
+    amount numeric,
+    count bigint
+)
+language sql
+as $$
+    with doomed as (
+        select t.id
+        from public.transactions t
+        where t.user_id = p_user_id
+        limit p_limit
+        for update
+    ),
+    deleted as (
+        delete from public.transactions t
+        using doomed d
+        where t.id = d.id
+        returning t.date, t.category_id, t.type::text as type, t.amount
+    )
+    select
+        -- Undated transactions live in the (0, 0) rollup bucket
+        coalesce(extract(year from d.date)::integer, 0),
+        coalesce(extract(month from d.date)::integer, 0),
+        d.category_id,
+        d.type,
+        -sum(d.amount),
+        -count(*)
+    from deleted d
+    group by 1, 2, 3, 4
+$$;
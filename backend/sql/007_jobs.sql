@@ -0,0 +1,28 @@
+-- Background jobs (app/jobs/job_runner.py). Rows outlive the worker that
+-- ran them, so any worker can answer GET /api/jobs/<id> and accept a
+-- cancellation; the worker running the job picks the request up with its
+-- next progress write.
+
+create table if not exists public.jobs (
+    id uuid primary key,
+    user_id uuid not null,
+    kind text not null,
+    status text not null default 'queued',
+    progress jsonb not null default '{}'::jsonb,
+    result jsonb,
+    error text,
+    cancel_requested boolean not null default false,
+    created_at timestamptz not null default now(),
+    started_at timestamptz,
+    finished_at timestamptz,
+    -- Bumped by every write; queued/running jobs that stop updating are
+    -- treated as interrupted
+    updated_at timestamptz not null default now()
+);
+
+create index if not exists jobs_user_created_idx
+    on public.jobs (user_id, created_at desc);
+
+create index if not exists jobs_user_active_idx
+    on public.jobs (user_id)
+    where status in ('queued', 'running');
@@ -0,0 +1,17 @@
+-- Transactions as listed through PostgREST (DATA_BACKEND=supabase), with
+-- the listing's sort key as a plain column. PostgREST cannot express the
+-- row comparison the direct Postgres backend pages with, but filtering
+-- and ordering on sort_date lets Postgres match the expression index
+-- transactions_user_keyset_idx (sql/003), so a keyset cursor becomes a
+-- range bound on that index instead of a filter over every earlier row.
+
+create or replace view public.transactions_listing
+with (security_invoker = true) as
+select
+    t.*,
+    -- Undated rows sort as the oldest
+    coalesce(t.date, '-infinity'::date) as sort_date
+from public.transactions t;
+
+-- Superseded by transactions_user_keyset_idx for PostgREST listings too
+drop index if exists public.transactions_user_listing_idx;